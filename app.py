@@ -1,13 +1,31 @@
 import streamlit as st
-import mysql.connector
-import tempfile
 import pandas as pd
-from PIL import Image
-import google.generativeai as genai
-import base64
+import functools
+import math
 import os
-import dotenv
-dotenv.load_dotenv()
+from concurrent.futures import ThreadPoolExecutor
+# Loads .env once per process; heavy third-party modules are imported on first use.
+import bootstrap
+bootstrap.load_env()
+# Local modules read their settings from the environment at import time.
+import db
+import catalog
+import query_cache
+import questai
+import query_parser
+import safe_sql
+import query_builder
+import similarity
+import details
+import compare
+import facets
+import search_index
+import image_cache
+import export
+from filters import (
+    CITIES, SORT_OPTIONS, PAGE_SIZE, PAGE_SIZES,
+    FilterState, build_filters_query, build_search_query, build_count_query, page_cursor
+)
 # --- CONFIG ---
 st.set_page_config(page_title="Car-Quest ✨", layout="wide")
 
@@ -24,245 +42,374 @@ st.markdown("""
 # --- SIDEBAR NAVIGATION ---
 page = st.sidebar.radio("Navigation", ["Home", "QuestAI", "Filters", "Compare"])
 
-# --- SSL CERTIFICATE SETUP ---
-ssl_ca_content = os.getenv("AIVEN_CA_PEM")
+# --- DB CONNECTION POOL ---
+@st.cache_resource
+def get_db_pool():
+    """One connection pool per process, shared by every session and rerun."""
+    return db.ConnectionPool(db.connect_kwargs(db.ssl_ca_path()))
 
-with tempfile.NamedTemporaryFile(delete=False, mode="w", suffix=".pem") as tmp_file:
-    tmp_file.write(ssl_ca_content)
-    ssl_ca_path = tmp_file.name
-
-# --- DB CONNECTION FUNCTION ---
 def get_db_connection():
-    conn = mysql.connector.connect(
-        host=os.getenv("MYSQL_HOST"),
-        user=os.getenv("MYSQL_USER"),
-        password=os.getenv("MYSQL_PASSWORD"),
-        database=os.getenv("MYSQL_DATABASE"),
-        port=int(os.getenv("MYSQL_PORT")),
-        ssl_ca=ssl_ca_path,
-        connection_timeout=30,
-        use_pure=True
-    )
-    return conn
-
-def bool_to_label(val):
-    """Converts 1/0 (or True/False) to a user-friendly 'True'/'False'."""
-    if val in [1, True]:
-        return "True"
-    elif val in [0, False]:
-        return "False"
-    return str(val)  # Fallback for other data types
+    """Checks out a pooled connection; use as `with get_db_connection() as conn:`."""
+    return get_db_pool().connection()
+
+@st.cache_resource
+def get_statement_cache():
+    """Prepared statements of every pooled connection; each query shape is prepared once per connection."""
+    return query_builder.StatementCache()
+
+def fetch_all(sql, params=(), dictionary=False):
+    """Every row of `sql` with `params`, run as a prepared statement on a pooled connection."""
+    with get_db_connection() as conn:
+        return get_statement_cache().fetch_all(conn, sql, params, dictionary=dictionary)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def has_search_table():
+    """Whether the wide vehicle_search table exists; without it every query uses the joins."""
+    with get_db_connection() as conn:
+        return catalog.has_search_table(conn)
+
+def listing_query(state, limit, after=None):
+    """(sql, params) for a Filters listing page, from vehicle_search when the database has it."""
+    if catalog.BACKEND != "memory" and has_search_table():
+        return build_search_query(state, limit=limit, after=after)
+    return build_filters_query(state, limit=limit, after=after)
+
+# --- IMAGE THUMBNAILS ---
+@st.cache_resource
+def get_image_cache():
+    """One on-disk thumbnail cache per process; images are downloaded once and served as local bytes."""
+    return image_cache.ImageCache()
+
+def show_image(url, width, caption=None):
+    """st.image from the thumbnail cache, falling back to the remote URL if the image cannot be fetched."""
+    data = get_image_cache().thumbnail(url, width)
+    st.image(data if data is not None else url, width=width, caption=caption)
+
+# --- SIDEBAR STATS ---
+def show_stats(title, stats):
+    """A sidebar expander listing a stats object's as_dict() as a Metric/Value table."""
+    with st.sidebar.expander(title):
+        st.table(pd.DataFrame(list(stats.as_dict().items()), columns=["Metric", "Value"]))
 
 # --- SQL GENERATION USING GEMINI ---
-genai.configure(api_key=os.getenv("PPI"))
-model = genai.GenerativeModel("gemini-1.5-flash")
+@st.cache_resource
+def get_sql_model():
+    return questai.gemini_model()
+
+@st.cache_resource
+def get_sql_cache():
+    """Generated SQL persists across restarts, so repeated questions skip the model entirely."""
+    return questai.SqlCache()
 
 def convert_to_sql(user_query):
-    prompt = f'''
-You are an expert SQL generator specializing in vehicle databases. Translate the following natural language query into MySQL queries using the provided schema.
-
-Database: defaultdb
-
-Schema definitions
-# Vehicle table (basic info)
-create_vehicle_table = """
-CREATE TABLE IF NOT EXISTS Vehicle (
-  vehicle_id INT AUTO_INCREMENT PRIMARY KEY,
-  brand VARCHAR(50) NOT NULL,
-  model VARCHAR(50) NOT NULL,
-  variant VARCHAR(255),
-  type VARCHAR(50),
-  price DECIMAL(20,2),
-  url VARCHAR(255),
-  image_link VARCHAR(255)
-);
-"""
-
-# Engine table (engine details)
-create_engine_table = """
-CREATE TABLE IF NOT EXISTS Engine (
-  engine_id INT AUTO_INCREMENT PRIMARY KEY,
-  vehicle_id INT NOT NULL,
-  fuel VARCHAR(20),
-  displacement INT,
-  no_of_cylinders FLOAT,
-  bhp_value INT,
-  bhp_rpm FLOAT,
-  torque_value FLOAT,
-  torque_rpm FLOAT,
-  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
-);
-"""
-
-# Transmission table (transmission details)
-create_transmission_table = """
-CREATE TABLE IF NOT EXISTS Transmission (
-  transmission_id INT AUTO_INCREMENT PRIMARY KEY,
-  vehicle_id INT NOT NULL,
-  transmission VARCHAR(50),
-  gearbox INT,
-  drive_type VARCHAR(50),
-  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
-);
-"""
-
-# Performance table (mileage and capacity)
-create_performance_table = """
-CREATE TABLE IF NOT EXISTS Performance (
-  performance_id INT AUTO_INCREMENT PRIMARY KEY,
-  vehicle_id INT NOT NULL,
-  mileage FLOAT,
-  capacity FLOAT,
-  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
-);
-"""
-
-# Dimensions table (boot space, seating capacity, wheel base)
-create_dimensions_table = """
-CREATE TABLE IF NOT EXISTS Dimensions (
-  dimension_id INT AUTO_INCREMENT PRIMARY KEY,
-  vehicle_id INT NOT NULL,
-  boot_space FLOAT,
-  seating_capacity INT,
-  wheel_base FLOAT,
-  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
-);
-"""
-
-# Chassis table (brakes and tyre details)
-create_chassis_table = """
-CREATE TABLE IF NOT EXISTS Chassis (
-  chassis_id INT AUTO_INCREMENT PRIMARY KEY,
-  vehicle_id INT NOT NULL,
-  front_brake VARCHAR(50),
-  rear_brake VARCHAR(50),
-  tyre_size VARCHAR(50),
-  tyre_type VARCHAR(50),
-  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
-);
-"""
-
-# Features table (additional features as booleans and extras)
-create_features_table = """
-CREATE TABLE IF NOT EXISTS Features (
-  feature_id INT AUTO_INCREMENT PRIMARY KEY,
-  vehicle_id INT NOT NULL,
-  cruise_control BOOLEAN,
-  parking_sensors VARCHAR(20),
-  keyLess_entry BOOLEAN,
-  engine_start_stop_button BOOLEAN,
-  LED_headlamps BOOLEAN,
-  no_of_airbags INT,
-  rear_camera BOOLEAN,
-  hill_assist BOOLEAN,
-  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
-);
-"""
-
-# Price table (separate table for per-city prices)
-create_price_table = """
-CREATE TABLE IF NOT EXISTS Price (
-  price_id INT AUTO_INCREMENT PRIMARY KEY,
-  vehicle_id INT NOT NULL,
-  city VARCHAR(50) NOT NULL,
-  price DECIMAL(20,2),
-  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
-);
-
-
-Now convert the following query to SQL:
-"{user_query}"
-    '''
-    response = model.generate_content(prompt)
-    sql_output = response.text
-    return sql_output.split('```')[1][4:] if '```sql' in sql_output else sql_output
-
-# --- EXPORT FUNCTION ---
-def export_to_csv(data):
-    csv = data.to_csv(index=False).encode('utf-8')
-    b64 = base64.b64encode(csv).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="car_results.csv">Download CSV File</a>'
-    st.markdown(href, unsafe_allow_html=True)
+    """Returns (sql, source); Gemini is only set up when the cache cannot answer."""
+    return questai.convert_to_sql(user_query, get_sql_model, cache=get_sql_cache())
 
-# --- HELPER FUNCTION: FETCH DETAILED VEHICLE INFO ---
-def get_vehicle_details(vehicle_id):
+# --- EXPORT ---
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False)
+def export_frame(data, fmt):
+    return export.frame_to_bytes(data, fmt)
+
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False)
+def export_query(_pool, sql, params, fmt, max_rows, version):
+    """Streams the rows of `sql` from a fresh cursor into the export; cached per query and catalog version."""
+    with _pool.connection() as conn:
+        return export.export_query(conn, sql, params, fmt=fmt, max_rows=max_rows)
+
+def export_results(data, key, query=None, max_rows=None):
+    """
+    One download button per export format. A file is only built when its button is
+    clicked (on a separate thread, without a rerun); with `query` = (sql, params) the
+    rows are streamed from the database instead of taken from `data`.
     """
-    This query may return multiple rows if the vehicle has multiple city-price entries.
-    We will pivot or separate city/price data so we don't get repeated info in the other tabs.
+    formats = export.available_formats()
+    for col, fmt in zip(st.columns(len(formats)), formats):
+        if query is None:
+            build = functools.partial(export_frame, data, fmt)
+        else:
+            build = functools.partial(export_query, get_db_pool(), *query, fmt, max_rows, get_catalog_version())
+        with col:
+            st.download_button(
+                f"Download {fmt}", data=build, file_name=export.file_name("car_results", fmt),
+                mime=export.mime(fmt), key=f"{key}_{fmt}", on_click="ignore"
+            )
+
+# --- HELPER FUNCTION: FETCH DETAILED VEHICLE INFO ---
+def get_vehicle_details_many(vehicle_ids):
     """
-    query = f"""
-    SELECT v.vehicle_id,
-           v.brand, v.model, v.variant, v.type, v.price AS base_price,
-           e.fuel, e.displacement, e.no_of_cylinders, e.bhp_value, e.bhp_rpm, e.torque_value, e.torque_rpm,
-           t.transmission, t.gearbox, t.drive_type,
-           pf.mileage, pf.capacity,
-           d.boot_space, d.seating_capacity, d.wheel_base,
-           c.front_brake, c.rear_brake, c.tyre_size, c.tyre_type,
-           f.cruise_control, f.parking_sensors, f.keyLess_entry, f.engine_start_stop_button, f.LED_headlamps,
-           f.no_of_airbags, f.rear_camera, f.hill_assist,
-           p.city, p.price AS city_price
-    FROM Vehicle v
-    LEFT JOIN Engine e ON v.vehicle_id = e.vehicle_id
-    LEFT JOIN Transmission t ON v.vehicle_id = t.vehicle_id
-    LEFT JOIN Performance pf ON v.vehicle_id = pf.vehicle_id
-    LEFT JOIN Dimensions d ON v.vehicle_id = d.vehicle_id
-    LEFT JOIN Chassis c ON v.vehicle_id = c.vehicle_id
-    LEFT JOIN Features f ON v.vehicle_id = f.vehicle_id
-    LEFT JOIN Price p ON v.vehicle_id = p.vehicle_id
-    WHERE v.vehicle_id = {vehicle_id}
+    Fetches the details of every vehicle in `vehicle_ids` in a single round trip.
+    The query returns one row per (vehicle, city) pair, so the rows are split in memory:
+    the city/price data is separated so we don't get repeated info in the other tabs.
+    Returns a dict mapping vehicle_id -> {"vehicle_info": ..., "city_prices": ...}.
     """
+    vehicle_ids = list(dict.fromkeys(int(v) for v in vehicle_ids))
+    if not vehicle_ids:
+        return {}
+
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        if has_search_table():
+            # One wide row per vehicle, with the city prices as columns.
+            rows = fetch_all(*catalog.details_query(vehicle_ids, wide=True), dictionary=True)
+            return catalog.details_from_records(rows)
+
+        rows = fetch_all(*catalog.details_query(vehicle_ids), dictionary=True)
         if not rows:
-            return None
+            return {}
 
-        # Convert to DataFrame
         df = pd.DataFrame(rows)
 
-        # Separate city/price data from the rest
-        # (1) vehicle_info: columns that are the same for each row
-        # (2) city_prices: multiple city entries
-        city_prices = df[['city','city_price']].drop_duplicates()
-        vehicle_info = df.drop(columns=['city','city_price']).drop_duplicates(subset=['vehicle_id'])
-
-        # Return them in a dictionary
-        return {
-            "vehicle_info": vehicle_info.reset_index(drop=True),
-            "city_prices": city_prices.reset_index(drop=True)
-        }
+        details = {}
+        for vehicle_id, group in df.groupby('vehicle_id', sort=False):
+            # (1) vehicle_info: columns that are the same for each row
+            # (2) city_prices: multiple city entries
+            city_prices = group[['city', 'city_price']].drop_duplicates()
+            vehicle_info = group.drop(columns=['city', 'city_price']).drop_duplicates(subset=['vehicle_id'])
+            details[int(vehicle_id)] = {
+                "vehicle_info": vehicle_info.reset_index(drop=True),
+                "city_prices": city_prices.reset_index(drop=True)
+            }
+        return details
     except Exception as e:
-        st.error(f"Error fetching details for vehicle {vehicle_id}: {e}")
-        return None
+        st.error(f"Error fetching vehicle details: {e}")
+        return {}
 
-# --- HELPER FUNCTION: FETCH SIMILAR CARS ---
-def get_similar_cars(brand, vehicle_id, limit=3):
+@st.cache_data(ttl=details.DETAIL_TTL, show_spinner=False)
+def get_page_details(vehicle_ids, version):
+    """
+    vehicle_id -> plain-dict detail payload of every card on a results page, fetched in
+    one round trip and cached per page (a tuple of ids) and catalog version.
+    """
+    if catalog.BACKEND == "memory":
+        found = get_catalog_engine().details_many(vehicle_ids)
+    else:
+        found = get_vehicle_details_many(vehicle_ids)
+    return {
+        int(vehicle_id): details.payload(item["vehicle_info"], item["city_prices"])
+        for vehicle_id, item in found.items()
+    }
+
+def render_vehicle_details(vehicle_id, page_ids):
     """
-    Example: fetch up to 3 other cars of the same brand, ignoring the current vehicle_id.
-    Customize as needed for a more advanced recommendation.
+    Detail tabs of one result card. Nothing is fetched until a tab is picked; the first
+    tab opened on a page loads the details of every card in `page_ids` at once, and only
+    the picked tab is built, from the cached payloads.
     """
-    query = f"""
-    SELECT vehicle_id, brand, model, variant, type, image_link
-    FROM Vehicle
-    WHERE brand = '{brand}'
-      AND vehicle_id <> {vehicle_id}
-    LIMIT {limit}
+    vehicle_id = int(vehicle_id)
+    tab = st.radio(
+        "Details", details.TABS, index=None, horizontal=True,
+        key=f"detail_tab_{vehicle_id}", label_visibility="collapsed"
+    )
+    if tab is None:
+        return
+    if tab == "Similar Cars":
+        st.write("**Similar Cars**")
+        similar = get_similar_cars_many([(None, vehicle_id)], limit=3).get(vehicle_id, [])
+        if similar:
+            sim_cols = st.columns(len(similar))
+            for i, sim_car in enumerate(similar):
+                with sim_cols[i]:
+                    show_image(sim_car["image_link"], width=150)
+                    st.write(f"{sim_car['brand']} {sim_car['model']}")
+                    st.write(sim_car['variant'])
+        else:
+            st.write("No similar cars found.")
+        return
+
+    payload = get_page_details(page_ids, get_catalog_version()).get(vehicle_id)
+    if payload is None:
+        st.info("Detailed information not available.")
+        return
+    st.markdown(f"### {tab}")
+    if tab == "City Prices":
+        st.markdown(details.city_price_table(payload["city_prices"]))
+        return
+    st.markdown(details.section_table(tab, payload["info"]))
+    if tab == "Overview" and payload["info"].get("base_price") is not None:
+        st.write("**Estimated EMI (5-year loan @ 8% APR):**")
+        emi = details.monthly_emi(float(payload["info"]["base_price"]))  # cast decimal.Decimal to float
+        st.write(f"Approx: ₹{int(emi):,} per month")
+
+# --- HELPER FUNCTION: FETCH SIMILAR CARS ---
+@st.cache_resource(max_entries=1, show_spinner="Indexing similar cars...")
+def load_similarity_index(version):
+    """Built once per catalog version (or read from disk when already saved for it)."""
+    def load_frame():
+        with get_db_connection() as conn:
+            return catalog.load_from_mysql(conn)
+    return similarity.load_or_build(load_frame, version)
+
+def get_similar_cars_many(cars, limit=3):
+    """
+    Returns a dict mapping vehicle_id -> the `limit` most similar cars by specs, price,
+    type, fuel and transmission (other models only), from the precomputed index.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query)
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return results
+        if catalog.BACKEND == "memory":
+            return get_catalog_engine().similar_many(cars, limit=limit)
+        return load_similarity_index(get_catalog_version()).similar_many(cars, limit=limit)
     except Exception as e:
         st.error(f"Error fetching similar cars: {e}")
-        return []
+        return {}
+
+# --- COMPARE ---
+@st.cache_data(show_spinner=False, max_entries=2)
+def get_variant_tree(version):
+    """brand -> model -> [(variant, vehicle_id)] for the Compare pickers, built once per catalog version."""
+    if catalog.BACKEND == "memory":
+        return compare.variant_tree(get_catalog_engine().variant_rows())
+    return compare.variant_tree(fetch_all(compare.TREE_QUERY))
+
+@st.cache_data(ttl=details.DETAIL_TTL, show_spinner=False)
+def get_compare_records(vehicle_ids, cities, version):
+    """Full specs of `vehicle_ids` plus one price per city in `cities`, in the order given."""
+    if catalog.BACKEND == "memory":
+        return get_catalog_engine().records(vehicle_ids)
+    rows = fetch_all(*compare.compare_query(vehicle_ids, cities, wide=has_search_table()), dictionary=True)
+    return compare.order_records(rows, vehicle_ids)
+
+# --- TYPEAHEAD ---
+@st.cache_resource
+def get_search_index():
+    """One typeahead index per process, shared by every session."""
+    return search_index.SearchIndex()
+
+def get_synced_search_index():
+    """The typeahead index, brought up to the current catalog version by re-indexing only what changed."""
+    index = get_search_index()
+    version = get_catalog_version()
+    if index.version != version:
+        index.sync(search_index.rows_from_tree(get_variant_tree(version)), version)
+    return index
+
+def use_variant_suggestion():
+    """Copies a picked suggestion into the Filters variant box."""
+    picked = st.session_state.get("filters_variant_pick")
+    if picked:
+        st.session_state["filters_variant"] = picked
+    st.session_state["filters_variant_pick"] = None
+
+def add_compare_match(count):
+    """Puts the picked search match into the first empty Compare slot (or the last one)."""
+    vehicle_id = st.session_state.get("compare_match")
+    st.session_state["compare_match"] = None
+    if vehicle_id is None:
+        return
+    brand, model, _, _ = get_synced_search_index().docs[vehicle_id]
+    empty = [i for i in range(count) if st.session_state.get(f"compare_variant_{i}") is None]
+    slot = empty[0] if empty else count - 1
+    st.session_state[f"compare_brand_{slot}"] = brand
+    st.session_state[f"compare_model_{slot}"] = model
+    st.session_state[f"compare_variant_{slot}"] = vehicle_id
+
+# --- FACETS ---
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_facets(version):
+    """Facet cube of the catalog (one aggregated query), rebuilt when the catalog version changes."""
+    if catalog.BACKEND == "memory":
+        return facets.FacetCatalog(facets.cube_from_frame(get_catalog_engine().frame), version=version)
+    rows = fetch_all(facets.SEARCH_FACET_QUERY if has_search_table() else facets.FACET_QUERY)
+    return facets.FacetCatalog(pd.DataFrame(rows, columns=facets.CUBE_COLUMNS), version=version)
+
+def get_facets():
+    """The FacetCatalog for the current catalog version."""
+    return load_facets(get_catalog_version())
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_vocabulary(version):
+    """QuestAI parser words for the catalog's brands, types, fuels and transmissions."""
+    return query_parser.Vocabulary(load_facets(version))
+
+def facet_multiselect(label, dim, counts, key):
+    """Multiselect over a facet's values, each labelled with its count for the current selections."""
+    return st.multiselect(
+        label, options=get_facets().values[dim], key=key,
+        format_func=lambda value: facets.label(value, counts.get(value, 0))
+    )
+
+def range_slider(label, column, fallback, key, scale=1):
+    """
+    Range slider spanning a numeric column's values (divided by `scale`), fully open by
+    default. Returns None, no constraint, until it is narrowed.
+    """
+    span = facets.slider_span(get_facets().bounds(column) or fallback, scale)
+    return facets.range_filter(st.slider(label, *span, span, key=key), span)
+
+# --- IN-MEMORY CATALOG ---
+@st.cache_data(ttl=60, show_spinner=False)
+def get_catalog_version():
+    """Polled at most once a minute; a new version makes load_catalog_engine rebuild."""
+    if catalog.CATALOG_CSV:
+        return catalog.csv_version(catalog.CATALOG_CSV)
+    with get_db_connection() as conn:
+        return catalog.mysql_version(conn)
+
+@st.cache_resource(ttl=catalog.CATALOG_TTL, max_entries=1, show_spinner="Loading catalog...")
+def load_catalog_engine(version):
+    if catalog.CATALOG_CSV:
+        frame = catalog.load_from_csv(catalog.CATALOG_CSV)
+    else:
+        with get_db_connection() as conn:
+            frame = catalog.load_from_mysql(conn)
+    return catalog.CatalogEngine(frame, version=version)
+
+def get_catalog_engine():
+    """The process-wide CatalogEngine for the current catalog version."""
+    return load_catalog_engine(get_catalog_version())
+
+# --- FILTERS QUERY CACHE ---
+@st.cache_resource
+def get_query_cache():
+    """One result cache per process, so identical searches from any session skip the database."""
+    return query_cache.QueryCache()
+
+@st.cache_resource
+def get_prefetch_executor():
+    """Background workers that load the next Filters page into the query cache."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="carquest-prefetch")
+
+def listing_job(state, limit, after=None):
+    """
+    (cache key, compute) for one Filters page. `compute` only uses objects resolved
+    here, so it can also run on a prefetch thread.
+    """
+    if catalog.BACKEND == "memory":
+        engine = get_catalog_engine()
+        def run():
+            return engine.search(state, limit=limit, after=after)
+    else:
+        pool, statements = get_db_pool(), get_statement_cache()
+        query, params = listing_query(state, limit, after=after)
+        def run():
+            with pool.connection() as conn:
+                results = statements.fetch_all(conn, query, params, dictionary=True)
+            return pd.DataFrame(results)
+    return query_cache.cache_key(state, limit, backend=catalog.BACKEND, after=after), run
+
+def search_filters(state, limit=10, after=None):
+    """Runs one page of the Filters listing for `state`, or serves it from the query cache."""
+    key, run = listing_job(state, limit, after=after)
+    # Results are tied to the catalog version, so a reload empties the cache.
+    return get_query_cache().get_or_compute(key, run, version=get_catalog_version())
+
+def prefetch_filters(state, limit, after):
+    """Starts loading a page in the background; search_filters then finds it cached (or waits for it)."""
+    key, run = listing_job(state, limit, after=after)
+    get_prefetch_executor().submit(get_query_cache().get_or_compute, key, run, get_catalog_version())
+
+def count_filters(state):
+    """Total matches for `state`; counted once per filter state and shared through the query cache."""
+    def run():
+        if catalog.BACKEND == "memory":
+            return get_catalog_engine().count(state)
+        ((total,),) = fetch_all(*build_count_query(state, wide=has_search_table()))
+        return int(total)
+
+    key = query_cache.cache_key(state, 0, backend=catalog.BACKEND)
+    return get_query_cache().get_or_compute(key, run, version=get_catalog_version())
+
+show_stats("Query Cache", get_query_cache().stats)
+show_stats("Prepared Statements", get_statement_cache().stats)
+show_stats("Image Cache", get_image_cache().stats)
 
 # --- PAGE: HOME ---
 if page == "Home":
@@ -303,11 +450,11 @@ if page == "Home":
     col1, col2, col3 = st.columns(3)
 
     with col1:
-        st.image("https://media.istockphoto.com/id/1167555914/photo/modern-red-suv-car-in-garage-with-lights-turned-on.jpg?s=612x612&w=0&k=20&c=DRKL152y8f0nxgcF-jfLAwM69YtcsYt86XHDEnCssI0=", caption="SUVs")
+        show_image("https://media.istockphoto.com/id/1167555914/photo/modern-red-suv-car-in-garage-with-lights-turned-on.jpg?s=612x612&w=0&k=20&c=DRKL152y8f0nxgcF-jfLAwM69YtcsYt86XHDEnCssI0=", width=600, caption="SUVs")
     with col2:
-        st.image("https://media.istockphoto.com/id/1264045166/photo/car-driving-on-a-road.jpg?s=612x612&w=0&k=20&c=vRYLFjs6XMBZv0rl6Pbk77AlZvFe9RC6gSZuqUe_jXs=", caption="Sedans")
+        show_image("https://media.istockphoto.com/id/1264045166/photo/car-driving-on-a-road.jpg?s=612x612&w=0&k=20&c=vRYLFjs6XMBZv0rl6Pbk77AlZvFe9RC6gSZuqUe_jXs=", width=600, caption="Sedans")
     with col3:
-        st.image("https://media.istockphoto.com/id/1486018004/photo/a-happy-handsome-adult-male-charging-his-expensive-electric-car-before-leaving-his-house-for.jpg?s=612x612&w=0&k=20&c=rY6SHolsHcNtS_y23F0DgAe0arV6KZ_c3-k9r7PNP9Q=", caption="Electric Cars")
+        show_image("https://media.istockphoto.com/id/1486018004/photo/a-happy-handsome-adult-male-charging-his-expensive-electric-car-before-leaving-his-house-for.jpg?s=612x612&w=0&k=20&c=rY6SHolsHcNtS_y23F0DgAe0arV6KZ_c3-k9r7PNP9Q=", width=600, caption="Electric Cars")
 
     st.markdown("---")
 
@@ -374,22 +521,45 @@ elif page == "QuestAI":
     if st.button("Search"):
         if user_input:
             with st.spinner("Processing your request..."):
-                mysql_query = convert_to_sql(user_input)
+                # Plain filter phrases are answered by the local parser; everything else goes to Gemini.
+                state = query_parser.parse_question(user_input, load_vocabulary(get_catalog_version()))
+                if state is not None:
+                    source = "parser"
+                    mysql_query, params = listing_query(state, query_parser.RESULT_LIMIT)
+                else:
+                    (mysql_query, source), params = convert_to_sql(user_input), ()
+                st.caption({
+                    "parser": f"Answered without AI: {query_parser.describe(state) if state else ''}",
+                    "cache": "SQL reused from the cache",
+                    "fuzzy": "SQL reused from a similar cached question",
+                    "llm": "SQL generated by Gemini",
+                }[source])
                 st.code(mysql_query, language='sql')
                 try:
-                    conn = get_db_connection()
-                    cursor = conn.cursor(dictionary=True)
-                    cursor.execute(mysql_query)
-                    results = cursor.fetchall()
-                    cursor.close()
-                    conn.close()
+                    truncated, export_query_args, export_max_rows = False, None, None
+                    if source == "parser" and catalog.BACKEND == "memory":
+                        results = get_catalog_engine().search(state, limit=query_parser.RESULT_LIMIT).to_dict("records")
+                    elif source == "parser":
+                        results = fetch_all(mysql_query, params, dictionary=True)
+                        export_query_args = (mysql_query, params)
+                    else:
+                        # Generated SQL only runs as a single, bounded SELECT.
+                        with get_db_connection() as conn:
+                            safe_result = safe_sql.run_select(conn, mysql_query)
+                        results, truncated = safe_result.rows, safe_result.truncated
+                        # The export re-runs the guarded SQL and streams it, capped like the page.
+                        export_query_args, export_max_rows = (safe_result.sql, ()), safe_sql.MAX_ROWS
+                    if truncated:
+                        st.info(f"Showing the first {safe_sql.MAX_ROWS:,} rows.")
                     if results:
                         st.success("Results:")
                         df = pd.DataFrame(results)
                         st.dataframe(df)
-                        export_to_csv(df)
+                        export_results(df, key="questai_export", query=export_query_args, max_rows=export_max_rows)
                     else:
                         st.warning("No results found for your query.")
+                except safe_sql.UnsafeQuery as e:
+                    st.warning(f"The generated query was not run: {e}")
                 except Exception as e:
                     st.error(f"An error occurred: {e}")
         else:
@@ -398,363 +568,194 @@ elif page == "QuestAI":
 # --- PAGE: CUSTOM FILTERS ---
 elif page == "Filters":
     st.subheader("Filter Your Search")
+    # Selector options, bounds and counts come from the cached facet cube. Keyed widgets
+    # already hold this rerun's values, so the counts follow the selections just made.
+    facet = get_facets()
+    selected = FilterState.create(
+        city=st.session_state.get("filters_city", CITIES[0]),
+        brands=st.session_state.get("filters_brands"),
+        types=st.session_state.get("filters_types"),
+        fuels=st.session_state.get("filters_fuels"),
+        seating=st.session_state.get("filters_seating"),
+        transmissions=st.session_state.get("filters_transmissions"),
+    )
+    city_counts = facet.city_counts(selected)
+
     # Basic Filters
     col1, col2, col3 = st.columns(3)
     with col1:
         city = st.selectbox(
             "Select City",
-            options=["Ahmedabad", "Bangalore", "Chandigarh", "Chennai", "Hyderabad",
-                     "Jaipur", "Lucknow", "Mumbai", "Patna", "Pune"]
+            options=CITIES, key="filters_city",
+            format_func=lambda c: facets.label(c, city_counts[c])
         )
     with col2:
-        brand = st.multiselect("Select Brand", options=["Maruti", "Hyundai", "Tata", "Toyota"])
+        brand = facet_multiselect("Select Brand", "brand", facet.counts("brand", selected), "filters_brands")
     with col3:
-        car_type = st.multiselect(
-            "Select Car Type",
-            options=["Sedan Cars", "Hatchback Cars", "SUV Cars", "MPV Cars"]
-        )
-
-    variant = st.text_input("Variant (Optional)")
-    price_range = st.slider("Price Range (in Lakhs)", 0, 150, (5, 50))
+        car_type = facet_multiselect("Select Car Type", "type", facet.counts("type", selected), "filters_types")
+
+    # The variant box is matched through the typeahead index (typos and partial words
+    # included) and filters by vehicle_id, instead of a LIKE '%...%' scan.
+    variant = st.text_input("Variant (Optional)", key="filters_variant")
+    matched_ids = None
+    if variant.strip():
+        index = get_synced_search_index()
+        matched_ids = index.match_ids(variant)
+        suggestions = [s.variant for s in index.suggest(variant, limit=5)]
+        if suggestions and suggestions != [variant.strip().lower()]:
+            st.pills(
+                "Suggestions", suggestions, key="filters_variant_pick",
+                on_change=use_variant_suggestion, label_visibility="collapsed"
+            )
+    _, hi = facet.price_bounds() or (0, 150e5)
+    price_max = max(1, math.ceil(hi / 100000))
+    price_range = st.slider(
+        "Price Range (in Lakhs)", 0, price_max, (min(5, price_max - 1), min(50, price_max)), key="filters_price"
+    )
 
     # Advanced Filters (Expandable)
     with st.expander("Advanced Filters"):
-        fuel = st.multiselect("Fuel Type", options=["Petrol", "Diesel", "CNG", "Electric"])
-        displacement_range = st.slider("Engine Displacement (cc)", 800, 5000, (800, 5000))
-        bhp_range = st.slider("BHP Value", 50, 500, (50, 500))
-        torque_range = st.slider("Torque Value (Nm)", 50, 5000, (50, 5000))
-        mileage_range = st.slider("Mileage (kmpl)", 5, 40, (5, 40))
-        seating_capacity = st.multiselect("Seating Capacity", options=[2, 4, 5, 7])
-        transmission_type = st.multiselect("Transmission", options=["Manual", "Automatic"])
-        sort_by = st.radio("Sort Results By", options=["Price", "BHP", "Mileage"], index=0)
-
-    # Build filter conditions
-    filters = []
-    filters.append(f"p.city = '{city}'")
-    filters.append(f"p.price BETWEEN {price_range[0]*100000} AND {price_range[1]*100000}")
-    if brand:
-        filters.append("v.brand IN (" + ", ".join(f"'{b}'" for b in brand) + ")")
-    if car_type:
-        filters.append("v.type IN (" + ", ".join(f"'{ct}'" for ct in car_type) + ")")
-    if variant:
-        filters.append(f"v.variant LIKE '%{variant}%'")
-    if fuel:
-        filters.append("e.fuel IN (" + ", ".join(f"'{f}'" for f in fuel) + ")")
-    filters.append(f"e.displacement BETWEEN {displacement_range[0]} AND {displacement_range[1]}")
-    filters.append(f"e.bhp_value BETWEEN {bhp_range[0]} AND {bhp_range[1]}")
-    filters.append(f"e.torque_value BETWEEN {torque_range[0]} AND {torque_range[1]}")
-    filters.append(f"pf.mileage BETWEEN {mileage_range[0]} AND {mileage_range[1]}")
-    if seating_capacity:
-        filters.append("d.seating_capacity IN (" + ", ".join(str(s) for s in seating_capacity) + ")")
-    if transmission_type:
-        filters.append("t.transmission IN (" + ", ".join(f"'{t}'" for t in transmission_type) + ")")
-
-    where_clause = " AND ".join(filters)
-
-    # Sorting clause
-    sort_clause = {
-        "Price": "p.price ASC",
-        "BHP": "e.bhp_value DESC",
-        "Mileage": "pf.mileage DESC"
-    }.get(sort_by, "p.price ASC")
-
-    final_query = f"""
-      SELECT DISTINCT
-          v.vehicle_id,
-          v.brand,
-          v.model,
-          v.variant,
-          v.type,
-          p.price,
-          v.image_link,
-          e.bhp_value,
-          pf.mileage
-      FROM Vehicle v
-      JOIN Price p ON v.vehicle_id = p.vehicle_id
-      JOIN Engine e ON v.vehicle_id = e.vehicle_id
-      JOIN Transmission t ON v.vehicle_id = t.vehicle_id
-      JOIN Performance pf ON v.vehicle_id = pf.vehicle_id
-      JOIN Dimensions d ON v.vehicle_id = d.vehicle_id
-      JOIN Features f ON v.vehicle_id = f.vehicle_id
-      WHERE {where_clause}
-      ORDER BY {sort_clause}
-      LIMIT 10
-    """
+        fuel = facet_multiselect("Fuel Type", "fuel", facet.counts("fuel", selected), "filters_fuels")
+        displacement_range = range_slider("Engine Displacement (cc)", "displacement", (800, 5000), "filters_displacement")
+        bhp_range = range_slider("BHP Value", "bhp_value", (50, 500), "filters_bhp")
+        torque_range = range_slider("Torque Value (Nm)", "torque_value", (50, 5000), "filters_torque")
+        mileage_range = range_slider("Mileage (kmpl)", "mileage", (5, 40), "filters_mileage")
+        seating_capacity = facet_multiselect(
+            "Seating Capacity", "seating_capacity", facet.counts("seating_capacity", selected), "filters_seating"
+        )
+        transmission_type = facet_multiselect(
+            "Transmission", "transmission", facet.counts("transmission", selected), "filters_transmissions"
+        )
+        sort_by = st.radio("Sort Results By", options=SORT_OPTIONS, index=0)
+    page_size = st.selectbox("Results per page", options=PAGE_SIZES, index=PAGE_SIZES.index(PAGE_SIZE))
+
+    state = FilterState.create(
+        city=city,
+        price_range=(price_range[0] * 100000, price_range[1] * 100000),
+        brands=brand,
+        types=car_type,
+        vehicle_ids=matched_ids,
+        fuels=fuel,
+        displacement_range=displacement_range,
+        bhp_range=bhp_range,
+        torque_range=torque_range,
+        mileage_range=mileage_range,
+        seating=seating_capacity,
+        transmissions=transmission_type,
+        sort_by=sort_by
+    )
 
-    st.code(final_query, language='sql')
+    # Page state: the cursor of every page visited so far. Any change to the filters or
+    # page size starts again from page 1.
+    pager = st.session_state.setdefault("filters_pager", {})
+    if pager.get("query") != (state, page_size):
+        pager.update(query=(state, page_size), cursors=[None], next=None)
+    cursors = pager["cursors"]
 
     # Execute query and display results
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(final_query)
-        results = cursor.fetchall()
-        cursor.close()
-        conn.close()
-
-        if results:
-            df_results = pd.DataFrame(results)
-            st.success("Matching Cars:")
+        if catalog.BACKEND != "memory":
+            st.code(listing_query(state, page_size, after=cursors[-1])[0], language='sql')
+        df_results = search_filters(state, limit=page_size, after=cursors[-1])
+        total = count_filters(state)
+
+        # Keyset paging: the next page starts after this page's last row.
+        has_next = len(df_results) == page_size and (len(cursors) - 1) * page_size + len(df_results) < total
+        pager["next"] = page_cursor(state, df_results.iloc[-1]) if has_next else None
+        if has_next:
+            prefetch_filters(state, page_size, pager["next"])
+
+        if not df_results.empty:
+            st.success(f"Matching Cars: {total:,}")
             st.dataframe(df_results)
-            export_to_csv(df_results)
-            # Display detailed view for each result
+            export_results(df_results, key="filters_export")
+
+            nav = st.columns([1, 2, 1])
+            with nav[0]:
+                st.button("← Previous", disabled=len(cursors) == 1, on_click=lambda: cursors.pop())
+            with nav[1]:
+                st.caption(f"Page {len(cursors)} of {max(1, -(-total // page_size))}")
+            with nav[2]:
+                st.button("Next →", disabled=not has_next, on_click=lambda: cursors.append(pager["next"]))
+
+            # Display a card for each result; details are fetched, for the whole page, once a tab is opened.
+            page_ids = tuple(int(v) for v in df_results["vehicle_id"])
             for _, car in df_results.iterrows():
                 with st.container():
                     st.markdown(f"### {car['variant']} ({car['type']})")
                     cols = st.columns([1, 2])
                     with cols[0]:
-                        st.image(car["image_link"], width=250)
+                        show_image(car["image_link"], width=250)
                     with cols[1]:
                         st.markdown(f"**Price:** ₹{int(car['price']):,}")
-                        details_data = get_vehicle_details(car["vehicle_id"])
-
-                        if details_data is not None:
-                            vehicle_info = details_data["vehicle_info"]
-                            city_prices = details_data["city_prices"]
-
-                            # Create tabs
-                            tabs = st.tabs([
-                                "Overview",
-                                "Engine",
-                                "Transmission",
-                                "Performance",
-                                "Dimensions & Chassis",
-                                "Features",
-                                "City Prices",
-                                "Similar Cars"
-                            ])
-
-                            # We only need the first row for general details
-                            # because we dropped duplicates on vehicle_id
-                            row = vehicle_info.iloc[0]
-
-                            # In your "Overview" tab:
-                            with tabs[0]:
-                                st.markdown("### Overview")
-                                overview_dict = {
-                                    "Brand": row['brand'],
-                                    "Model": row['model'],
-                                    "Variant": row['variant'],
-                                    "Type": row['type'],
-                                    "Base Ex-Showroom Price": f"₹{int(float(row['base_price'])):,}",
-                                }
-                                overview_df = pd.DataFrame(list(overview_dict.items()), columns=["Specification", "Value"])
-                                st.table(overview_df)
-
-                                # EMI example (if you want to keep it)
-                                st.write("**Estimated EMI (5-year loan @ 8% APR):**")
-                                principal = float(row['base_price'])  # cast decimal.Decimal to float
-                                interest_rate_annual = 0.08
-                                monthly_interest = interest_rate_annual / 12
-                                months = 5 * 12
-                                emi = (principal * monthly_interest) / (1 - (1 + monthly_interest) ** (-months))
-                                st.write(f"Approx: ₹{int(emi):,} per month")
-
-                            # In your "Engine" tab:
-                            with tabs[1]:
-                                st.markdown("### Engine")
-                                engine_dict = {
-                                    "Fuel": row['fuel'],
-                                    "Displacement (cc)": row['displacement'],
-                                    "No. of Cylinders": row['no_of_cylinders'],
-                                    "BHP Value": row['bhp_value'],
-                                    "BHP RPM": row['bhp_rpm'],
-                                    "Torque Value (Nm)": row['torque_value'],
-                                    "Torque RPM": row['torque_rpm']
-                                }
-                                engine_df = pd.DataFrame(list(engine_dict.items()), columns=["Specification", "Value"])
-                                st.table(engine_df)
-
-                            # In your "Transmission" tab:
-                            with tabs[2]:
-                                st.markdown("### Transmission")
-                                transmission_dict = {
-                                    "Transmission": row['transmission'],
-                                    "Gearbox": row['gearbox'],
-                                    "Drive Type": row['drive_type']
-                                }
-                                trans_df = pd.DataFrame(list(transmission_dict.items()), columns=["Specification", "Value"])
-                                st.table(trans_df)
-
-                            # In your "Performance" tab:
-                            with tabs[3]:
-                                st.markdown("### Performance")
-                                perf_dict = {
-                                    "Mileage (kmpl)": row['mileage'],
-                                    "Fuel Tank Capacity (L)": row['capacity']
-                                }
-                                perf_df = pd.DataFrame(list(perf_dict.items()), columns=["Specification", "Value"])
-                                st.table(perf_df)
-
-                            # In your "Dimensions & Chassis" tab:
-                            with tabs[4]:
-                                st.markdown("### Dimensions & Chassis")
-                                dim_chassis_dict = {
-                                    "Boot Space (L)": row['boot_space'],
-                                    "Seating Capacity": row['seating_capacity'],
-                                    "Wheel Base (mm)": row['wheel_base'],
-                                    "Front Brake": row['front_brake'],
-                                    "Rear Brake": row['rear_brake'],
-                                    "Tyre Size": row['tyre_size'],
-                                    "Tyre Type": row['tyre_type']
-                                }
-                                dim_df = pd.DataFrame(list(dim_chassis_dict.items()), columns=["Specification", "Value"])
-                                st.table(dim_df)
-
-                            # In your "Features" tab:
-                            with tabs[5]:
-                                st.markdown("### Features")
-                                features_dict = {
-                                    "Cruise Control": bool_to_label(row['cruise_control']),
-                                    "Parking Sensors": row['parking_sensors'] if row['parking_sensors'] else "None",
-                                    "Keyless Entry": bool_to_label(row['keyLess_entry']),
-                                    "Engine Start/Stop": bool_to_label(row['engine_start_stop_button']),
-                                    "LED Headlamps": bool_to_label(row['LED_headlamps']),
-                                    "No. of Airbags": row['no_of_airbags'] if row['no_of_airbags'] else "N/A",
-                                    "Rear Camera": bool_to_label(row['rear_camera']),
-                                    "Hill Assist": bool_to_label(row['hill_assist'])
-                                }
-                                feat_df = pd.DataFrame(list(features_dict.items()), columns=["Feature", "Value"])
-                                st.table(feat_df)
-
-                            # In your "City Prices" tab:
-                            with tabs[6]:
-                                st.markdown("### City Prices")
-                                st.dataframe(city_prices)  # Or st.table(city_prices) if you prefer a static table
-
-                            # In your "Similar Cars" tab (tabs[7]):
-                            with tabs[7]:
-                                st.write("**Similar Cars**")
-                                similar = get_similar_cars(row['brand'], row['vehicle_id'], limit=3)
-                                if similar:
-                                    sim_cols = st.columns(len(similar))
-                                    for i, sim_car in enumerate(similar):
-                                        with sim_cols[i]:
-                                            st.image(sim_car["image_link"], width=150)
-                                            st.write(f"{sim_car['brand']} {sim_car['model']}")
-                                            st.write(sim_car['variant'])
-                                else:
-                                    st.write("No similar cars found.")
-                        else:
-                            st.info("Detailed information not available.")
+                        render_vehicle_details(car["vehicle_id"], page_ids)
         else:
             st.warning("No results found.")
     except Exception as e:
         st.error(f"An error occurred: {e}")
 
 elif page == "Compare":
-    st.title("📊 Compare Two Car Models")
-
-    brand1 = st.text_input("Enter Brand for Car 1")
-    model1 = st.text_input("Enter Model for Car 1")
-    brand2 = st.text_input("Enter Brand for Car 2")
-    model2 = st.text_input("Enter Model for Car 2")
-
-    if brand1 and model1 and brand2 and model2:
-        try:
-            conn = get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-
-            # Step 1: Fetch variants
-            fetch_variants_query = """
-            SELECT vehicle_id, brand, model, variant
-            FROM Vehicle
-            WHERE (LOWER(brand) = LOWER(%s) AND LOWER(model) = LOWER(%s))
-            OR (LOWER(brand) = LOWER(%s) AND LOWER(model) = LOWER(%s))
-            """
-            cursor.execute(fetch_variants_query, (brand1, model1, brand2, model2))
-            variant_rows = cursor.fetchall()
-
-            car1_variants = [v for v in variant_rows if v['brand'] == brand1 and v['model'] == model1]
-            car2_variants = [v for v in variant_rows if v['brand'] == brand2 and v['model'] == model2]
-
-            st.subheader("✅ Select Variants to Compare")
-
-            variant1 = st.selectbox("Select Variant for Car 1", [v["variant"] for v in car1_variants])
-            variant2 = st.selectbox("Select Variant for Car 2", [v["variant"] for v in car2_variants])
-
-            if st.button("🔍 Compare Selected Variants"):
-                # Step 2: Fetch full data for selected variants
-                compare_query = """
-                SELECT
-                    v.vehicle_id, v.brand, v.model, v.variant, v.type, v.image_link,
-                    e.fuel, e.displacement, e.no_of_cylinders, e.bhp_value, e.bhp_rpm, e.torque_value, e.torque_rpm,
-                    t.transmission, t.gearbox, t.drive_type,
-                    p1.price AS chennai_price,
-                    p2.price AS mumbai_price,
-                    perf.mileage, perf.capacity,
-                    d.boot_space, d.seating_capacity, d.wheel_base,
-                    ch.front_brake, ch.rear_brake, ch.tyre_size, ch.tyre_type,
-                    f.cruise_control, f.parking_sensors, f.keyLess_entry, f.engine_start_stop_button,
-                    f.LED_headlamps, f.no_of_airbags, f.rear_camera, f.hill_assist
-                FROM Vehicle v
-                LEFT JOIN Engine e ON v.vehicle_id = e.vehicle_id
-                LEFT JOIN Transmission t ON v.vehicle_id = t.vehicle_id
-                LEFT JOIN Performance perf ON v.vehicle_id = perf.vehicle_id
-                LEFT JOIN Dimensions d ON v.vehicle_id = d.vehicle_id
-                LEFT JOIN Chassis ch ON v.vehicle_id = ch.vehicle_id
-                LEFT JOIN Features f ON v.vehicle_id = f.vehicle_id
-                LEFT JOIN Price p1 ON v.vehicle_id = p1.vehicle_id AND p1.city = 'Chennai'
-                LEFT JOIN Price p2 ON v.vehicle_id = p2.vehicle_id AND p2.city = 'Mumbai'
-                WHERE v.variant = %s OR v.variant = %s
-                """
-
-                cursor.execute(compare_query, (variant1, variant2))
-                cars = cursor.fetchall()
-
-                if cars and len(cars) == 2:
-                    car1, car2 = cars[0], cars[1]
-
-                    # Create DataFrame for display
-                    comparison_data = {
-                        "Feature": [
-                            "Brand & Model", "Variant", "Fuel", "Transmission", "Drive Type",
-                            "Displacement (cc)", "Mileage (km/l)", "Boot Space (L)", "Seating Capacity",
-                            "BHP @ RPM", "Torque @ RPM", "Gearbox", "Tyres", "Brakes (Front/Rear)",
-                            "Chennai Price (₹)", "Mumbai Price (₹)", "Airbags", "Cruise Control",
-                            "Keyless Entry", "Rear Camera", "Hill Assist", "LED Headlamps",
-                            "Parking Sensors", "Engine Start/Stop"
-                        ],
-                        f"{car1['brand']} {car1['model']} ({car1['variant']})": [
-                            f"{car1['brand']} {car1['model']}", car1['variant'], car1['fuel'], car1['transmission'],
-                            car1['drive_type'], car1['displacement'], car1['mileage'], car1['boot_space'],
-                            car1['seating_capacity'], f"{car1['bhp_value']} @ {car1['bhp_rpm']} rpm",
-                            f"{car1['torque_value']} @ {car1['torque_rpm']} rpm", car1['gearbox'],
-                            f"{car1['tyre_size']} ({car1['tyre_type']})", f"{car1['front_brake']} / {car1['rear_brake']}",
-                            f"₹{int(car1['chennai_price'] or 0):,}", f"₹{int(car1['mumbai_price'] or 0):,}",
-                            car1['no_of_airbags'], '✅' if car1['cruise_control'] else '❌',
-                            '✅' if car1['keyLess_entry'] else '❌', '✅' if car1['rear_camera'] else '❌',
-                            '✅' if car1['hill_assist'] else '❌', '✅' if car1['LED_headlamps'] else '❌',
-                            '✅' if car1['parking_sensors'] else '❌', '✅' if car1['engine_start_stop_button'] else '❌'
-                        ],
-                        f"{car2['brand']} {car2['model']} ({car2['variant']})": [
-                            f"{car2['brand']} {car2['model']}", car2['variant'], car2['fuel'], car2['transmission'],
-                            car2['drive_type'], car2['displacement'], car2['mileage'], car2['boot_space'],
-                            car2['seating_capacity'], f"{car2['bhp_value']} @ {car2['bhp_rpm']} rpm",
-                            f"{car2['torque_value']} @ {car2['torque_rpm']} rpm", car2['gearbox'],
-                            f"{car2['tyre_size']} ({car2['tyre_type']})", f"{car2['front_brake']} / {car2['rear_brake']}",
-                            f"₹{int(car2['chennai_price'] or 0):,}", f"₹{int(car2['mumbai_price'] or 0):,}",
-                            car2['no_of_airbags'], '✅' if car2['cruise_control'] else '❌',
-                            '✅' if car2['keyLess_entry'] else '❌', '✅' if car2['rear_camera'] else '❌',
-                            '✅' if car2['hill_assist'] else '❌', '✅' if car2['LED_headlamps'] else '❌',
-                            '✅' if car2['parking_sensors'] else '❌', '✅' if car2['engine_start_stop_button'] else '❌'
-                        ]
-                    }
-
-                    df = pd.DataFrame(comparison_data)
-                    st.dataframe(df, use_container_width=True)
-
-                    # Optionally display car images
-                    st.subheader("📸 Car Images")
-                    cols = st.columns(2)
-                    with cols[0]:
-                        st.image(car1['image_link'], caption=f"{car1['brand']} {car1['model']} - {car1['variant']}", width=300)
-                    with cols[1]:
-                        st.image(car2['image_link'], caption=f"{car2['brand']} {car2['model']} - {car2['variant']}", width=300)
-                else:
-                    st.warning("Comparison data is incomplete or not available.")
-                cursor.close()
-                conn.close()
+    st.title("📊 Compare Car Models")
+
+    try:
+        tree = get_variant_tree(get_catalog_version())
+        brand_counts, model_counts = get_facets().counts("brand"), get_facets().counts("model")
+        count = st.slider("Cars to compare", 2, max(2, compare.COMPARE_MAX), 2)
+        cities = st.multiselect("City prices", CITIES, default=compare.DEFAULT_CITIES)
+
+        query = st.text_input("🔎 Find a variant", placeholder="e.g. creta sx, swfit vxi")
+        if query.strip():
+            matches = {s.vehicle_id: s.variant for s in get_synced_search_index().suggest(query)}
+            st.selectbox(
+                "Add to comparison", list(matches), index=None, key="compare_match",
+                format_func=matches.get, on_change=add_compare_match, args=(count,),
+                placeholder="No matching variants" if not matches else "Pick a match",
+            )
+
+        st.subheader("✅ Select Variants to Compare")
+        vehicle_ids = []
+        for i, col in enumerate(st.columns(count)):
+            with col:
+                brand = st.selectbox(
+                    f"Brand for Car {i + 1}", list(tree), index=None, key=f"compare_brand_{i}",
+                    format_func=lambda b: facets.label(b, brand_counts.get(b, 0))
+                )
+                models = tree.get(brand, {})
+                model = st.selectbox(
+                    f"Model for Car {i + 1}", list(models), index=None, key=f"compare_model_{i}",
+                    format_func=lambda m: facets.label(m, model_counts.get(m, 0)), disabled=not models
+                )
+                variants = {vehicle_id: variant for variant, vehicle_id in models.get(model, [])}
+                choice = st.selectbox(
+                    f"Variant for Car {i + 1}", list(variants), index=None, key=f"compare_variant_{i}",
+                    format_func=variants.get, disabled=not variants
+                )
+                if choice is not None:
+                    vehicle_ids.append(choice)
+
+        vehicle_ids = tuple(dict.fromkeys(vehicle_ids))
+        if len(vehicle_ids) < 2:
+            st.info("Pick at least two different variants to compare them.")
+        else:
+            cars = get_compare_records(vehicle_ids, tuple(cities), get_catalog_version())
+            if len(cars) == len(vehicle_ids):
+                table, best, worst = compare.comparison_table(cars, cities)
+                st.dataframe(compare.style(table, best, worst), use_container_width=True)
+                st.caption("Green marks the best value of an attribute and red the worst.")
+
+                # Optionally display car images
+                st.subheader("📸 Car Images")
+                cols = st.columns(len(cars))
+                for col, car in zip(cols, cars):
+                    with col:
+                        show_image(car['image_link'], width=300, caption=f"{car['brand']} {car['model']} - {car['variant']}")
+            else:
+                st.warning("Comparison data is incomplete or not available.")
+
+    except Exception as e:
+        st.error(f"Error: {e}")
 
-        except Exception as e:
-            st.error(f"Error: {e}")
+# --- SIDEBAR: CONNECTION POOL ---
+# Only pages that reach MySQL open the pool; Home and the in-memory backend never load the connector.
+if page != "Home" and catalog.BACKEND != "memory":
+    show_stats("Connection Pool", get_db_pool().stats)
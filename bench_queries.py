@@ -0,0 +1,148 @@
+"""
+Benchmarks the app's SQL templates against a scaled-up copy of the catalog, before and
+after the hot-path indexes in schema.py / migrations.py.
+
+Usage (against a local MySQL; the benchmark database is created and overwritten):
+    python bench_queries.py --database carquest_bench --scale 100
+"""
+import time
+import argparse
+import statistics
+
+import dotenv
+import mysql.connector
+import pandas as pd
+
+import db
+import catalog
+import compare
+import facets
+import migrations
+import load_catalog
+from filters import FilterState, build_filters_query, build_search_query
+
+DEFAULT_DATABASE = "carquest_bench"
+
+
+def scaled_catalog(csv_path: str, scale: int) -> pd.DataFrame:
+    """`scale` copies of the cleaned catalog; copies get their own url and variant name."""
+    base = load_catalog.read_catalog(csv_path)
+    copies = []
+    for k in range(scale):
+        copy = base.copy()
+        if k:
+            copy["url"] = copy["url"] + f"#copy-{k}"
+            copy["variant"] = copy["variant"] + f" ({k})"
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def seed(conn, frame: pd.DataFrame, batch_size: int) -> None:
+    cursor = conn.cursor()
+    tables = load_catalog.existing_tables(cursor)
+    cursor.close()
+    rows = load_catalog.table_rows(load_catalog.assign_ids(frame, {}))
+    load_catalog.load_staging(conn, rows, batch_size)
+    load_catalog.swap_in(conn, tables)
+
+
+def query_templates(frame: pd.DataFrame) -> list[tuple[str, str, tuple]]:
+    """(name, sql, params) for every query shape the app runs, with values taken from the data."""
+    detail_ids = tuple(range(1, 11))
+    compare_ids = detail_ids[:4]
+
+    shapes = {
+        "filters: city + price": FilterState.create(city="Mumbai", price_range=(5e5, 20e5)),
+        "filters: city + brand + type": FilterState.create(
+            city="Pune", price_range=(5e5, 50e5), brands=["Tata", "Hyundai"], types=["SUV Cars"]
+        ),
+        "filters: spec ranges by BHP": FilterState.create(
+            city="Chennai", price_range=(0, 150e5), displacement_range=(1000, 2000), bhp_range=(100, 200),
+            mileage_range=(10, 25), sort_by="BHP"
+        ),
+        "questai parser: no city": FilterState.create(types=["SUV Cars"], price_range=(0, 10e5)),
+    }
+    templates = [(name, *build_filters_query(state, limit=10)) for name, state in shapes.items()]
+    templates += [(f"wide {name}", *build_search_query(state, limit=10)) for name, state in shapes.items()]
+    # A deep page: keyset paging seeks past the cursor instead of scanning an OFFSET.
+    deep = shapes["filters: city + price"], (False, float(frame["Mumbai"].quantile(0.9)), 0)
+    templates += [
+        ("filters: deep keyset page", *build_filters_query(deep[0], limit=10, after=deep[1])),
+        ("wide filters: deep keyset page", *build_search_query(deep[0], limit=10, after=deep[1])),
+    ]
+    templates += [
+        ("facets: cube", facets.FACET_QUERY, ()),
+        ("wide facets: cube", facets.SEARCH_FACET_QUERY, ()),
+        ("compare: variant tree", compare.TREE_QUERY, ()),
+        ("compare: 4 ids, 3 cities", *compare.compare_query(compare_ids, ["Chennai", "Mumbai", "Pune"])),
+        ("wide compare: 4 ids, 3 cities", *compare.compare_query(compare_ids, ["Chennai", "Mumbai", "Pune"], wide=True)),
+        ("details: 10 ids", *catalog.details_query(detail_ids)),
+        ("wide details: 10 ids", *catalog.details_query(detail_ids, wide=True)),
+    ]
+    return templates
+
+
+def time_queries(conn, templates, repeat: int) -> dict[str, tuple[float, float]]:
+    """Median and p95 latency in milliseconds per template, after one warm-up run."""
+    timings = {}
+    cursor = conn.cursor()
+    for name, sql, params in templates:
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        timings[name] = (statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))])
+    cursor.close()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the app's queries before and after the hot-path indexes")
+    parser.add_argument("--database", default=DEFAULT_DATABASE, help="Scratch database to (re)create tables in")
+    parser.add_argument("--csv", default=load_catalog.DEFAULT_CSV)
+    parser.add_argument("--scale", type=int, default=100, help="Copies of the catalog to load")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse the tables from a previous run")
+    args = parser.parse_args()
+
+    dotenv.load_dotenv()
+    frame = scaled_catalog(args.csv, args.scale)
+
+    kwargs = db.connect_kwargs(db.ssl_ca_path())
+    kwargs.pop("database")
+    conn = mysql.connector.connect(**kwargs)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+        cursor.execute(f"USE `{args.database}`")
+        cursor.close()
+
+        if not args.skip_seed:
+            start = time.perf_counter()
+            seed(conn, frame, args.batch_size)
+            print(f"Seeded {len(frame):,} vehicles in {time.perf_counter() - start:.1f}s")
+
+        templates = query_templates(frame)
+        migrations.migrate(conn, revert=True)
+        before = time_queries(conn, templates, args.repeat)
+        start = time.perf_counter()
+        migrations.migrate(conn)
+        print(f"Built indexes in {time.perf_counter() - start:.1f}s")
+        after = time_queries(conn, templates, args.repeat)
+    finally:
+        conn.close()
+
+    print(f"\n{'query':<40}{'before p50':>12}{'after p50':>12}{'before p95':>12}{'after p95':>12}{'speedup':>10}")
+    for name, *_ in templates:
+        (b50, b95), (a50, a95) = before[name], after[name]
+        print(f"{name:<40}{b50:>10.2f}ms{a50:>10.2f}ms{b95:>10.2f}ms{a95:>10.2f}ms{b50 / a50:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Measures the Streamlit app's cold start: where import time goes, and how long the first
+run and a rerun of the Home page take in a fresh process.
+
+Usage:
+    python bench_startup.py --runs 5 --top 15
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Runs in a fresh interpreter: one cold run of the app script, then one rerun.
+STARTUP_SCRIPT = f"""
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({APP!r}, default_timeout=120)
+at.run()
+cold = time.perf_counter() - start
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+errors = [e.value for e in at.exception]
+print(json.dumps({{"cold": cold, "rerun": rerun, "errors": errors}}))
+"""
+
+
+def bench_env() -> dict:
+    """The app needs a CA certificate setting to start; a placeholder is enough for the Home page."""
+    env = dict(os.environ)
+    env.setdefault("AIVEN_CA_PEM", "placeholder")
+    return env
+
+
+def import_profile(top: int = 15) -> list[tuple[int, int, str]]:
+    """
+    (cumulative us, self us, module) of the slowest top-level imports of app.py,
+    from `python -X importtime`.
+    """
+    # Mark the "use streamlit run" warning as shown: working out whether to show it walks every
+    # frame's module, which would load the app's lazily imported modules.
+    code = (
+        "import runpy, logging, streamlit.delta_generator as dg; logging.disable(logging.WARNING); "
+        "dg._use_warning_has_been_displayed = True; runpy.run_path(%r)" % APP
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=bench_env(), cwd=os.path.dirname(APP)
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # Skip the header, and keep only modules imported directly (nested ones are indented).
+        if self_us.strip().isdigit() and not name[1:].startswith(" "):
+            rows.append((int(cumulative_us), int(self_us), name.strip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def startup_times(runs: int) -> list[dict]:
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            capture_output=True, text=True, env=bench_env(), cwd=os.path.dirname(APP)
+        )
+        samples.append(json.loads(result.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Profile the app's imports and time its cold start")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to time")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    print(f"{'module':<40}{'cumulative':>12}{'self':>10}")
+    for cumulative_us, self_us, name in import_profile(args.top):
+        print(f"{name:<40}{cumulative_us / 1000:>10.1f}ms{self_us / 1000:>8.1f}ms")
+
+    samples = startup_times(args.runs)
+    errors = [error for sample in samples for error in sample["errors"]]
+    cold = statistics.median(sample["cold"] for sample in samples)
+    rerun = statistics.median(sample["rerun"] for sample in samples)
+    print(f"\nHome page over {args.runs} fresh processes: cold start {cold * 1000:.0f}ms, rerun {rerun * 1000:.0f}ms (median)")
+    if errors:
+        print(f"Errors: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
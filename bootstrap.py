@@ -0,0 +1,49 @@
+"""
+One-time process setup for the Streamlit app.
+
+Streamlit re-executes app.py on every interaction, but imported modules stay loaded, so
+anything done here happens once per process: loading .env and registering heavy
+third-party modules to be imported on first use only.
+"""
+import sys
+import threading
+import importlib.util
+
+_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Loads .env into the environment the first time it is called."""
+    global _env_loaded
+    with _lock:
+        if not _env_loaded:
+            import dotenv
+            dotenv.load_dotenv()
+            _env_loaded = True
+
+
+def lazy_import(name: str):
+    """
+    Registers `name` so that its code only runs when one of its attributes is first used.
+
+    A dotted module is also bound on its parent package, so `import mysql` followed by
+    lazy_import("mysql.connector") keeps the usual `mysql.connector.connect(...)` spelling.
+    (A plain `import mysql.connector` would load it straight away.) Already-imported
+    modules are returned as is.
+    """
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(sys.modules[parent], child, module)
+        return module
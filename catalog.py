@@ -0,0 +1,395 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import bootstrap
+import mysql
+
+# mysql.connector is bound lazily, as in db.py.
+bootstrap.lazy_import("mysql.connector")
+
+import schema
+import similarity
+import query_builder
+from filters import CITIES, FilterState, sort_column
+
+# --- BACKEND CONFIG ---
+# "mysql" answers every page with SQL; "memory" serves Filters/Compare from a
+# CatalogEngine loaded once per process.
+BACKEND = os.getenv("CARQUEST_BACKEND", "mysql").lower()
+# Optional CSV source (same layout as data/cars_cleaned.csv) for the in-memory engine.
+CATALOG_CSV = os.getenv("CARQUEST_CATALOG_CSV")
+# Seconds a loaded catalog may be served before it is rebuilt regardless of version.
+CATALOG_TTL = int(os.getenv("CARQUEST_CATALOG_TTL", "3600"))
+
+CATEGORICAL_COLUMNS = [
+    "brand", "model", "type", "fuel", "transmission", "drive_type",
+    "front_brake", "rear_brake", "tyre_size", "tyre_type", "parking_sensors",
+]
+NUMERIC_COLUMNS = [
+    "base_price", "displacement", "no_of_cylinders", "bhp_value", "bhp_rpm",
+    "torque_value", "torque_rpm", "gearbox", "mileage", "capacity",
+    "boot_space", "seating_capacity", "wheel_base", "no_of_airbags",
+]
+BOOLEAN_COLUMNS = [
+    "cruise_control", "keyLess_entry", "engine_start_stop_button",
+    "LED_headlamps", "rear_camera", "hill_assist",
+]
+# Columns (and order) of the vehicle_info frame returned by the MySQL detail query.
+DETAIL_COLUMNS = [
+    "vehicle_id", "brand", "model", "variant", "type", "base_price",
+    "fuel", "displacement", "no_of_cylinders", "bhp_value", "bhp_rpm", "torque_value", "torque_rpm",
+    "transmission", "gearbox", "drive_type",
+    "mileage", "capacity",
+    "boot_space", "seating_capacity", "wheel_base",
+    "front_brake", "rear_brake", "tyre_size", "tyre_type",
+    "cruise_control", "parking_sensors", "keyLess_entry", "engine_start_stop_button", "LED_headlamps",
+    "no_of_airbags", "rear_camera", "hill_assist",
+]
+LISTING_COLUMNS = ["vehicle_id", "brand", "model", "variant", "type", "price", "image_link", "bhp_value", "mileage"]
+
+# One row per (vehicle, city); pivoted into one row per vehicle by load_from_mysql.
+CATALOG_QUERY = """
+SELECT v.vehicle_id,
+       v.brand, v.model, v.variant, v.type, v.price AS base_price, v.url, v.image_link,
+       e.fuel, e.displacement, e.no_of_cylinders, e.bhp_value, e.bhp_rpm, e.torque_value, e.torque_rpm,
+       t.transmission, t.gearbox, t.drive_type,
+       pf.mileage, pf.capacity,
+       d.boot_space, d.seating_capacity, d.wheel_base,
+       c.front_brake, c.rear_brake, c.tyre_size, c.tyre_type,
+       f.cruise_control, f.parking_sensors, f.keyLess_entry, f.engine_start_stop_button, f.LED_headlamps,
+       f.no_of_airbags, f.rear_camera, f.hill_assist,
+       p.city, p.price AS city_price
+FROM Vehicle v
+LEFT JOIN Engine e ON v.vehicle_id = e.vehicle_id
+LEFT JOIN Transmission t ON v.vehicle_id = t.vehicle_id
+LEFT JOIN Performance pf ON v.vehicle_id = pf.vehicle_id
+LEFT JOIN Dimensions d ON v.vehicle_id = d.vehicle_id
+LEFT JOIN Chassis c ON v.vehicle_id = c.vehicle_id
+LEFT JOIN Features f ON v.vehicle_id = f.vehicle_id
+LEFT JOIN Price p ON v.vehicle_id = p.vehicle_id
+"""
+
+# Detail cards of the Filters page: one row per (vehicle, city) for the vehicles in `{placeholders}`.
+DETAILS_QUERY = """
+SELECT v.vehicle_id,
+       v.brand, v.model, v.variant, v.type, v.price AS base_price,
+       e.fuel, e.displacement, e.no_of_cylinders, e.bhp_value, e.bhp_rpm, e.torque_value, e.torque_rpm,
+       t.transmission, t.gearbox, t.drive_type,
+       pf.mileage, pf.capacity,
+       d.boot_space, d.seating_capacity, d.wheel_base,
+       c.front_brake, c.rear_brake, c.tyre_size, c.tyre_type,
+       f.cruise_control, f.parking_sensors, f.keyLess_entry, f.engine_start_stop_button, f.LED_headlamps,
+       f.no_of_airbags, f.rear_camera, f.hill_assist,
+       p.city, p.price AS city_price
+FROM Vehicle v
+LEFT JOIN Engine e ON v.vehicle_id = e.vehicle_id
+LEFT JOIN Transmission t ON v.vehicle_id = t.vehicle_id
+LEFT JOIN Performance pf ON v.vehicle_id = pf.vehicle_id
+LEFT JOIN Dimensions d ON v.vehicle_id = d.vehicle_id
+LEFT JOIN Chassis c ON v.vehicle_id = c.vehicle_id
+LEFT JOIN Features f ON v.vehicle_id = f.vehicle_id
+LEFT JOIN Price p ON v.vehicle_id = p.vehicle_id
+WHERE v.vehicle_id IN ({placeholders})
+"""
+
+# --- WIDE TABLE QUERIES ---
+# The same lookups against vehicle_search: one row per vehicle, no joins, city prices as columns.
+CITY_COLUMNS = ", ".join(f"`{city}`" for city in CITIES)
+SEARCH_TABLE_QUERY = (
+    "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s"
+)
+SEARCH_CATALOG_QUERY = (
+    f"SELECT {', '.join(DETAIL_COLUMNS)}, url, image_link, {CITY_COLUMNS} FROM {schema.SEARCH_TABLE}"
+)
+SEARCH_DETAILS_QUERY = (
+    f"SELECT {', '.join(DETAIL_COLUMNS)}, {CITY_COLUMNS} FROM {schema.SEARCH_TABLE} "
+    "WHERE vehicle_id IN ({placeholders})"
+)
+
+# CatalogMeta is written by load_catalog.py on every reload; older databases fall back to counting.
+VERSION_QUERY = "SELECT version FROM CatalogMeta WHERE id = 1"
+FALLBACK_VERSION_QUERY = "SELECT COUNT(*), COALESCE(MAX(vehicle_id), 0) FROM Vehicle"
+
+
+def details_query(vehicle_ids, wide: bool = False) -> tuple[str, tuple]:
+    """(sql, params) of the detail rows of `vehicle_ids`, from vehicle_search if `wide`."""
+    placeholders, params = query_builder.in_list(int(v) for v in vehicle_ids)
+    template = SEARCH_DETAILS_QUERY if wide else DETAILS_QUERY
+    return template.format(placeholders=placeholders), params
+
+
+# --- LOADING ---
+def has_search_table(conn) -> bool:
+    """Whether the database has the wide vehicle_search table built by load_catalog.py."""
+    cursor = conn.cursor()
+    cursor.execute(SEARCH_TABLE_QUERY, (schema.SEARCH_TABLE,))
+    (count,) = cursor.fetchone()
+    cursor.close()
+    return bool(count)
+
+
+def load_from_mysql(conn) -> pd.DataFrame:
+    """
+    Reads the catalog with one column per city price.
+
+    vehicle_search already has that shape; databases without it are read through the
+    joined query and the per-city prices are pivoted here.
+    """
+    if has_search_table(conn):
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SEARCH_CATALOG_QUERY)
+        rows = cursor.fetchall()
+        cursor.close()
+        return prepare_frame(pd.DataFrame(rows, columns=DETAIL_COLUMNS + ["url", "image_link"] + CITIES))
+
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(CATALOG_QUERY)
+    rows = cursor.fetchall()
+    cursor.close()
+
+    long = pd.DataFrame(rows)
+    if long.empty:
+        return prepare_frame(pd.DataFrame(columns=DETAIL_COLUMNS + ["url", "image_link"] + CITIES))
+
+    specs = long.drop(columns=["city", "city_price"]).drop_duplicates(subset=["vehicle_id"])
+    prices = (
+        long.dropna(subset=["city"])
+        .pivot_table(index="vehicle_id", columns="city", values="city_price", aggfunc="first")
+        .reindex(columns=CITIES)
+    )
+    prices.columns.name = None
+    wide = specs.merge(prices, how="left", left_on="vehicle_id", right_index=True)
+    return prepare_frame(wide)
+
+
+def load_from_csv(path: str) -> pd.DataFrame:
+    """Reads a cleaned catalog CSV; vehicle ids follow file order, as the loader assigns them."""
+    frame = pd.read_csv(path).rename(columns={"price": "base_price"})
+    if "vehicle_id" not in frame.columns:
+        frame.insert(0, "vehicle_id", np.arange(1, len(frame) + 1))
+    return prepare_frame(frame)
+
+
+def prepare_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Applies the engine's column dtypes: categoricals, float64 numerics and nullable booleans."""
+    frame = frame.copy()
+    frame["vehicle_id"] = frame["vehicle_id"].astype("int64")
+    for col in CATEGORICAL_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].astype("category")
+    for col in NUMERIC_COLUMNS + [c for c in CITIES if c in frame.columns]:
+        if col in frame.columns:
+            frame[col] = pd.to_numeric(frame[col], errors="coerce").astype("float64")
+    for col in BOOLEAN_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].astype("boolean")
+    for col in CITIES:
+        if col not in frame.columns:
+            frame[col] = np.nan
+    return frame.sort_values("vehicle_id").reset_index(drop=True)
+
+
+def csv_version(path: str) -> tuple:
+    stat = os.stat(path)
+    return ("csv", path, stat.st_mtime_ns, stat.st_size)
+
+
+def mysql_version(conn) -> tuple:
+    """A cheap fingerprint of the catalog that changes whenever it is reloaded."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute(VERSION_QUERY)
+        row = cursor.fetchone()
+        if row is not None:
+            return ("mysql", int(row[0]))
+    except mysql.connector.Error:
+        pass
+    finally:
+        cursor.close()
+
+    cursor = conn.cursor()
+    cursor.execute(FALLBACK_VERSION_QUERY)
+    count, max_id = cursor.fetchone()
+    cursor.close()
+    return ("mysql", int(count), int(max_id))
+
+
+def details_from_records(records) -> dict:
+    """
+    Builds the detail-card structure from wide rows (specs plus one column per city):
+    vehicle_id -> {"vehicle_info": one-row frame, "city_prices": (city, city_price) frame}.
+    """
+    details = {}
+    for record in records:
+        city_prices = pd.DataFrame(
+            [(city, record[city]) for city in CITIES if record.get(city) is not None],
+            columns=["city", "city_price"]
+        )
+        details[int(record["vehicle_id"])] = {
+            "vehicle_info": pd.DataFrame([{col: record.get(col) for col in DETAIL_COLUMNS}]),
+            "city_prices": city_prices
+        }
+    return details
+
+
+# --- ENGINE ---
+class CatalogEngine:
+    """
+    Columnar, read-only copy of the catalog that answers Filters/Compare lookups in memory.
+
+    Every predicate is a vectorised boolean mask over NumPy arrays. String filters compare
+    lowercased categories (MySQL's default collation is case-insensitive, so this matches
+    the SQL backend), and the top-k rows are picked with np.argpartition rather than a full sort.
+    """
+
+    def __init__(self, frame: pd.DataFrame, version=None) -> None:
+        self.frame = frame
+        self.version = version
+        self.loaded_at = time.time()
+        self.ids = frame["vehicle_id"].to_numpy()
+        self._row_of = {int(v): i for i, v in enumerate(self.ids)}
+        self._num = {
+            col: frame[col].to_numpy(dtype="float64", na_value=np.nan)
+            for col in NUMERIC_COLUMNS + CITIES if col in frame.columns
+        }
+        self._variant_lower = frame["variant"].astype("string").str.lower().fillna("").to_numpy(dtype=object)
+        self._similarity = None
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    # --- predicates ---
+    def _in(self, col: str, values) -> np.ndarray:
+        """Case-insensitive `col IN values` evaluated once per category, then broadcast by code."""
+        series = self.frame[col]
+        wanted = {str(v).lower() for v in values}
+        category_hit = np.array([str(c).lower() in wanted for c in series.cat.categories] + [False])
+        # Code -1 (missing) indexes the trailing False.
+        return category_hit[series.cat.codes.to_numpy()]
+
+    def _between(self, values: np.ndarray, bounds) -> np.ndarray:
+        lo, hi = bounds
+        # NaN compares False on both sides, matching SQL's NULL BETWEEN semantics.
+        return (values >= lo) & (values <= hi)
+
+    def price_column(self, state: FilterState) -> np.ndarray:
+        return self._num[state.city] if state.city else self._num["base_price"]
+
+    def mask(self, state: FilterState) -> np.ndarray:
+        """Boolean mask of the rows matching every constraint in `state`."""
+        mask = np.ones(len(self.frame), dtype=bool)
+        price = self.price_column(state)
+        if state.city:
+            mask &= ~np.isnan(price)
+        if state.price_range is not None:
+            mask &= self._between(price, state.price_range)
+        if state.brands:
+            mask &= self._in("brand", state.brands)
+        if state.types:
+            mask &= self._in("type", state.types)
+        if state.variant:
+            needle = state.variant.lower()
+            mask &= np.fromiter((needle in v for v in self._variant_lower), dtype=bool, count=len(mask))
+        if state.vehicle_ids is not None:
+            mask &= np.isin(self.ids, np.array(state.vehicle_ids, dtype=np.int64))
+        if state.fuels:
+            mask &= self._in("fuel", state.fuels)
+        if state.displacement_range is not None:
+            mask &= self._between(self._num["displacement"], state.displacement_range)
+        if state.bhp_range is not None:
+            mask &= self._between(self._num["bhp_value"], state.bhp_range)
+        if state.torque_range is not None:
+            mask &= self._between(self._num["torque_value"], state.torque_range)
+        if state.mileage_range is not None:
+            mask &= self._between(self._num["mileage"], state.mileage_range)
+        if state.seating:
+            mask &= np.isin(self._num["seating_capacity"], np.array(state.seating, dtype="float64"))
+        if state.transmissions:
+            mask &= self._in("transmission", state.transmissions)
+        return mask
+
+    def sort_key(self, state: FilterState) -> np.ndarray:
+        """Ascending sort key for `state.sort_by`; descending sorts are negated."""
+        if state.sort_by == "BHP":
+            return -self._num["bhp_value"]
+        if state.sort_by == "Mileage":
+            return -self._num["mileage"]
+        return self.price_column(state)
+
+    def top_k(self, rows: np.ndarray, key: np.ndarray, k: int) -> np.ndarray:
+        """The `k` rows with the smallest key (NaN last), ordered by (key, vehicle_id)."""
+        values = np.where(np.isnan(key[rows]), np.inf, key[rows])
+        if len(rows) > k:
+            # Keep every row tied with the k-th key, so ties are settled by vehicle_id below.
+            keep = values <= np.partition(values, k - 1)[k - 1]
+            rows, values = rows[keep], values[keep]
+        order = np.lexsort((self.ids[rows], values))[:k]
+        return rows[order]
+
+    def page_rows(self, state: FilterState, after: tuple | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """Rows the listing for `state` can page through (those after the `after` cursor), and the sort key."""
+        key = self.sort_key(state)
+        mask = self.mask(state)
+        if after is not None:
+            is_null, value, vehicle_id = after
+            # Rows without a sort value come last (top_k orders NaN after every number).
+            missing = np.isnan(key)
+            if is_null:
+                mask &= missing & (self.ids > int(vehicle_id))
+            else:
+                # sort_key negates descending columns, so "after" is always "greater key".
+                start = float(value) if sort_column(state)[1] == "ASC" else -float(value)
+                mask &= missing | (key > start) | ((key == start) & (self.ids > int(vehicle_id)))
+        return np.flatnonzero(mask), key
+
+    # --- queries ---
+    def search(self, state: FilterState, limit: int = 10, after: tuple | None = None) -> pd.DataFrame:
+        """Equivalent of the Filters page listing query, for the page following `after`."""
+        rows, key = self.page_rows(state, after)
+        rows = self.top_k(rows, key, limit or len(rows))
+        return self.listing(rows, state)
+
+    def count(self, state: FilterState) -> int:
+        """Equivalent of filters.build_count_query."""
+        return len(self.page_rows(state)[0])
+
+    def listing(self, rows: np.ndarray, state: FilterState) -> pd.DataFrame:
+        result = self.frame.iloc[rows][["vehicle_id", "brand", "model", "variant", "type", "image_link", "bhp_value", "mileage"]].copy()
+        result["price"] = self.price_column(state)[rows]
+        for col in CATEGORICAL_COLUMNS:
+            if col in result.columns:
+                result[col] = result[col].astype(object)
+        return result[LISTING_COLUMNS].reset_index(drop=True)
+
+    def rows_for(self, vehicle_ids) -> np.ndarray:
+        return np.array([self._row_of[int(v)] for v in vehicle_ids if int(v) in self._row_of], dtype=np.int64)
+
+    def records(self, vehicle_ids) -> list[dict]:
+        """Plain-dict rows for `vehicle_ids` in the given order, with NaN turned into None."""
+        subset = self.frame.iloc[self.rows_for(vehicle_ids)].astype(object)
+        subset = subset.where(pd.notna(subset), None)
+        return subset.to_dict("records")
+
+    def details_many(self, vehicle_ids) -> dict:
+        """Same shape as app.get_vehicle_details_many, served from memory."""
+        return details_from_records(self.records(dict.fromkeys(int(v) for v in vehicle_ids)))
+
+    @property
+    def similarity(self) -> similarity.SimilarityIndex:
+        """Nearest-neighbour index over this catalog, loaded or built on first use."""
+        if self._similarity is None:
+            self._similarity = similarity.load_or_build(lambda: self.frame, self.version)
+        return self._similarity
+
+    def similar_many(self, cars, limit: int = 3) -> dict:
+        """Same shape as app.get_similar_cars_many, from the precomputed similarity index."""
+        return self.similarity.similar_many(cars, limit=limit)
+
+    def variant_rows(self) -> list[tuple]:
+        """(vehicle_id, brand, model, variant) of every vehicle, ordered like compare.TREE_QUERY."""
+        frame = self.frame[["vehicle_id", "brand", "model", "variant"]].astype(object)
+        frame = frame.sort_values(["brand", "model", "variant", "vehicle_id"])
+        return list(frame.itertuples(index=False, name=None))
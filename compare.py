@@ -0,0 +1,209 @@
+"""
+Side-by-side comparison of any number of variants.
+
+Variants are picked from a brand -> model -> variant tree built once per catalog version.
+The chosen vehicles are then fetched in one query keyed on vehicle_id, with one price
+column per selected city, and the best and worst value of every rankable attribute is
+found with column-wise NumPy reductions.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import schema
+import query_builder
+from filters import CITIES
+
+# --- COMPARE CONFIG ---
+# Most variants shown side by side.
+COMPARE_MAX = int(os.getenv("CARQUEST_COMPARE_MAX", "4"))
+DEFAULT_CITIES = ["Chennai", "Mumbai"]
+BEST_STYLE = "background-color: #d4edda"
+WORST_STYLE = "background-color: #f8d7da"
+
+# Every vehicle's picker labels; the Vehicle table is narrow, so this is one cheap scan.
+TREE_QUERY = "SELECT vehicle_id, brand, model, variant FROM Vehicle ORDER BY brand, model, variant, vehicle_id"
+
+# `{prices}` holds one `pN.price AS `<city>`` per selected city, each an eq_ref lookup on
+# uq_price_vehicle_city through its own `{joins}` entry.
+COMPARE_QUERY = """
+SELECT v.vehicle_id,
+       v.brand, v.model, v.variant, v.type, v.price AS base_price, v.image_link,
+       e.fuel, e.displacement, e.no_of_cylinders, e.bhp_value, e.bhp_rpm, e.torque_value, e.torque_rpm,
+       t.transmission, t.gearbox, t.drive_type,
+       pf.mileage, pf.capacity,
+       d.boot_space, d.seating_capacity, d.wheel_base,
+       c.front_brake, c.rear_brake, c.tyre_size, c.tyre_type,
+       f.cruise_control, f.parking_sensors, f.keyLess_entry, f.engine_start_stop_button, f.LED_headlamps,
+       f.no_of_airbags, f.rear_camera, f.hill_assist{prices}
+FROM Vehicle v
+LEFT JOIN Engine e ON v.vehicle_id = e.vehicle_id
+LEFT JOIN Transmission t ON v.vehicle_id = t.vehicle_id
+LEFT JOIN Performance pf ON v.vehicle_id = pf.vehicle_id
+LEFT JOIN Dimensions d ON v.vehicle_id = d.vehicle_id
+LEFT JOIN Chassis c ON v.vehicle_id = c.vehicle_id
+LEFT JOIN Features f ON v.vehicle_id = f.vehicle_id{joins}
+WHERE v.vehicle_id IN ({placeholders})
+"""
+
+SEARCH_COMPARE_QUERY = f"""
+SELECT vehicle_id,
+       brand, model, variant, type, base_price, image_link,
+       fuel, displacement, no_of_cylinders, bhp_value, bhp_rpm, torque_value, torque_rpm,
+       transmission, gearbox, drive_type,
+       mileage, capacity,
+       boot_space, seating_capacity, wheel_base,
+       front_brake, rear_brake, tyre_size, tyre_type,
+       cruise_control, parking_sensors, keyLess_entry, engine_start_stop_button, LED_headlamps,
+       no_of_airbags, rear_camera, hill_assist{{prices}}
+FROM {schema.SEARCH_TABLE}
+WHERE vehicle_id IN ({{placeholders}})
+"""
+
+# (label, column, better): "max" or "min" marks the attributes that are ranked.
+ROWS = [
+    ("Brand & Model", "model", None),
+    ("Variant", "variant", None),
+    ("Type", "type", None),
+    ("Fuel", "fuel", None),
+    ("Transmission", "transmission", None),
+    ("Drive Type", "drive_type", None),
+    ("Base Price (₹)", "base_price", "min"),
+    ("Displacement (cc)", "displacement", None),
+    ("Mileage (km/l)", "mileage", "max"),
+    ("Fuel Tank (L)", "capacity", "max"),
+    ("Boot Space (L)", "boot_space", "max"),
+    ("Seating Capacity", "seating_capacity", "max"),
+    ("BHP @ RPM", "bhp_value", "max"),
+    ("Torque @ RPM", "torque_value", "max"),
+    ("Gearbox", "gearbox", None),
+    ("Tyres", "tyre_size", None),
+    ("Brakes (Front/Rear)", "front_brake", None),
+    ("Airbags", "no_of_airbags", "max"),
+    ("Cruise Control", "cruise_control", "max"),
+    ("Keyless Entry", "keyLess_entry", "max"),
+    ("Rear Camera", "rear_camera", "max"),
+    ("Hill Assist", "hill_assist", "max"),
+    ("LED Headlamps", "LED_headlamps", "max"),
+    ("Parking Sensors", "parking_sensors", None),
+    ("Engine Start/Stop", "engine_start_stop_button", "max"),
+]
+BOOLEAN_ROWS = {
+    "cruise_control", "keyLess_entry", "rear_camera", "hill_assist", "LED_headlamps", "engine_start_stop_button",
+}
+
+
+def variant_tree(rows) -> dict[str, dict[str, list[tuple[str, int]]]]:
+    """brand -> model -> [(variant, vehicle_id), ...] from (vehicle_id, brand, model, variant) rows, keeping their order."""
+    tree = {}
+    for vehicle_id, brand, model, variant in rows:
+        tree.setdefault(brand, {}).setdefault(model, []).append((variant, int(vehicle_id)))
+    return tree
+
+
+def _cities(cities) -> list[str]:
+    unknown = [city for city in cities if city not in CITIES]
+    if unknown:
+        raise ValueError(f"Unknown cities: {unknown}")
+    return list(cities)
+
+
+def compare_query(vehicle_ids, cities, wide: bool = False) -> tuple[str, tuple]:
+    """
+    (sql, params) fetching `vehicle_ids` with one price column per city in `cities`.
+
+    City names become column aliases, so only names from filters.CITIES are accepted. The
+    id list is padded (query_builder.in_list), so the SQL only depends on the cities and
+    roughly how many vehicles are compared.
+    """
+    cities = _cities(cities)
+    placeholders, ids = query_builder.in_list(int(v) for v in vehicle_ids)
+    if wide:
+        prices = "".join(f", `{city}`" for city in cities)
+        return SEARCH_COMPARE_QUERY.format(prices=prices, placeholders=placeholders), ids
+    prices = "".join(f", p{i}.price AS `{city}`" for i, city in enumerate(cities))
+    joins = "".join(
+        f"\nLEFT JOIN Price p{i} ON v.vehicle_id = p{i}.vehicle_id AND p{i}.city = %s" for i in range(len(cities))
+    )
+    sql = COMPARE_QUERY.format(prices=prices, joins=joins, placeholders=placeholders)
+    return sql, (*cities, *ids)
+
+
+def order_records(records, vehicle_ids) -> list[dict]:
+    """`records` in the order of `vehicle_ids` (SQL returns IN lists in index order)."""
+    by_id = {int(record["vehicle_id"]): record for record in records}
+    return [by_id[int(v)] for v in vehicle_ids if int(v) in by_id]
+
+
+def _price(value) -> str:
+    return f"₹{int(float(value)):,}" if value is not None else "N/A"
+
+
+def _display(column: str, record: dict) -> str:
+    value = record.get(column)
+    if column == "model":
+        return f"{record.get('brand')} {value}"
+    if column == "bhp_value":
+        return f"{value} @ {record.get('bhp_rpm')} rpm"
+    if column == "torque_value":
+        return f"{value} @ {record.get('torque_rpm')} rpm"
+    if column == "tyre_size":
+        return f"{value} ({record.get('tyre_type')})"
+    if column == "front_brake":
+        return f"{value} / {record.get('rear_brake')}"
+    if column == "base_price" or column in CITIES:
+        return _price(value)
+    if column in BOOLEAN_ROWS:
+        return "✅" if value else "❌"
+    return "N/A" if value is None else str(value)
+
+
+def rows_for(cities) -> list[tuple]:
+    """ROWS with one "<city> Price (₹)" row per selected city after the base price."""
+    at = next(i for i, (_, column, _) in enumerate(ROWS) if column == "base_price") + 1
+    city_rows = [(f"{city} Price (₹)", city, "min") for city in cities]
+    return ROWS[:at] + city_rows + ROWS[at:]
+
+
+def highlights(records, rows) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (best, worst) boolean masks of shape (len(rows), len(records)).
+
+    Values are laid out attribute x car and flipped for "min" attributes, so one
+    fmax/fmin reduction per axis finds every winner. Unranked rows, rows with fewer than
+    two known values and rows where all values tie get no highlight.
+    """
+    columns = [column for _, column, _ in rows]
+    frame = pd.DataFrame.from_records(records, columns=columns).astype(object)
+    values = frame.apply(lambda col: pd.to_numeric(col.where(col.notna(), np.nan), errors="coerce")).to_numpy(
+        dtype="float64"
+    ).T
+    direction = np.array([{"max": 1.0, "min": -1.0}.get(better, np.nan) for _, _, better in rows])[:, None]
+    scored = values * direction
+    top = np.fmax.reduce(scored, axis=1, keepdims=True)
+    bottom = np.fmin.reduce(scored, axis=1, keepdims=True)
+    ranked = (np.sum(~np.isnan(scored), axis=1, keepdims=True) >= 2) & (top > bottom)
+    return (scored == top) & ranked, (scored == bottom) & ranked
+
+
+def comparison_table(records, cities) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """The Compare page table (one row per attribute, one column per car) and its best/worst masks."""
+    rows = rows_for(cities)
+    table = pd.DataFrame(
+        {
+            f"{record['brand']} {record['model']} ({record['variant']})": [
+                _display(column, record) for _, column, _ in rows
+            ]
+            for record in records
+        },
+        index=pd.Index([label for label, _, _ in rows], name="Feature"),
+    )
+    best, worst = highlights(records, rows)
+    return table, best, worst
+
+
+def style(table: pd.DataFrame, best: np.ndarray, worst: np.ndarray):
+    """A Styler colouring the best value of each ranked attribute green and the worst red."""
+    css = np.where(best, BEST_STYLE, np.where(worst, WORST_STYLE, ""))
+    return table.style.apply(lambda _: pd.DataFrame(css, index=table.index, columns=table.columns), axis=None)
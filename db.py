@@ -0,0 +1,233 @@
+import os
+import time
+import atexit
+import queue
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import bootstrap
+import mysql
+
+# Binds mysql.connector without running it; the connector is imported when a connection is opened.
+bootstrap.lazy_import("mysql.connector")
+
+# --- POOL CONFIG ---
+POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "30"))
+# Connections idle for longer than this are pinged before being handed out.
+POOL_PING_AFTER = float(os.getenv("MYSQL_POOL_PING_AFTER", "60"))
+# The C extension is faster but not available on every host, so it is opt-in.
+USE_C_EXTENSION = os.getenv("MYSQL_USE_C_EXT", "0").lower() in ("1", "true", "yes")
+
+_ca_lock = threading.Lock()
+_ca_path = None
+
+
+def connect_kwargs(ssl_ca_path: str | None = None) -> dict:
+    """Builds the mysql.connector.connect() arguments from the environment."""
+    kwargs = {
+        "host": os.getenv("MYSQL_HOST"),
+        "user": os.getenv("MYSQL_USER"),
+        "password": os.getenv("MYSQL_PASSWORD"),
+        "database": os.getenv("MYSQL_DATABASE"),
+        "port": int(os.getenv("MYSQL_PORT", "3306")),
+        "connection_timeout": 30,
+        "use_pure": not USE_C_EXTENSION,
+    }
+    if ssl_ca_path:
+        kwargs["ssl_ca"] = ssl_ca_path
+    return kwargs
+
+
+def ssl_ca_path() -> str | None:
+    """
+    Path of the CA certificate for TLS, or None when none is configured.
+
+    MYSQL_SSL_CA names an existing file; otherwise the PEM text in AIVEN_CA_PEM is
+    written to a temporary file once per process and removed again at exit.
+    """
+    global _ca_path
+    if os.getenv("MYSQL_SSL_CA"):
+        return os.getenv("MYSQL_SSL_CA")
+    ssl_ca_content = os.getenv("AIVEN_CA_PEM")
+    if not ssl_ca_content:
+        return None
+    with _ca_lock:
+        if _ca_path is None:
+            with tempfile.NamedTemporaryFile(delete=False, mode="w", suffix=".pem") as tmp_file:
+                tmp_file.write(ssl_ca_content)
+            _ca_path = tmp_file.name
+            atexit.register(_remove, _ca_path)
+        return _ca_path
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@dataclass
+class PoolStats:
+    """Checkouts, waits and reconnects of a ConnectionPool; as_dict() gives the sidebar rows as text."""
+    hits: int = 0
+    misses: int = 0
+    waits: int = 0
+    wait_time: float = 0.0
+    reconnects: int = 0
+    in_use: int = 0
+    created: int = 0
+
+    def as_dict(self) -> dict[str, str]:
+        return {
+            "Hits": f"{self.hits:,}",
+            "Misses": f"{self.misses:,}",
+            "Waits": f"{self.waits:,}",
+            "Wait time (s)": f"{self.wait_time:.3f}",
+            "Reconnects": f"{self.reconnects:,}",
+            "In use": f"{self.in_use:,}",
+            "Open connections": f"{self.created:,}",
+        }
+
+
+class ConnectionPool:
+    """
+    A small thread-safe pool of MySQL connections shared by every session.
+
+    A checkout that finds an idle connection counts as a hit; one that has to
+    open a new connection counts as a miss. When the pool is at capacity the
+    caller blocks until a connection is returned and the time spent waiting is
+    recorded. Idle connections are pinged before reuse and transparently
+    reconnected if the server has dropped them.
+    """
+
+    def __init__(
+        self,
+        connect_args: dict,
+        size: int = POOL_SIZE,
+        timeout: float = POOL_TIMEOUT,
+        ping_after: float = POOL_PING_AFTER
+    ) -> None:
+        self.connect_args = connect_args
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.stats = PoolStats()
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        # mysql.connector.connect, resolved on the first checkout (see connection()).
+        self._connect = None
+
+    def _open(self):
+        return self._connect(**self.connect_args)
+
+    def _ensure_alive(self, conn, last_used: float):
+        """Returns a usable connection, reconnecting it if it has gone stale."""
+        if time.monotonic() - last_used < self.ping_after and conn.is_connected():
+            return conn
+        try:
+            conn.ping(reconnect=True, attempts=2, delay=0)
+            return conn
+        except mysql.connector.Error:
+            with self._lock:
+                self.stats.reconnects += 1
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
+            return self._open()
+
+    def get(self):
+        """Checks a connection out of the pool."""
+        try:
+            conn, last_used = self._idle.get_nowait()
+            with self._lock:
+                self.stats.hits += 1
+                self.stats.in_use += 1
+            return self._revive(conn, last_used)
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = self.stats.created < self.size
+            if can_open:
+                self.stats.created += 1
+                self.stats.misses += 1
+                self.stats.in_use += 1
+
+        if can_open:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self.stats.created -= 1
+                    self.stats.in_use -= 1
+                raise
+
+        start = time.monotonic()
+        try:
+            conn, last_used = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No MySQL connection available after {self.timeout}s")
+        with self._lock:
+            self.stats.waits += 1
+            self.stats.wait_time += time.monotonic() - start
+            self.stats.in_use += 1
+        return self._revive(conn, last_used)
+
+    def _revive(self, conn, last_used: float):
+        try:
+            return self._ensure_alive(conn, last_used)
+        except Exception:
+            # The slot is lost if the server is unreachable; free it for a later retry.
+            with self._lock:
+                self.stats.created -= 1
+                self.stats.in_use -= 1
+            raise
+
+    def put(self, conn) -> None:
+        """Returns a connection to the pool, discarding it if it is broken."""
+        with self._lock:
+            self.stats.in_use -= 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except mysql.connector.Error:
+            with self._lock:
+                self.stats.created -= 1
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always returns it."""
+        if self._connect is None:
+            # The connector loads on the first checkout, under the lock so prefetch threads never race on it.
+            with self._lock:
+                if self._connect is None:
+                    self._connect = mysql.connector.connect
+        conn = self.get()
+        try:
+            yield conn
+        finally:
+            self.put(conn)
+
+    def close(self) -> None:
+        """Closes every idle connection."""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self.stats.created -= 1
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
@@ -0,0 +1,103 @@
+import os
+
+import pandas as pd
+
+# --- DETAIL VIEW CONFIG ---
+# Seconds a vehicle's detail payload is cached; a catalog reload changes the cache key sooner.
+DETAIL_TTL = int(os.getenv("CARQUEST_DETAIL_TTL", "600"))
+
+TABS = [
+    "Overview", "Engine", "Transmission", "Performance",
+    "Dimensions & Chassis", "Features", "City Prices", "Similar Cars",
+]
+# (label, column) rows of the spec tabs; City Prices and Similar Cars are rendered separately.
+SECTIONS = {
+    "Overview": [
+        ("Brand", "brand"), ("Model", "model"), ("Variant", "variant"), ("Type", "type"),
+        ("Base Ex-Showroom Price", "base_price"),
+    ],
+    "Engine": [
+        ("Fuel", "fuel"), ("Displacement (cc)", "displacement"), ("No. of Cylinders", "no_of_cylinders"),
+        ("BHP Value", "bhp_value"), ("BHP RPM", "bhp_rpm"),
+        ("Torque Value (Nm)", "torque_value"), ("Torque RPM", "torque_rpm"),
+    ],
+    "Transmission": [("Transmission", "transmission"), ("Gearbox", "gearbox"), ("Drive Type", "drive_type")],
+    "Performance": [("Mileage (kmpl)", "mileage"), ("Fuel Tank Capacity (L)", "capacity")],
+    "Dimensions & Chassis": [
+        ("Boot Space (L)", "boot_space"), ("Seating Capacity", "seating_capacity"),
+        ("Wheel Base (mm)", "wheel_base"), ("Front Brake", "front_brake"), ("Rear Brake", "rear_brake"),
+        ("Tyre Size", "tyre_size"), ("Tyre Type", "tyre_type"),
+    ],
+    "Features": [
+        ("Cruise Control", "cruise_control"), ("Parking Sensors", "parking_sensors"),
+        ("Keyless Entry", "keyLess_entry"), ("Engine Start/Stop", "engine_start_stop_button"),
+        ("LED Headlamps", "LED_headlamps"), ("No. of Airbags", "no_of_airbags"),
+        ("Rear Camera", "rear_camera"), ("Hill Assist", "hill_assist"),
+    ],
+}
+BOOLEAN_FIELDS = {
+    "cruise_control", "keyLess_entry", "engine_start_stop_button", "LED_headlamps", "rear_camera", "hill_assist",
+}
+
+
+def bool_to_label(val):
+    """Converts 1/0 (or True/False) to a user-friendly 'True'/'False'."""
+    if val in [1, True]:
+        return "True"
+    elif val in [0, False]:
+        return "False"
+    return str(val)  # Fallback for other data types
+
+
+def _missing(value) -> bool:
+    """None, NaN and pandas' NA all count as missing."""
+    return value is None or (pd.api.types.is_scalar(value) and bool(pd.isna(value)))
+
+
+def format_value(column: str, value) -> str:
+    if column == "base_price":
+        return f"₹{int(float(value)):,}" if not _missing(value) else "N/A"
+    if column in BOOLEAN_FIELDS:
+        return bool_to_label(None if _missing(value) else value)
+    if column == "parking_sensors":
+        return str(value) if value and not _missing(value) else "None"
+    if column == "no_of_airbags":
+        return str(value) if value and not _missing(value) else "N/A"
+    return "N/A" if _missing(value) else str(value)
+
+
+def payload(vehicle_info: pd.DataFrame, city_prices: pd.DataFrame) -> dict:
+    """
+    Plain-dict detail payload of one vehicle, from the frames of get_vehicle_details_many:
+    {"info": {column: value}, "city_prices": [(city, price), ...]}. Cheap to cache and render.
+    """
+    info = vehicle_info.iloc[0].to_dict()
+    info = {key: (None if _missing(value) else value) for key, value in info.items()}
+    prices = [
+        (city, price) for city, price in city_prices[["city", "city_price"]].itertuples(index=False)
+        if not _missing(city) and not _missing(price)
+    ]
+    return {"info": info, "city_prices": prices}
+
+
+def markdown_table(rows, header=("Specification", "Value")) -> str:
+    """A Markdown table of (label, value) rows; st.markdown renders it without building a DataFrame."""
+    lines = [f"| {header[0]} | {header[1]} |", "| --- | --- |"]
+    lines += [f"| {label} | {str(value).replace('|', '/')} |" for label, value in rows]
+    return "\n".join(lines)
+
+
+def section_table(section: str, info: dict) -> str:
+    rows = [(label, format_value(column, info.get(column))) for label, column in SECTIONS[section]]
+    return markdown_table(rows, header=("Feature" if section == "Features" else "Specification", "Value"))
+
+
+def city_price_table(city_prices) -> str:
+    return markdown_table([(city, f"₹{int(float(price)):,}") for city, price in city_prices], header=("City", "Price"))
+
+
+def monthly_emi(principal: float, annual_rate: float = 0.08, years: int = 5) -> float:
+    """EMI of a loan of `principal` at `annual_rate` APR over `years`."""
+    monthly_interest = annual_rate / 12
+    months = years * 12
+    return (principal * monthly_interest) / (1 - (1 + monthly_interest) ** (-months))
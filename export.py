@@ -0,0 +1,159 @@
+import io
+import csv
+import gzip
+import decimal
+
+import pandas as pd
+
+import bootstrap
+
+# Optional writers, imported when an export is first built.
+try:
+    pa = bootstrap.lazy_import("pyarrow")
+except ImportError:
+    pa = None
+
+try:
+    openpyxl = bootstrap.lazy_import("openpyxl")
+except ImportError:
+    openpyxl = None
+
+# Rows fetched per round trip when an export is streamed from a cursor.
+EXPORT_BATCH = 500
+
+# label -> (file extension, MIME type)
+FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def available_formats() -> list[str]:
+    """Export formats whose optional dependency (pyarrow, openpyxl) is installed."""
+    missing = set()
+    if pa is None:
+        missing.add("Parquet")
+    if openpyxl is None:
+        missing.add("Excel")
+    return [label for label in FORMATS if label not in missing]
+
+
+def file_name(stem: str, fmt: str) -> str:
+    return f"{stem}.{FORMATS[fmt][0]}"
+
+
+def mime(fmt: str) -> str:
+    return FORMATS[fmt][1]
+
+
+def _plain(value):
+    """Cell value as a CSV/Excel/Arrow friendly Python type (MySQL returns Decimals)."""
+    return float(value) if isinstance(value, decimal.Decimal) else value
+
+
+def frame_to_bytes(frame: pd.DataFrame, fmt: str) -> bytes:
+    """Encodes a result frame in `fmt`."""
+    columns = [str(col) for col in frame.columns]
+    rows = frame.astype(object).where(pd.notna(frame), None).itertuples(index=False, name=None)
+    return write_rows(columns, [rows], fmt)
+
+
+def write_rows(columns: list[str], batches, fmt: str, schema=None) -> bytes:
+    """
+    Encodes rows arriving in `batches` (iterables of tuples) in `fmt`, one batch at a time,
+    so a cursor can be exported without holding its result set as a DataFrame.
+
+    For Parquet, `schema` (see arrow_schema) fixes the column types up front; otherwise
+    they are inferred from the first batch.
+    """
+    out = io.BytesIO()
+    if fmt in ("CSV", "CSV (gzip)"):
+        raw = gzip.GzipFile(fileobj=out, mode="wb") if fmt == "CSV (gzip)" else out
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow(columns)
+        for batch in batches:
+            writer.writerows([_plain(v) for v in row] for row in batch)
+        text.flush()
+        text.detach()
+        if raw is not out:
+            raw.close()
+    elif fmt == "Parquet":
+        import pyarrow.parquet as pq
+
+        writer = None
+        for batch in batches:
+            batch = [[_plain(v) for v in row] for row in batch]
+            if not batch and writer is not None:
+                continue
+            data = {col: [row[i] for row in batch] for i, col in enumerate(columns)}
+            table = pa.Table.from_pydict(data, schema=schema)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(out, schema)
+            writer.write_table(table)
+        if writer is None:
+            writer = pq.ParquetWriter(out, schema or pa.schema([(col, pa.string()) for col in columns]))
+        writer.close()
+    elif fmt == "Excel":
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet("Results")
+        sheet.append(columns)
+        for batch in batches:
+            for row in batch:
+                sheet.append([_plain(v) for v in row])
+        workbook.save(out)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    return out.getvalue()
+
+
+def arrow_schema(description) -> "pa.Schema":
+    """Arrow schema for a mysql-connector cursor.description, so every streamed batch has the same types."""
+    from mysql.connector import FieldType
+
+    integers = {FieldType.TINY, FieldType.SHORT, FieldType.LONG, FieldType.LONGLONG, FieldType.INT24, FieldType.YEAR}
+    floats = {FieldType.FLOAT, FieldType.DOUBLE, FieldType.DECIMAL, FieldType.NEWDECIMAL}
+    fields = []
+    for column in description:
+        name, type_code = column[0], column[1]
+        if type_code in integers:
+            fields.append((name, pa.int64()))
+        elif type_code in floats:
+            fields.append((name, pa.float64()))
+        else:
+            fields.append((name, pa.string()))
+    return pa.schema(fields)
+
+
+def export_query(conn, sql: str, params=(), fmt: str = "CSV", max_rows: int | None = None,
+                 batch_size: int = EXPORT_BATCH) -> bytes:
+    """
+    Runs `sql` and streams its rows into an export with fetchmany, `batch_size` rows at a
+    time; at most `max_rows` rows are written.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        schema = arrow_schema(cursor.description) if fmt == "Parquet" else None
+
+        def batches():
+            written = 0
+            while max_rows is None or written < max_rows:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                if max_rows is not None:
+                    batch = batch[:max_rows - written]
+                written += len(batch)
+                yield batch
+
+        data = write_rows(columns, batches(), fmt, schema=schema)
+        # Drain anything past max_rows so the connection can be reused.
+        cursor.fetchall()
+        return data
+    finally:
+        cursor.close()
@@ -0,0 +1,166 @@
+"""
+Facet catalog behind the Filters and Compare selectors.
+
+One aggregated query groups the catalog by every categorical facet (brand, model, type,
+fuel, transmission, seating) and returns, per group, its vehicle count, its count per city
+and the min/max of every numeric filter. That "cube" is small: a few hundred to a few
+thousand groups. It is cached per catalog version. The values and slider bounds of
+every widget, and the faceted counts for any filter state ("hyundai (42)"), are then
+read from it with NumPy masks instead of one query per facet.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+import schema
+from filters import CITIES, FilterState
+
+# Categorical facets: cube column -> FilterState field (model is only used by Compare).
+DIMENSIONS = {
+    "brand": "brands", "model": None, "type": "types", "fuel": "fuels",
+    "transmission": "transmissions", "seating_capacity": "seating",
+}
+# Numeric filters whose overall min/max become slider bounds.
+RANGES = ["base_price", "displacement", "bhp_value", "torque_value", "mileage"]
+
+_COUNTS = ", ".join(f"COUNT(`{city}`) AS `n_{city}`" for city in CITIES)
+_BOUNDS = ", ".join(f"MIN(`{col}`) AS `min_{col}`, MAX(`{col}`) AS `max_{col}`" for col in RANGES + CITIES)
+_GROUP = ", ".join(DIMENSIONS)
+CUBE_COLUMNS = (
+    list(DIMENSIONS) + ["n"] + [f"n_{city}" for city in CITIES]
+    + [f"{bound}_{col}" for col in RANGES + CITIES for bound in ("min", "max")]
+)
+
+# Cube over vehicle_search...
+SEARCH_FACET_QUERY = f"""
+SELECT {_GROUP}, COUNT(*) AS n, {_COUNTS}, {_BOUNDS}
+FROM {schema.SEARCH_TABLE}
+GROUP BY {_GROUP}
+"""
+# ...and over the normalized tables, with the same inner joins as the Filters listing
+# and city prices pivoted once per vehicle.
+_PIVOT = ", ".join(f"MAX(CASE WHEN city = '{city}' THEN price END) AS `{city}`" for city in CITIES)
+FACET_QUERY = f"""
+SELECT {_GROUP}, COUNT(*) AS n, {_COUNTS}, {_BOUNDS}
+FROM (
+    SELECT v.brand, v.model, v.type, v.price AS base_price,
+           e.fuel, e.displacement, e.bhp_value, e.torque_value, pf.mileage,
+           d.seating_capacity, t.transmission, {", ".join(f"p.`{city}`" for city in CITIES)}
+    FROM Vehicle v
+    JOIN Engine e ON v.vehicle_id = e.vehicle_id
+    JOIN Transmission t ON v.vehicle_id = t.vehicle_id
+    JOIN Performance pf ON v.vehicle_id = pf.vehicle_id
+    JOIN Dimensions d ON v.vehicle_id = d.vehicle_id
+    JOIN Features f ON v.vehicle_id = f.vehicle_id
+    LEFT JOIN (SELECT vehicle_id, {_PIVOT} FROM Price GROUP BY vehicle_id) p ON v.vehicle_id = p.vehicle_id
+) AS facet_source
+GROUP BY {_GROUP}
+"""
+
+
+def cube_from_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """The facet cube of a CatalogEngine frame, shaped like the FACET_QUERY result."""
+    aggregations = {"n": ("vehicle_id", "size")}
+    aggregations |= {f"n_{city}": (city, "count") for city in CITIES}
+    for col in RANGES + CITIES:
+        aggregations[f"min_{col}"] = (col, "min")
+        aggregations[f"max_{col}"] = (col, "max")
+    grouped = frame.groupby(list(DIMENSIONS), dropna=False, observed=True).agg(**aggregations)
+    return grouped.reset_index()[CUBE_COLUMNS]
+
+
+def slider_span(bounds: tuple[float, float], scale: float = 1) -> tuple[int, int]:
+    """Whole-number (min, max) of a range slider covering `bounds` divided by `scale`."""
+    lo, hi = math.floor(bounds[0] / scale), math.ceil(bounds[1] / scale)
+    return lo, max(hi, lo + 1)
+
+
+def range_filter(picked, span: tuple[int, int]) -> tuple | None:
+    """
+    The FilterState range of a slider set to `picked`: None while it still covers the
+    whole `span`, so vehicles without a value (electric cars have no displacement) stay listed.
+    """
+    return None if tuple(picked) == tuple(span) else tuple(picked)
+
+
+def label(value, count: int) -> str:
+    """Selector label of a facet value: "hyundai (42)"."""
+    shown = int(value) if isinstance(value, float) else value
+    return f"{shown} ({count:,})"
+
+
+class FacetCatalog:
+    """
+    Distinct values, counts and numeric bounds of the catalog's filterable columns.
+
+    Counts are disjunctive, as in most faceted search UIs: a facet's counts apply every
+    other facet's selection but not its own, so picking "hyundai" still shows how many
+    "tata" cars there are. With a city selected, only vehicles priced there are counted.
+    Range sliders do not change the counts; the cube has no per-vehicle values to apply
+    them to.
+    """
+
+    def __init__(self, cube: pd.DataFrame, version=None) -> None:
+        cube = cube.copy()
+        cube["seating_capacity"] = pd.to_numeric(cube["seating_capacity"], errors="coerce")
+        for col in CUBE_COLUMNS[len(DIMENSIONS):]:
+            cube[col] = pd.to_numeric(cube[col], errors="coerce").astype("float64")
+        self.cube = cube
+        self.version = version
+        self.weights = {None: cube["n"].to_numpy()}
+        self.weights |= {city: cube[f"n_{city}"].to_numpy() for city in CITIES}
+        # Per dimension: each group's value code, the distinct values, and their lowercased keys.
+        self.codes, self.values, self._keys = {}, {}, {}
+        for dim in DIMENSIONS:
+            column = cube[dim]
+            present = column.dropna().unique()
+            ordered = sorted(present, key=lambda v: (str(v).lower() if isinstance(v, str) else v))
+            self.values[dim] = ordered
+            self._keys[dim] = np.array([self._key(v) for v in ordered], dtype=object)
+            lookup = {v: i for i, v in enumerate(ordered)}
+            self.codes[dim] = np.array([lookup.get(v, -1) for v in column], dtype=np.int64)
+
+    @staticmethod
+    def _key(value):
+        """Case-insensitive match key, as MySQL's collation and CatalogEngine compare values."""
+        return value.lower() if isinstance(value, str) else float(value)
+
+    def _selected(self, dim: str, state: FilterState) -> np.ndarray:
+        """Boolean mask of the groups matching `state`'s selection for `dim` (all True if none)."""
+        field = DIMENSIONS[dim]
+        chosen = getattr(state, field) if field else ()
+        if not chosen:
+            return np.ones(len(self.cube), dtype=bool)
+        wanted = {self._key(v) for v in chosen}
+        hits = np.array([key in wanted for key in self._keys[dim]] + [False], dtype=bool)
+        return hits[self.codes[dim]]
+
+    def counts(self, dim: str, state: FilterState = FilterState()) -> dict:
+        """value -> vehicles matching every selection in `state` except its own for `dim`."""
+        rows = np.ones(len(self.cube), dtype=bool)
+        for other in DIMENSIONS:
+            if other != dim:
+                rows &= self._selected(other, state)
+        codes = self.codes[dim][rows]
+        weights = self.weights[state.city][rows]
+        known = codes >= 0
+        totals = np.bincount(codes[known], weights=weights[known], minlength=len(self.values[dim]))
+        return {value: int(total) for value, total in zip(self.values[dim], totals)}
+
+    def city_counts(self, state: FilterState = FilterState()) -> dict:
+        """city -> vehicles priced there that match every categorical selection in `state`."""
+        rows = np.ones(len(self.cube), dtype=bool)
+        for dim in DIMENSIONS:
+            rows &= self._selected(dim, state)
+        return {city: int(self.weights[city][rows].sum()) for city in CITIES}
+
+    def bounds(self, column: str) -> tuple[float, float] | None:
+        """Overall (min, max) of a numeric column or city price; None if it has no values."""
+        lo, hi = self.cube[f"min_{column}"].min(), self.cube[f"max_{column}"].max()
+        return None if pd.isna(lo) or pd.isna(hi) else (float(lo), float(hi))
+
+    def price_bounds(self) -> tuple[float, float] | None:
+        """(min, max) over the base price and every city price."""
+        found = [b for b in (self.bounds(col) for col in ["base_price"] + CITIES) if b is not None]
+        return (min(b[0] for b in found), max(b[1] for b in found)) if found else None
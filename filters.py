@@ -0,0 +1,224 @@
+import os
+from dataclasses import dataclass
+
+from query_builder import in_clause, between_clause
+
+# --- FILTER VOCABULARY ---
+CITIES = ["Ahmedabad", "Bangalore", "Chandigarh", "Chennai", "Hyderabad",
+          "Jaipur", "Lucknow", "Mumbai", "Patna", "Pune"]
+SORT_OPTIONS = ["Price", "BHP", "Mileage"]
+# Results per page on the Filters page; the page-size picker offers these.
+PAGE_SIZE = int(os.getenv("CARQUEST_PAGE_SIZE", "10"))
+PAGE_SIZES = sorted({10, 25, 50, PAGE_SIZE})
+
+
+@dataclass(frozen=True)
+class FilterState:
+    """
+    The selections made on the Filters page, independent of the backend that answers them.
+
+    Ranges are inclusive (lo, hi) tuples and `None` means "no constraint". Prices are in
+    rupees, not lakhs. Multi-select values are kept as sorted tuples so that two states
+    with the same selections compare (and hash) equal.
+    """
+    city: str | None = None
+    price_range: tuple[float, float] | None = None
+    brands: tuple[str, ...] = ()
+    types: tuple[str, ...] = ()
+    variant: str = ""
+    fuels: tuple[str, ...] = ()
+    displacement_range: tuple[float, float] | None = None
+    bhp_range: tuple[float, float] | None = None
+    torque_range: tuple[float, float] | None = None
+    mileage_range: tuple[float, float] | None = None
+    seating: tuple[int, ...] = ()
+    transmissions: tuple[str, ...] = ()
+    sort_by: str = "Price"
+    # Vehicles picked by the typeahead index (search_index.py); an empty tuple matches nothing.
+    vehicle_ids: tuple[int, ...] | None = None
+
+    @classmethod
+    def create(cls, **selections) -> "FilterState":
+        """Builds a state from raw widget values, normalising lists and ranges."""
+        for name in ("brands", "types", "fuels", "transmissions"):
+            if name in selections:
+                selections[name] = tuple(sorted(set(selections[name] or ())))
+        if "seating" in selections:
+            selections["seating"] = tuple(sorted({int(s) for s in selections["seating"] or ()}))
+        for name in ("price_range", "displacement_range", "bhp_range", "torque_range", "mileage_range"):
+            if selections.get(name) is not None:
+                lo, hi = selections[name]
+                selections[name] = (float(lo), float(hi))
+        if "variant" in selections:
+            selections["variant"] = (selections["variant"] or "").strip()
+        if selections.get("vehicle_ids") is not None:
+            selections["vehicle_ids"] = tuple(sorted({int(v) for v in selections["vehicle_ids"]}))
+        return cls(**selections)
+
+
+# --- LISTING QUERY ---
+# ORDER BY per sort option; vehicle_id breaks ties so pages are stable (and match CatalogEngine).
+# Rows without the sort value (NULL mileage or BHP) are kept and listed last, whatever the direction.
+# Pages are addressed by keyset: `after` is the (is NULL, sort value, vehicle_id) of the previous
+# page's last row, so any page is one index seek instead of an OFFSET scan.
+SORT_COLUMNS = {"Price": ("price", "ASC"), "BHP": ("bhp_value", "DESC"), "Mileage": ("mileage", "DESC")}
+
+
+def sort_column(state: "FilterState") -> tuple[str, str]:
+    return SORT_COLUMNS.get(state.sort_by, SORT_COLUMNS["Price"])
+
+
+def page_cursor(state: "FilterState", row) -> tuple:
+    """
+    The `after` cursor that continues a listing after `row` (a listing row as a dict/Series).
+
+    Values come back as plain Python numbers: a DataFrame row holds NumPy scalars, which
+    mysql-connector cannot bind as parameters. A row without the sort value (None or NaN)
+    gives `(True, None, vehicle_id)`.
+    """
+    value = row[sort_column(state)[0]]
+    if value is None or value != value:
+        return (True, None, int(row["vehicle_id"]))
+    return (False, float(value), int(row["vehicle_id"]))
+
+# Where each listing column lives in the normalized tables...
+JOINED_COLUMNS = {
+    "vehicle_id": "v.vehicle_id", "brand": "v.brand", "model": "v.model", "variant": "v.variant",
+    "type": "v.type", "image_link": "v.image_link", "fuel": "e.fuel", "displacement": "e.displacement",
+    "bhp_value": "e.bhp_value", "torque_value": "e.torque_value", "mileage": "pf.mileage",
+    "seating_capacity": "d.seating_capacity", "transmission": "t.transmission",
+}
+JOINED_FROM = """Vehicle v
+      {price_join}
+      JOIN Engine e ON v.vehicle_id = e.vehicle_id
+      JOIN Transmission t ON v.vehicle_id = t.vehicle_id
+      JOIN Performance pf ON v.vehicle_id = pf.vehicle_id
+      JOIN Dimensions d ON v.vehicle_id = d.vehicle_id
+      JOIN Features f ON v.vehicle_id = f.vehicle_id"""
+# ...and in the wide vehicle_search table, where every city price is its own column.
+SEARCH_COLUMNS = {col: f"s.{col}" for col in JOINED_COLUMNS}
+SEARCH_FROM = "vehicle_search s"
+
+
+def _where(state: FilterState, columns: dict, filters: list, params: list) -> str:
+    """Adds the predicates of `state` to `filters` and joins them into a WHERE condition."""
+    if state.price_range is not None:
+        filters.append(between_clause(columns["price"], state.price_range, params))
+    if state.brands:
+        filters.append(in_clause(columns["brand"], state.brands, params))
+    if state.types:
+        filters.append(in_clause(columns["type"], state.types, params))
+    if state.variant:
+        filters.append(f"{columns['variant']} LIKE %s")
+        params.append(f"%{state.variant}%")
+    if state.vehicle_ids is not None:
+        filters.append(in_clause(columns["vehicle_id"], state.vehicle_ids, params) if state.vehicle_ids else "FALSE")
+    if state.fuels:
+        filters.append(in_clause(columns["fuel"], state.fuels, params))
+    if state.displacement_range is not None:
+        filters.append(between_clause(columns["displacement"], state.displacement_range, params))
+    if state.bhp_range is not None:
+        filters.append(between_clause(columns["bhp_value"], state.bhp_range, params))
+    if state.torque_range is not None:
+        filters.append(between_clause(columns["torque_value"], state.torque_range, params))
+    if state.mileage_range is not None:
+        filters.append(between_clause(columns["mileage"], state.mileage_range, params))
+    if state.seating:
+        filters.append(in_clause(columns["seating_capacity"], state.seating, params))
+    if state.transmissions:
+        filters.append(in_clause(columns["transmission"], state.transmissions, params))
+    # An unfiltered listing still needs a condition for the keyset predicate to extend.
+    return " AND ".join(filters) or "TRUE"
+
+
+def _listing_query(state: FilterState, limit: int, columns: dict, from_clause: str, price: str,
+                   filters: list, params: list, distinct: bool = True, after: tuple | None = None
+                   ) -> tuple[str, tuple]:
+    """Assembles the listing query for one page: the first, or the one following `after`."""
+    columns = dict(columns, price=price)
+    where_clause = _where(state, columns, filters, params)
+    sort, direction = sort_column(state)
+    sort_col, vehicle_id_col = columns[sort], columns["vehicle_id"]
+    if after is not None:
+        is_null, value, vehicle_id = after
+        if is_null:
+            # Already among the trailing NULL rows: only later NULL rows remain.
+            where_clause += f" AND {sort_col} IS NULL AND {vehicle_id_col} > %s"
+            params.append(int(vehicle_id))
+        else:
+            beyond = ">" if direction == "ASC" else "<"
+            where_clause += (
+                f" AND ({sort_col} IS NULL OR {sort_col} {beyond} %s"
+                f" OR ({sort_col} = %s AND {vehicle_id_col} > %s))"
+            )
+            params.extend([value, value, int(vehicle_id)])
+    params.append(int(limit))
+
+    select = ",\n          ".join(
+        f"{columns[col]} AS {col}" if col == "price" else columns[col]
+        for col in ("vehicle_id", "brand", "model", "variant", "type", "price", "image_link", "bhp_value", "mileage")
+    )
+    query = f"""
+      SELECT{" DISTINCT" if distinct else ""}
+          {select}
+      FROM {from_clause}
+      WHERE {where_clause}
+      ORDER BY {sort_col} IS NULL, {sort_col} {direction}, {vehicle_id_col}
+      LIMIT %s
+    """
+    return query, tuple(params)
+
+
+def _count_query(state: FilterState, columns: dict, from_clause: str, price: str, filters: list,
+                 params: list) -> tuple[str, tuple]:
+    where_clause = _where(state, dict(columns, price=price), filters, params)
+    query = f"""
+      SELECT COUNT(DISTINCT {columns["vehicle_id"]}) AS total
+      FROM {from_clause}
+      WHERE {where_clause}
+    """
+    return query, tuple(params)
+
+
+def _joined_source(state: FilterState) -> tuple[str, str, list, list]:
+    """(from clause, price column, filters, params) of the normalized tables for `state`."""
+    if state.city:
+        from_clause = JOINED_FROM.format(price_join="JOIN Price p ON v.vehicle_id = p.vehicle_id")
+        return from_clause, "p.price", ["p.city = %s"], [state.city]
+    return JOINED_FROM.format(price_join=""), "v.price", [], []
+
+
+def _search_source(state: FilterState) -> tuple[str, str, list, list]:
+    """(from clause, price column, filters, params) of vehicle_search for `state`."""
+    if state.city:
+        if state.city not in CITIES:
+            raise ValueError(f"Unknown city: {state.city}")
+        price = f"s.`{state.city}`"
+        return SEARCH_FROM, price, [f"{price} IS NOT NULL"], []
+    return SEARCH_FROM, "s.base_price", [], []
+
+
+def build_filters_query(state: FilterState, limit: int = 10, after: tuple | None = None) -> tuple[str, tuple]:
+    """
+    Translates a FilterState into the listing query over the normalized tables, and its parameters.
+
+    With a city the price comes from that city's Price row; without one (QuestAI
+    questions often name no city) the base ex-showroom price is used. `after` selects
+    the page following that (is NULL, sort value, vehicle_id) cursor.
+    """
+    return _listing_query(state, limit, JOINED_COLUMNS, *_joined_source(state), after=after)
+
+
+def build_search_query(state: FilterState, limit: int = 10, after: tuple | None = None) -> tuple[str, tuple]:
+    """Same listing as build_filters_query, read from the single vehicle_search table."""
+    return _listing_query(state, limit, SEARCH_COLUMNS, *_search_source(state), distinct=False, after=after)
+
+
+def build_count_query(state: FilterState, wide: bool = False) -> tuple[str, tuple]:
+    """COUNT(*) of every row the listing for `state` can page through; `wide` reads vehicle_search.
+
+    The sort order does not change the count: rows missing the sort value are listed last, not dropped.
+    """
+    if wide:
+        return _count_query(state, SEARCH_COLUMNS, *_search_source(state))
+    return _count_query(state, JOINED_COLUMNS, *_joined_source(state))
@@ -0,0 +1,254 @@
+"""
+Thumbnail cache for the catalog's remote images.
+
+Each image is downloaded once, resized to every width the app displays and kept on disk
+in a size-bounded LRU cache; the app then serves the thumbnail bytes instead of
+hotlinking the full-size original. Local paths and file:// URLs work too, so the cache
+can be exercised offline with fixture images.
+
+Warm-up (prefetches every image_link of the cleaned catalog in parallel):
+    python image_cache.py --csv data/cars_cleaned.csv --workers 8
+"""
+import io
+import os
+import time
+import hashlib
+import argparse
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+
+import bootstrap
+
+# Loaded on the first download, not when the app starts.
+requests = bootstrap.lazy_import("requests")
+Image = bootstrap.lazy_import("PIL.Image")
+
+# --- IMAGE CACHE CONFIG ---
+IMAGE_CACHE_DIR = os.getenv("CARQUEST_IMAGE_CACHE_DIR", os.path.join("data", "image_cache"))
+IMAGE_CACHE_MB = int(os.getenv("CARQUEST_IMAGE_CACHE_MB", "200"))
+# WEBP or JPEG; WebP thumbnails are about a third smaller at the same quality.
+IMAGE_FORMAT = os.getenv("CARQUEST_IMAGE_FORMAT", "WEBP").upper()
+IMAGE_QUALITY = 80
+IMAGE_TIMEOUT = 10
+# Seconds before an image that failed to download is tried again; the app shows the remote URL meanwhile.
+RETRY_AFTER = 300
+# Widths the app displays: similar-car tiles, result cards, Compare page, Home page tiles.
+THUMB_WIDTHS = (150, 250, 300, 600)
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+USER_AGENT = "Mozilla/5.0 (compatible; CarQuest image cache)"
+
+
+@dataclass
+class ImageCacheStats:
+    """Lookups, downloads and evictions of the thumbnail cache, plus its current file count and size."""
+    hits: int = 0
+    misses: int = 0
+    failures: int = 0
+    evictions: int = 0
+    files: int = 0
+    bytes: int = 0
+
+    def as_dict(self) -> dict[str, str]:
+        lookups = self.hits + self.misses
+        return {
+            "Hits": f"{self.hits:,}",
+            "Misses (downloaded)": f"{self.misses:,}",
+            "Hit rate": f"{self.hits / lookups:.0%}" if lookups else "-",
+            "Failed downloads": f"{self.failures:,}",
+            "Evicted": f"{self.evictions:,}",
+            "Files": f"{self.files:,}",
+            "Size": f"{self.bytes / 1024 / 1024:.1f} MB",
+        }
+
+
+def fetch(url: str, timeout: float = IMAGE_TIMEOUT) -> bytes:
+    """The original image bytes: from the web, or from disk for local paths and file:// URLs."""
+    parsed = urlparse(url)
+    if parsed.scheme in ("http", "https"):
+        response = requests.get(url, timeout=timeout, headers={"User-Agent": USER_AGENT})
+        response.raise_for_status()
+        return response.content
+    path = unquote(parsed.path) if parsed.scheme == "file" else url
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def make_thumbnails(original: bytes, widths=THUMB_WIDTHS, image_format: str = IMAGE_FORMAT) -> dict[int, bytes]:
+    """Encodes one thumbnail per width; images are never upscaled, only re-encoded."""
+    with Image.open(io.BytesIO(original)) as image:
+        image = image.convert("RGB")
+        thumbnails = {}
+        for width in widths:
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                resized = image.resize((width, height), Image.LANCZOS)
+            else:
+                resized = image
+            out = io.BytesIO()
+            resized.save(out, format=image_format, quality=IMAGE_QUALITY)
+            thumbnails[width] = out.getvalue()
+    return thumbnails
+
+
+class ImageCache:
+    """
+    Size-bounded on-disk LRU cache of thumbnails, shared by every session.
+
+    Files are named after a hash of the URL and the width. Recency is the file's
+    mtime, refreshed on every hit, so the LRU order survives restarts. A miss
+    downloads the original once and writes all widths; concurrent misses on the same
+    URL wait for the first download instead of repeating it.
+    """
+
+    def __init__(self, directory: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MB * 1024 * 1024,
+                 image_format: str = IMAGE_FORMAT, fetcher=fetch) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.image_format = image_format
+        self.extension = EXTENSIONS[image_format]
+        self.fetcher = fetcher
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.failed = {}
+        self.stats = ImageCacheStats()
+        os.makedirs(directory, exist_ok=True)
+        # name -> size, least recently used first.
+        self.files = OrderedDict()
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith("." + self.extension):
+                stat = os.stat(os.path.join(directory, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self.files[name] = size
+        self._update_totals()
+
+    def _name(self, url: str, width: int) -> str:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return f"{digest}_{width}.{self.extension}"
+
+    def _update_totals(self) -> None:
+        self.stats.files = len(self.files)
+        self.stats.bytes = sum(self.files.values())
+
+    def _read(self, name: str) -> bytes | None:
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self.files.pop(name, None)
+            return None
+        with self.lock:
+            if name in self.files:
+                self.files.move_to_end(name)
+        return data
+
+    def _write(self, name: str, data: bytes) -> None:
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self.lock:
+            self.files[name] = len(data)
+            self.files.move_to_end(name)
+            total = sum(self.files.values())
+            while total > self.max_bytes and len(self.files) > 1:
+                old_name, size = self.files.popitem(last=False)
+                total -= size
+                self.stats.evictions += 1
+                try:
+                    os.remove(os.path.join(self.directory, old_name))
+                except OSError:
+                    pass
+            self._update_totals()
+
+    def contains(self, url: str, width: int) -> bool:
+        with self.lock:
+            return self._name(url, width) in self.files
+
+    def thumbnail(self, url: str, width: int) -> bytes | None:
+        """The cached thumbnail of `url` at `width`, downloading it on a miss; None if it cannot be fetched."""
+        if not url:
+            return None
+        name = self._name(url, width)
+        while True:
+            with self.lock:
+                if time.monotonic() < self.failed.get(url, 0):
+                    return None
+                cached = name in self.files
+                pending = self.in_flight.get(url)
+                if not cached and pending is None:
+                    pending = self.in_flight[url] = threading.Event()
+                    self.stats.misses += 1
+                    break
+            if cached:
+                data = self._read(name)
+                if data is not None:
+                    with self.lock:
+                        self.stats.hits += 1
+                    return data
+                continue
+            # Another thread is downloading this image; use its result once written.
+            pending.wait()
+            with self.lock:
+                if name not in self.files:
+                    return None
+
+        try:
+            thumbnails = make_thumbnails(self.fetcher(url), self._widths(width), self.image_format)
+        except Exception:
+            with self.lock:
+                self.stats.failures += 1
+                self.failed[url] = time.monotonic() + RETRY_AFTER
+            return None
+        else:
+            for thumb_width, data in thumbnails.items():
+                self._write(self._name(url, thumb_width), data)
+            return thumbnails[width]
+        finally:
+            with self.lock:
+                del self.in_flight[url]
+            pending.set()
+
+    @staticmethod
+    def _widths(width: int) -> tuple:
+        return tuple(sorted(set(THUMB_WIDTHS) | {int(width)}))
+
+    def warm(self, urls, workers: int = 8, width: int = THUMB_WIDTHS[0]) -> dict[str, int]:
+        """Downloads every URL not cached yet, `workers` at a time; returns counts per outcome."""
+        urls = [url for url in dict.fromkeys(urls) if url]
+        todo = [url for url in urls if not self.contains(url, width)]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image") as pool:
+            results = list(pool.map(lambda url: self.thumbnail(url, width) is not None, todo))
+        return {"cached": len(urls) - len(todo), "fetched": sum(results), "failed": results.count(False)}
+
+
+def main() -> None:
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Prefetch and thumbnail every catalog image")
+    parser.add_argument("--csv", default=os.path.join("data", "cars_cleaned.csv"))
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--cache-dir", default=IMAGE_CACHE_DIR)
+    args = parser.parse_args()
+
+    urls = pd.read_csv(args.csv, usecols=["image_link"])["image_link"].dropna().tolist()
+    cache = ImageCache(directory=args.cache_dir)
+    start = time.perf_counter()
+    counts = cache.warm(urls, workers=args.workers)
+    print(
+        f"{len(set(urls)):,} images: {counts['cached']:,} already cached, {counts['fetched']:,} fetched, "
+        f"{counts['failed']:,} failed in {time.perf_counter() - start:.1f}s"
+    )
+    print(f"Cache: {cache.stats.files:,} files, {cache.stats.bytes / 1024 / 1024:.1f} MB in {args.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import time
+import argparse
+
+import dotenv
+import mysql.connector
+import pandas as pd
+
+import db
+import schema
+from filters import CITIES
+
+DEFAULT_CSV = "data/cars_cleaned.csv"
+BATCH_SIZE = 1_000
+STAGING = "_staging"
+OLD = "_old"
+
+# Columns loaded into each table, in INSERT order. vehicle_id comes first everywhere.
+TABLE_COLUMNS = {
+    "Vehicle": ["vehicle_id", "brand", "model", "variant", "type", "price", "url", "image_link"],
+    "Engine": ["vehicle_id", "fuel", "displacement", "no_of_cylinders", "bhp_value", "bhp_rpm", "torque_value", "torque_rpm"],
+    "Transmission": ["vehicle_id", "transmission", "gearbox", "drive_type"],
+    "Performance": ["vehicle_id", "mileage", "capacity"],
+    "Dimensions": ["vehicle_id", "boot_space", "seating_capacity", "wheel_base"],
+    "Chassis": ["vehicle_id", "front_brake", "rear_brake", "tyre_size", "tyre_type"],
+    "Features": ["vehicle_id", "cruise_control", "parking_sensors", "keyLess_entry", "engine_start_stop_button",
+                 "LED_headlamps", "no_of_airbags", "rear_camera", "hill_assist"],
+    "Price": ["vehicle_id", "city", "price"],
+}
+# The wide table carries every spec column plus one price column per city.
+TABLE_COLUMNS[schema.SEARCH_TABLE] = (
+    ["vehicle_id", "brand", "model", "variant", "type", "base_price", "url", "image_link"]
+    + [col for table in schema.TABLES[1:-1] for col in TABLE_COLUMNS[table][1:]]
+    + CITIES
+)
+
+
+def upsert_statement(table: str, columns: list[str]) -> str:
+    """INSERT ... ON DUPLICATE KEY UPDATE, so loading the same rows twice is a no-op."""
+    updates = ", ".join(f"{col} = VALUES({col})" for col in columns if col != "vehicle_id")
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON DUPLICATE KEY UPDATE {updates}"
+    )
+
+
+def existing_tables(cursor) -> set[str]:
+    cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()")
+    return {name for (name,) in cursor.fetchall()}
+
+
+def existing_ids(cursor, tables: set[str]) -> dict[str, int]:
+    """url -> vehicle_id of the live catalog, so reloads keep ids stable."""
+    if "Vehicle" not in tables:
+        return {}
+    cursor.execute("SELECT url, vehicle_id FROM Vehicle WHERE url IS NOT NULL")
+    return dict(cursor.fetchall())
+
+
+def read_catalog(path: str) -> pd.DataFrame:
+    frame = pd.read_csv(path)
+    # Variant URLs identify a row; the last occurrence wins, as an upsert would.
+    return frame.drop_duplicates(subset=["url"], keep="last").reset_index(drop=True)
+
+
+def assign_ids(frame: pd.DataFrame, known: dict[str, int]) -> pd.DataFrame:
+    """Reuses the live vehicle_id of known URLs and numbers new ones after the current maximum."""
+    next_id = max(known.values(), default=0) + 1
+    ids = []
+    for url in frame["url"]:
+        if url in known:
+            ids.append(known[url])
+        else:
+            ids.append(next_id)
+            next_id += 1
+    frame = frame.copy()
+    frame.insert(0, "vehicle_id", ids)
+    return frame
+
+
+def to_rows(frame: pd.DataFrame, columns: list[str]) -> list[tuple]:
+    """Plain Python tuples with NaN turned into NULL."""
+    subset = frame[columns].astype(object)
+    subset = subset.where(pd.notna(subset), None)
+    return list(subset.itertuples(index=False, name=None))
+
+
+def table_rows(frame: pd.DataFrame) -> dict[str, list[tuple]]:
+    rows = {table: to_rows(frame, TABLE_COLUMNS[table]) for table in schema.TABLES if table != "Price"}
+    # Unpivot the per-city price columns into Price(vehicle_id, city, price).
+    city_columns = [c for c in CITIES if c in frame.columns]
+    prices = (
+        frame[["vehicle_id"] + city_columns]
+        .melt(id_vars=["vehicle_id"], var_name="city", value_name="price")
+        .dropna(subset=["price"])
+        .sort_values(["vehicle_id", "city"])
+    )
+    rows["Price"] = to_rows(prices, TABLE_COLUMNS["Price"])
+    search = frame.rename(columns={"price": "base_price"}).reindex(columns=TABLE_COLUMNS[schema.SEARCH_TABLE])
+    rows[schema.SEARCH_TABLE] = to_rows(search, TABLE_COLUMNS[schema.SEARCH_TABLE])
+    return rows
+
+
+def load_staging(conn, rows: dict[str, list[tuple]], batch_size: int) -> dict[str, int]:
+    """Recreates the staging tables and fills them in batches; returns rows loaded per table."""
+    cursor = conn.cursor()
+    for table in reversed(schema.LOADED_TABLES):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}{STAGING}")
+    for statement in schema.create_table_statements(STAGING):
+        cursor.execute(statement)
+
+    loaded = {}
+    for table in schema.LOADED_TABLES:
+        statement = upsert_statement(f"{table}{STAGING}", TABLE_COLUMNS[table])
+        table_data = rows[table]
+        for i in range(0, len(table_data), batch_size):
+            cursor.executemany(statement, table_data[i:i + batch_size])
+        loaded[table] = len(table_data)
+        print(f"Staged {len(table_data):>6} rows into {table}{STAGING}")
+
+    conn.commit()
+    cursor.close()
+    return loaded
+
+
+def swap_in(conn, tables: set[str]) -> None:
+    """
+    Atomically replaces the live tables with the staging ones.
+
+    A single RENAME TABLE statement moves every table at once, so readers see either
+    the old catalog or the new one, never a mix. Live tables are renamed before their
+    staging copies so the auto-generated foreign key names follow along cleanly.
+    """
+    swap_tables(conn, schema.LOADED_TABLES, tables)
+
+
+def swap_tables(conn, names: list[str], tables: set[str]) -> None:
+    """Renames every `<name>_staging` to `<name>` in one statement and drops what it replaced."""
+    cursor = conn.cursor()
+    # Leftovers of an interrupted swap are dropped children first, as their foreign keys require.
+    for table in reversed(names):
+        if table in tables:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}{OLD}")
+    renames = [f"{table} TO {table}{OLD}" for table in names if table in tables]
+    for table in names:
+        renames.append(f"{table}{STAGING} TO {table}")
+    cursor.execute("RENAME TABLE " + ", ".join(renames))
+
+    for table in reversed(names):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}{OLD}")
+    cursor.close()
+
+
+def rebuild_search_table(conn) -> int:
+    """
+    Rebuilds vehicle_search from the normalized tables already in the database and swaps it in.
+
+    For databases that were not filled by this loader; a normal load builds the wide
+    table from the CSV together with the others. Returns the number of vehicles.
+    """
+    search = schema.SEARCH_TABLE
+    columns = TABLE_COLUMNS[search]
+    city_prices = ", ".join(
+        f"MAX(CASE WHEN city = '{city}' THEN price END) AS `{city}`" for city in CITIES
+    )
+    aliases = {"Vehicle": "v", "Engine": "e", "Transmission": "t", "Performance": "pf",
+               "Dimensions": "d", "Chassis": "c", "Features": "f"}
+    expressions = {col: f"{aliases[table]}.{col}" for table in aliases for col in TABLE_COLUMNS[table]}
+    expressions.update(vehicle_id="v.vehicle_id", base_price="v.price")
+    expressions.update({city: f"pr.`{city}`" for city in CITIES})
+    select = ", ".join(expressions[col] for col in columns)
+
+    cursor = conn.cursor()
+    tables = existing_tables(cursor)
+    cursor.execute(f"DROP TABLE IF EXISTS {search}{STAGING}")
+    cursor.execute(schema.table_ddl(search, STAGING))
+    cursor.execute(f"""
+        INSERT INTO {search}{STAGING} ({', '.join(f'`{col}`' for col in columns)})
+        SELECT {select}
+        FROM Vehicle v
+        LEFT JOIN Engine e ON v.vehicle_id = e.vehicle_id
+        LEFT JOIN Transmission t ON v.vehicle_id = t.vehicle_id
+        LEFT JOIN Performance pf ON v.vehicle_id = pf.vehicle_id
+        LEFT JOIN Dimensions d ON v.vehicle_id = d.vehicle_id
+        LEFT JOIN Chassis c ON v.vehicle_id = c.vehicle_id
+        LEFT JOIN Features f ON v.vehicle_id = f.vehicle_id
+        LEFT JOIN (SELECT vehicle_id, {city_prices} FROM Price GROUP BY vehicle_id) pr ON v.vehicle_id = pr.vehicle_id
+    """)
+    vehicles = cursor.rowcount
+    conn.commit()
+    cursor.close()
+    swap_tables(conn, [search], tables)
+    return vehicles
+
+
+def bump_version(conn, vehicles: int, source: str) -> int:
+    version = time.time_ns() // 1_000_000
+    cursor = conn.cursor()
+    cursor.execute(schema.CATALOG_META_DDL)
+    cursor.execute(
+        "INSERT INTO CatalogMeta (id, version, loaded_at, vehicles, source) VALUES (1, %s, NOW(), %s, %s) "
+        "ON DUPLICATE KEY UPDATE version = VALUES(version), loaded_at = VALUES(loaded_at), "
+        "vehicles = VALUES(vehicles), source = VALUES(source)",
+        (version, vehicles, source)
+    )
+    conn.commit()
+    cursor.close()
+    return version
+
+
+def load_catalog(conn, csv_path: str, batch_size: int = BATCH_SIZE) -> dict:
+    """Loads `csv_path` into staging, swaps it in and bumps the catalog version."""
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    tables = existing_tables(cursor)
+    known = existing_ids(cursor, tables)
+    cursor.close()
+
+    frame = assign_ids(read_catalog(csv_path), known)
+    rows = table_rows(frame)
+
+    loaded = load_staging(conn, rows, batch_size)
+    swap_in(conn, tables)
+    version = bump_version(conn, len(frame), csv_path)
+
+    elapsed = time.perf_counter() - start
+    total = sum(loaded.values())
+    return {
+        "vehicles": len(frame),
+        "new_vehicles": sum(1 for url in frame["url"] if url not in known),
+        "rows": total,
+        "seconds": elapsed,
+        "rows_per_second": total / elapsed if elapsed else float("inf"),
+        "version": version,
+        "tables": loaded,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load a cleaned catalog CSV into the normalized MySQL schema")
+    parser.add_argument("--csv", default=DEFAULT_CSV, help="Cleaned catalog (layout of data/cars_cleaned.csv)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per executemany batch")
+    parser.add_argument("--search-only", action="store_true",
+                        help=f"Only rebuild {schema.SEARCH_TABLE} from the tables already in the database")
+    args = parser.parse_args()
+
+    dotenv.load_dotenv()
+    conn = mysql.connector.connect(**db.connect_kwargs(db.ssl_ca_path()))
+    try:
+        if args.search_only:
+            vehicles = rebuild_search_table(conn)
+            version = bump_version(conn, vehicles, schema.SEARCH_TABLE)
+            print(f"Rebuilt {schema.SEARCH_TABLE} with {vehicles} vehicles; catalog version: {version}")
+            return
+        report = load_catalog(conn, args.csv, batch_size=args.batch_size)
+    finally:
+        conn.close()
+
+    print(f"Loaded {report['vehicles']} vehicles ({report['new_vehicles']} new), {report['rows']} rows "
+          f"in {report['seconds']:.2f}s ({report['rows_per_second']:,.0f} rows/s)")
+    print(f"Catalog version: {report['version']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+
+import dotenv
+import mysql.connector
+
+import db
+import schema
+
+
+def existing_columns(cursor, table: str) -> set[str]:
+    cursor.execute(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s",
+        (table,)
+    )
+    return {name for (name,) in cursor.fetchall()}
+
+
+def existing_indexes(cursor, table: str) -> set[str]:
+    cursor.execute(
+        "SELECT DISTINCT index_name FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = %s",
+        (table,)
+    )
+    return {name for (name,) in cursor.fetchall()}
+
+
+def pending_statements(cursor) -> list[str]:
+    """ALTER TABLE statements that bring the live tables up to schema.GENERATED_COLUMNS and schema.INDEXES."""
+    statements = []
+    for table in schema.LOADED_TABLES:
+        columns = existing_columns(cursor, table)
+        if not columns:
+            continue
+        indexes = existing_indexes(cursor, table)
+        changes = [
+            f"ADD COLUMN {name} {definition}"
+            for name, definition in schema.GENERATED_COLUMNS.get(table, []) if name not in columns
+        ]
+        changes += [
+            f"ADD INDEX {name} ({index_columns})"
+            for name, index_columns in schema.INDEXES.get(table, []) if name not in indexes
+        ]
+        if changes:
+            statements.append(f"ALTER TABLE {table} " + ", ".join(changes))
+    return statements
+
+
+def revert_statements(cursor) -> list[str]:
+    """The inverse of pending_statements: drops the hot-path indexes and generated columns."""
+    statements = []
+    for table in schema.LOADED_TABLES:
+        columns = existing_columns(cursor, table)
+        if not columns:
+            continue
+        indexes = existing_indexes(cursor, table)
+        changes = [f"DROP INDEX {name}" for name, _ in schema.INDEXES.get(table, []) if name in indexes]
+        changes += [f"DROP COLUMN {name}" for name, _ in schema.GENERATED_COLUMNS.get(table, []) if name in columns]
+        if changes:
+            statements.append(f"ALTER TABLE {table} " + ", ".join(changes))
+    return statements
+
+
+def migrate(conn, revert: bool = False, dry_run: bool = False) -> list[str]:
+    """
+    Applies (or reverts) the hot-path indexes on the live tables and returns the statements run.
+
+    Only missing columns and indexes are added, so running it twice is a no-op. Tables
+    created by load_catalog.py already have them, as they are part of schema.DDL.
+    """
+    cursor = conn.cursor()
+    statements = revert_statements(cursor) if revert else pending_statements(cursor)
+    if not dry_run:
+        for statement in statements:
+            cursor.execute(statement)
+        if statements and not revert:
+            cursor.execute("ANALYZE TABLE " + ", ".join(schema.LOADED_TABLES))
+            cursor.fetchall()
+    cursor.close()
+    return statements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Add the hot-path indexes to an existing CarQuest database")
+    parser.add_argument("--revert", action="store_true", help="Drop the indexes and generated columns instead")
+    parser.add_argument("--dry-run", action="store_true", help="Print the statements without running them")
+    args = parser.parse_args()
+
+    dotenv.load_dotenv()
+    conn = mysql.connector.connect(**db.connect_kwargs(db.ssl_ca_path()))
+    try:
+        statements = migrate(conn, revert=args.revert, dry_run=args.dry_run)
+    finally:
+        conn.close()
+
+    for statement in statements:
+        print(statement + ";")
+    print(f"{len(statements)} table(s) {'to change' if args.dry_run else 'changed'}")
+
+
+if __name__ == "__main__":
+    main()
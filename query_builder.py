@@ -0,0 +1,171 @@
+"""
+Placeholder SQL building blocks and a per-connection cache of prepared statements.
+
+Every query the app sends is SQL text with %s placeholders plus a parameter tuple; values
+are never interpolated into the text. Variable-length IN lists are padded to the next
+power of two (repeating the last value, which matches the same rows), so the text of a
+query depends only on its shape: which filters are set and roughly how many values each
+has. That keeps the number of distinct statements small enough to prepare each one once
+per connection (`cursor(prepared=True)`) and re-execute it with new parameters.
+"""
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import bootstrap
+import mysql
+
+bootstrap.lazy_import("mysql.connector")
+
+# --- PREPARED STATEMENT CONFIG ---
+# Set to 0 to send every query as plain text (e.g. behind a proxy without COM_STMT support).
+USE_PREPARED = os.getenv("CARQUEST_PREPARED", "1").lower() in ("1", "true", "yes")
+# Prepared statements kept open per connection; the least recently used one is closed first.
+STATEMENTS_PER_CONNECTION = int(os.getenv("CARQUEST_PREPARED_PER_CONN", "64"))
+
+
+def bucket(count: int) -> int:
+    """The padded length of an IN list of `count` values: the next power of two."""
+    size = 1
+    while size < count:
+        size *= 2
+    return size
+
+
+def in_list(values) -> tuple[str, tuple]:
+    """
+    ("%s, %s, ...", params) for an IN list of `values`, padded to its bucket size.
+
+    IN is a set-membership test, so repeating a value already in the list matches
+    exactly the same rows, only the placeholder count changes.
+    """
+    values = tuple(values)
+    if not values:
+        raise ValueError("An IN list needs at least one value")
+    padded = values + (values[-1],) * (bucket(len(values)) - len(values))
+    return ", ".join(["%s"] * len(padded)), padded
+
+
+def in_clause(column: str, values, params: list) -> str:
+    marks, padded = in_list(values)
+    params.extend(padded)
+    return f"{column} IN ({marks})"
+
+
+def between_clause(column: str, bounds, params: list) -> str:
+    params.extend(bounds)
+    return f"{column} BETWEEN %s AND %s"
+
+
+@dataclass
+class StatementStats:
+    """How often statements were prepared, re-executed, closed or re-prepared, and plain-text fallbacks."""
+    prepared: int = 0
+    reused: int = 0
+    evicted: int = 0
+    retries: int = 0
+    plain: int = 0
+
+    def as_dict(self) -> dict[str, str]:
+        executions = self.prepared + self.reused
+        return {
+            "Prepared": f"{self.prepared:,}",
+            "Re-executed": f"{self.reused:,}",
+            "Reuse rate": f"{self.reused / executions:.0%}" if executions else "-",
+            "Closed (LRU)": f"{self.evicted:,}",
+            "Re-prepared after errors": f"{self.retries:,}",
+            "Plain queries": f"{self.plain:,}",
+        }
+
+
+class StatementCache:
+    """
+    Prepared cursors per pooled connection, keyed by (SQL text, dictionary rows).
+
+    A prepared cursor keeps its statement open on the server until it is given
+    different SQL, so each distinct query shape gets its own cursor. A connection is
+    only used by one thread at a time (it is checked out of the pool), so only the
+    bookkeeping shared between connections needs the lock. Entries go away with their
+    connection.
+    """
+
+    def __init__(self, per_connection: int = STATEMENTS_PER_CONNECTION, enabled: bool = USE_PREPARED) -> None:
+        self.per_connection = per_connection
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.stats = StatementStats()
+        self._statements = weakref.WeakKeyDictionary()
+
+    def _cursor(self, conn, sql: str, dictionary: bool):
+        """(cursor, sql object it was prepared with, newly prepared?) for `sql` on `conn`."""
+        with self.lock:
+            statements = self._statements.setdefault(conn, OrderedDict())
+        key = (sql, dictionary)
+        if key in statements:
+            statements.move_to_end(key)
+            cursor, prepared_sql = statements[key]
+            return cursor, prepared_sql, False
+        cursor = conn.cursor(prepared=True, dictionary=dictionary)
+        statements[key] = (cursor, sql)
+        while len(statements) > self.per_connection:
+            _, (old_cursor, _) = statements.popitem(last=False)
+            self._close(old_cursor)
+            with self.lock:
+                self.stats.evicted += 1
+        return cursor, sql, True
+
+    @staticmethod
+    def _close(cursor) -> None:
+        try:
+            cursor.close()
+        except mysql.connector.Error:
+            pass
+
+    def _discard(self, conn, key) -> None:
+        with self.lock:
+            statements = self._statements.get(conn, {})
+        entry = statements.pop(key, None)
+        if entry is not None:
+            self._close(entry[0])
+
+    def forget(self, conn) -> None:
+        """Drops every statement of `conn`, e.g. after it reconnected and the server forgot them."""
+        with self.lock:
+            statements = self._statements.pop(conn, {})
+        for cursor, _ in statements.values():
+            self._close(cursor)
+
+    def fetch_all(self, conn, sql: str, params=(), dictionary: bool = False) -> list:
+        """Runs `sql` with `params` on `conn` and returns every row, re-using its prepared statement."""
+        if not self.enabled:
+            with self.lock:
+                self.stats.plain += 1
+            cursor = conn.cursor(dictionary=dictionary)
+            try:
+                cursor.execute(sql, tuple(params))
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+
+        cursor, prepared_sql, fresh = self._cursor(conn, sql, dictionary)
+        try:
+            # The cursor only skips re-preparing when given the very same string object.
+            cursor.execute(prepared_sql, tuple(params))
+        except mysql.connector.Error:
+            if fresh:
+                self._discard(conn, (sql, dictionary))
+                raise
+            # The statement may have been lost with a reconnect; prepare it once more.
+            self.forget(conn)
+            with self.lock:
+                self.stats.retries += 1
+            cursor, prepared_sql, fresh = self._cursor(conn, sql, dictionary)
+            cursor.execute(prepared_sql, tuple(params))
+        with self.lock:
+            if fresh:
+                self.stats.prepared += 1
+            else:
+                self.stats.reused += 1
+        return cursor.fetchall()
@@ -0,0 +1,136 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+from filters import FilterState
+
+# --- CACHE CONFIG ---
+QUERY_CACHE_SIZE = int(os.getenv("CARQUEST_QUERY_CACHE_SIZE", "256"))
+# Seconds a cached result may be served; the catalog version check clears it sooner on reloads.
+QUERY_CACHE_TTL = float(os.getenv("CARQUEST_QUERY_CACHE_TTL", "600"))
+
+
+def cache_key(state: FilterState, limit: int, backend: str = "mysql", after: tuple | None = None) -> tuple:
+    """
+    Canonical, hashable key for one Filters search (one page of it, when `after` is given).
+
+    FilterState already sorts multi-selects and normalises ranges; the variant text is
+    also lowercased because both backends match it case-insensitively. A `limit` of 0
+    keys the total count of the search.
+    """
+    if after is not None:
+        is_null, value, vehicle_id = after
+        after = (bool(is_null), None if is_null else float(value), int(vehicle_id))
+    return (backend, int(limit), replace(state, variant=state.variant.lower()), after)
+
+
+@dataclass
+class CacheStats:
+    """Hits, misses and removals of the Filters result cache; `entries` mirrors its current size."""
+    hits: int = 0
+    misses: int = 0
+    waits: int = 0
+    expirations: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    entries: int = 0
+
+    def as_dict(self) -> dict[str, str]:
+        lookups = self.hits + self.misses
+        return {
+            "Hits": f"{self.hits:,}",
+            "Misses": f"{self.misses:,}",
+            "Hit rate": f"{self.hits / lookups:.0%}" if lookups else "-",
+            "Waited on another session": f"{self.waits:,}",
+            "Expired": f"{self.expirations:,}",
+            "Evicted": f"{self.evictions:,}",
+            "Cleared by reload": f"{self.invalidations:,}",
+            "Entries": f"{self.entries:,}",
+        }
+
+
+class QueryCache:
+    """
+    A bounded LRU cache of query results with a per-entry TTL, shared by every session.
+
+    Entries belong to one catalog version: when a lookup arrives with a different
+    version, the whole cache is cleared first. Concurrent misses on the same key are
+    collapsed, so one session runs the query while the others wait for its result.
+    """
+
+    def __init__(self, maxsize: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.version = None
+        self.lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def _check_version(self, version) -> None:
+        if version != self.version:
+            if self.entries:
+                self.stats.invalidations += 1
+            self.entries.clear()
+            self.version = version
+            self.stats.entries = 0
+
+    def _lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if time.monotonic() >= expires:
+            del self.entries[key]
+            self.stats.expirations += 1
+            self.stats.entries = len(self.entries)
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def _store(self, key, value) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+        self.stats.entries = len(self.entries)
+
+    def get_or_compute(self, key, compute, version=None):
+        """Returns the cached result for `key`, running `compute()` on a miss."""
+        while True:
+            with self.lock:
+                self._check_version(version)
+                entry = self._lookup(key)
+                if entry is not None:
+                    self.stats.hits += 1
+                    return entry[1]
+                pending = self.in_flight.get(key)
+                if pending is None:
+                    pending = self.in_flight[key] = threading.Event()
+                    self.stats.misses += 1
+                    break
+                self.stats.waits += 1
+            # Another session is running this query; use its result once stored,
+            # or retry the lookup ourselves if it failed.
+            pending.wait()
+
+        try:
+            value = compute()
+            with self.lock:
+                if version == self.version:
+                    self._store(key, value)
+            return value
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            pending.set()
+
+    def clear(self) -> None:
+        with self.lock:
+            if self.entries:
+                self.stats.invalidations += 1
+            self.entries.clear()
+            self.stats.entries = 0
@@ -0,0 +1,189 @@
+import re
+
+from filters import CITIES, FilterState
+from questai import normalize_question
+
+# Rows returned for a parsed question; the LLM path has no limit of its own.
+RESULT_LIMIT = 50
+
+LAKH = 100_000
+UNIT_VALUE = {"lakh": LAKH, "crore": 100 * LAKH}
+# Upper bound for "above X" questions; higher than any price in the catalog.
+NO_MAX_PRICE = 1_000 * 100 * LAKH
+AMOUNT = r'(?:rs\.? ?|₹ ?)?(\d+(?:\.\d+)?)(?: (lakh|crore))?'
+
+# --- VOCABULARY ---
+# Brand, type, fuel and transmission words are built from the catalog's own facet values
+# (facets.FacetCatalog), so a parsed question and the same selections on the Filters page
+# run the same query. Each facet value is known by one word ("suv cars" -> "suv",
+# "electric(battery)" -> "electric"); brands keep their full name ("land rover").
+VOCABULARY_FIELDS = {"brand": "brands", "type": "types", "fuel": "fuels", "transmission": "transmissions"}
+# Other spellings of those words; an alias is only known while the catalog has its word.
+ALIASES = {
+    "brand": {"suzuki": "maruti", "mercedes": "mercedes-benz", "benz": "mercedes-benz", "vw": "volkswagen"},
+    "type": {"hatch": "hatchback", "muv": "mpv", "pickup truck": "pickup"},
+    "fuel": {"ev": "electric"},
+    "transmission": {"auto": "automatic", "amt": "automatic"},
+}
+CITY_WORDS = {city.lower(): city for city in CITIES} | {"bengaluru": "Bangalore"}
+# Words that carry no constraint. Anything not in a vocabulary or here makes the parse unsure.
+FILLER_WORDS = {
+    "a", "an", "the", "me", "show", "find", "list", "give", "get", "please", "i", "want", "need",
+    "looking", "search", "for", "some", "any", "all", "with", "in", "at", "and", "or", "of", "which",
+    "that", "are", "is", "car", "cars", "vehicle", "vehicles", "option", "options", "price", "priced",
+    "cost", "costing", "budget", "rs", "transmission", "gearbox", "fuel", "type", "variant", "variants",
+}
+
+# --- PHRASES ---
+PRICE_BETWEEN = re.compile(rf'\b(?:between |from )?{AMOUNT} (?:and|to|-) {AMOUNT}\b')
+PRICE_MAX = re.compile(rf'\b(?:under|below|less than|within|up to|upto|max|maximum|not more than|<=?) ?{AMOUNT}\b')
+PRICE_MIN = re.compile(rf'\b(?:above|over|more than|at least|min|minimum|>=?) ?{AMOUNT}\b')
+SEATER = re.compile(r'\b(\d+) ?-?(?:seaters?|seats?)\b')
+SORTS = [
+    (re.compile(r'\b(?:cheapest|lowest priced?|most affordable)\b'), "Price"),
+    (re.compile(r'\b(?:most powerful|highest bhp|most bhp)\b'), "BHP"),
+    (re.compile(r'\b(?:best mileage|highest mileage|most (?:fuel )?efficient)\b'), "Mileage"),
+]
+
+
+def _rupees(value: str, unit: str | None) -> float | None:
+    """Converts an amount to rupees; bare numbers only count when they are plainly rupees."""
+    amount = float(value)
+    if unit:
+        return amount * UNIT_VALUE[unit]
+    return amount if amount >= 10_000 else None
+
+
+def _singular(word: str) -> str:
+    return word[:-1] if len(word) > 2 and word.endswith("s") else word
+
+
+def _word(dim: str, value: str) -> str:
+    """The word a question uses for a facet value: brands by name, the rest by their first word."""
+    if dim == "brand":
+        return value.lower()
+    return _singular(re.match(r"[^\s(]*", value.lower()).group())
+
+
+class Vocabulary:
+    """
+    Words of the parser for one catalog: FilterState field -> {word: facet value}.
+
+    Built from a FacetCatalog, so new brands and types are understood as soon as the
+    catalog has them; the app keeps one per catalog version.
+    """
+
+    def __init__(self, facet) -> None:
+        self.words = {}
+        for dim, field in VOCABULARY_FIELDS.items():
+            words = {}
+            for value in facet.values[dim]:
+                words.setdefault(_word(dim, value), value)
+            for alias, word in ALIASES[dim].items():
+                if word in words:
+                    words.setdefault(alias, words[word])
+            self.words[field] = words
+        # Names of more than one word are matched as phrases before the question is split into words.
+        self.phrases = [
+            (re.compile(rf'\b{re.escape(word)}s?\b'), field, value)
+            for field, words in self.words.items()
+            for word, value in sorted(words.items(), key=lambda item: -len(item[0]))
+            if " " in word
+        ]
+
+    def lookup(self, word: str) -> tuple[str, str] | None:
+        """(FilterState field, facet value) a single word stands for, if any."""
+        for field, words in self.words.items():
+            if word in words:
+                return field, words[word]
+        return None
+
+
+def parse_question(question: str, vocabulary: Vocabulary) -> FilterState | None:
+    """
+    Parses simple filter questions ("7 seater automatic diesel SUVs under 20 lakh in Pune")
+    into a FilterState.
+
+    Returns None unless every word of the question is understood and at least one
+    constraint was found, so anything unusual still goes to the LLM.
+    """
+    text = normalize_question(question)
+    selections = {"brands": set(), "types": set(), "fuels": set(), "transmissions": set(), "seating": set()}
+    lo, hi = None, None
+
+    def consume(pattern):
+        nonlocal text
+        matches = list(pattern.finditer(text))
+        text = pattern.sub(" ", text)
+        return matches
+
+    for match in consume(SEATER):
+        selections["seating"].add(int(match.group(1)))
+    for match in consume(PRICE_BETWEEN):
+        lo_value, lo_unit, hi_value, hi_unit = match.groups()
+        # "between 10 and 20 lakh": the unit of the upper bound applies to both.
+        lo, hi = _rupees(lo_value, lo_unit or hi_unit), _rupees(hi_value, hi_unit)
+        if lo is None or hi is None:
+            return None
+    for match in consume(PRICE_MAX):
+        hi = _rupees(*match.groups())
+        if hi is None:
+            return None
+    for match in consume(PRICE_MIN):
+        lo = _rupees(*match.groups())
+        if lo is None:
+            return None
+    for pattern, sort_by in SORTS:
+        if consume(pattern):
+            selections["sort_by"] = sort_by
+    for pattern, field, value in vocabulary.phrases:
+        if consume(pattern):
+            selections[field].add(value)
+
+    for word in text.replace(",", " ").split():
+        word = word.strip(".?!")
+        # Names that end in "s" ("mercedes") are looked up before their would-be singular.
+        known = vocabulary.lookup(word) or vocabulary.lookup(_singular(word))
+        word = _singular(word)
+        if known is not None:
+            field, value = known
+            selections[field].add(value)
+        elif word in CITY_WORDS:
+            if selections.get("city") not in (None, CITY_WORDS[word]):
+                return None
+            selections["city"] = CITY_WORDS[word]
+        elif word and word not in FILLER_WORDS:
+            return None
+
+    if lo is not None or hi is not None:
+        selections["price_range"] = (lo or 0, hi if hi is not None else NO_MAX_PRICE)
+    if not any(selections.get(name) for name in ("brands", "types", "fuels", "transmissions", "seating", "city", "price_range")):
+        return None
+    return FilterState.create(**selections)
+
+
+def describe(state: FilterState) -> str:
+    """Short human-readable summary of a parsed question, shown above its results."""
+    parts = []
+    if state.brands:
+        parts.append(" / ".join(state.brands))
+    if state.types:
+        parts.append(" / ".join(state.types))
+    if state.fuels:
+        parts.append(" / ".join(state.fuels))
+    if state.transmissions:
+        parts.append(" / ".join(state.transmissions))
+    if state.seating:
+        parts.append(" / ".join(f"{s} seater" for s in state.seating))
+    if state.price_range is not None:
+        lo, hi = state.price_range
+        if hi >= NO_MAX_PRICE:
+            parts.append(f"above ₹{lo / LAKH:g} lakh")
+        elif lo:
+            parts.append(f"₹{lo / LAKH:g}–{hi / LAKH:g} lakh")
+        else:
+            parts.append(f"under ₹{hi / LAKH:g} lakh")
+    if state.city:
+        parts.append(f"in {state.city}")
+    parts.append(f"sorted by {state.sort_by}")
+    return ", ".join(parts)
@@ -0,0 +1,320 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+
+# --- QUESTAI CONFIG ---
+GEMINI_MODEL = "gemini-1.5-flash"
+SQL_CACHE_PATH = os.getenv("CARQUEST_SQL_CACHE", os.path.join("data", "questai_cache.sqlite"))
+SQL_CACHE_SIZE = int(os.getenv("CARQUEST_SQL_CACHE_SIZE", "1000"))
+# Minimum token-set (Jaccard) similarity for a fuzzy hit; 0 disables fuzzy matching.
+SQL_CACHE_FUZZY = float(os.getenv("CARQUEST_SQL_CACHE_FUZZY", "0.8"))
+
+# --- PROMPT ---
+# The schema text never changes, so the prompt is built once; only the question is appended per call.
+SCHEMA_PROMPT = '''
+You are an expert SQL generator specializing in vehicle databases. Translate the following natural language query into MySQL queries using the provided schema.
+
+Database: defaultdb
+
+Schema definitions
+# Vehicle table (basic info)
+create_vehicle_table = """
+CREATE TABLE IF NOT EXISTS Vehicle (
+  vehicle_id INT AUTO_INCREMENT PRIMARY KEY,
+  brand VARCHAR(50) NOT NULL,
+  model VARCHAR(50) NOT NULL,
+  variant VARCHAR(255),
+  type VARCHAR(50),
+  price DECIMAL(20,2),
+  url VARCHAR(255),
+  image_link VARCHAR(255)
+);
+"""
+
+# Engine table (engine details)
+create_engine_table = """
+CREATE TABLE IF NOT EXISTS Engine (
+  engine_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  fuel VARCHAR(20),
+  displacement INT,
+  no_of_cylinders FLOAT,
+  bhp_value INT,
+  bhp_rpm FLOAT,
+  torque_value FLOAT,
+  torque_rpm FLOAT,
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
+);
+"""
+
+# Transmission table (transmission details)
+create_transmission_table = """
+CREATE TABLE IF NOT EXISTS Transmission (
+  transmission_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  transmission VARCHAR(50),
+  gearbox INT,
+  drive_type VARCHAR(50),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
+);
+"""
+
+# Performance table (mileage and capacity)
+create_performance_table = """
+CREATE TABLE IF NOT EXISTS Performance (
+  performance_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  mileage FLOAT,
+  capacity FLOAT,
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
+);
+"""
+
+# Dimensions table (boot space, seating capacity, wheel base)
+create_dimensions_table = """
+CREATE TABLE IF NOT EXISTS Dimensions (
+  dimension_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  boot_space FLOAT,
+  seating_capacity INT,
+  wheel_base FLOAT,
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
+);
+"""
+
+# Chassis table (brakes and tyre details)
+create_chassis_table = """
+CREATE TABLE IF NOT EXISTS Chassis (
+  chassis_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  front_brake VARCHAR(50),
+  rear_brake VARCHAR(50),
+  tyre_size VARCHAR(50),
+  tyre_type VARCHAR(50),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
+);
+"""
+
+# Features table (additional features as booleans and extras)
+create_features_table = """
+CREATE TABLE IF NOT EXISTS Features (
+  feature_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  cruise_control BOOLEAN,
+  parking_sensors VARCHAR(20),
+  keyLess_entry BOOLEAN,
+  engine_start_stop_button BOOLEAN,
+  LED_headlamps BOOLEAN,
+  no_of_airbags INT,
+  rear_camera BOOLEAN,
+  hill_assist BOOLEAN,
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
+);
+"""
+
+# Price table (separate table for per-city prices)
+create_price_table = """
+CREATE TABLE IF NOT EXISTS Price (
+  price_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  city VARCHAR(50) NOT NULL,
+  price DECIMAL(20,2),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle(vehicle_id)
+);
+
+
+Now convert the following query to SQL:
+'''
+# Cached SQL is only reused for the prompt that produced it.
+PROMPT_VERSION = hashlib.sha256(SCHEMA_PROMPT.encode("utf-8")).hexdigest()[:16]
+
+
+def build_prompt(question: str) -> str:
+    return f'{SCHEMA_PROMPT}"{question}"\n'
+
+
+def extract_sql(text: str) -> str:
+    """Pulls the statement out of a ```sql fenced reply; unfenced replies are returned as-is."""
+    return text.split('```')[1][4:] if '```sql' in text else text
+
+
+def gemini_model(api_key: str | None = None):
+    """The Gemini model used by QuestAI; imported here so tests can run without the SDK."""
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key if api_key is not None else os.getenv("PPI"))
+    return genai.GenerativeModel(GEMINI_MODEL)
+
+
+# --- QUESTION NORMALISATION ---
+NUMBER = re.compile(r'\d[\d,]*(?:\.\d+)?')
+# "10 lakhs", "10lac", "10 l" -> "10 lakh"; "1.5 crores", "1.5cr" -> "1.5 crore".
+UNITS = [
+    (re.compile(r'(\d)\s*(?:lakhs?|lacs?|l)\b'), r'\1 lakh'),
+    (re.compile(r'(\d)\s*(?:crores?|cr)\b'), r'\1 crore'),
+]
+TOKEN = re.compile(r'[a-z0-9.]+')
+# Words that do not change what is being asked for; ignored by fuzzy matching only.
+STOPWORDS = {
+    "a", "an", "the", "me", "show", "find", "list", "give", "get", "please", "i", "want",
+    "need", "looking", "for", "some", "any", "all", "of", "that", "which", "is", "are", "car", "cars",
+}
+
+
+def _canonical_number(match: re.Match) -> str:
+    value = float(match.group(0).replace(",", ""))
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def normalize_question(question: str) -> str:
+    """
+    Lowercases, collapses whitespace and canonicalises numbers and price units, so that
+    "SUVs under 10 Lakhs" and "suvs  under 10.0 lakh" share one cache entry.
+    """
+    text = " ".join(question.lower().split())
+    text = NUMBER.sub(_canonical_number, text)
+    for pattern, replacement in UNITS:
+        text = pattern.sub(replacement, text)
+    return text.strip(" ?.!")
+
+
+def question_tokens(normalized: str) -> tuple[frozenset, tuple]:
+    """(word set, sorted numbers) of a normalised question, for fuzzy matching."""
+    words, numbers = set(), []
+    for token in TOKEN.findall(normalized):
+        if NUMBER.fullmatch(token):
+            numbers.append(token)
+        elif token not in STOPWORDS:
+            # Crude plural folding: "suvs" and "suv" are the same ask.
+            words.add(token[:-1] if len(token) > 3 and token.endswith("s") else token)
+    return frozenset(words), tuple(sorted(numbers))
+
+
+# --- SQL CACHE ---
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (
+  question TEXT NOT NULL,
+  prompt_version TEXT NOT NULL,
+  words TEXT NOT NULL,
+  numbers TEXT NOT NULL,
+  sql TEXT NOT NULL,
+  created_at REAL NOT NULL,
+  last_used REAL NOT NULL,
+  hits INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (question, prompt_version)
+);
+CREATE INDEX IF NOT EXISTS questions_last_used ON questions (last_used);
+"""
+
+
+class SqlCache:
+    """
+    Persistent cache of generated SQL, keyed by normalised question and stored in SQLite.
+
+    Exact matches are looked up by key. Optionally, a question whose word set is close
+    enough to a cached one (Jaccard similarity >= `fuzzy`) reuses that entry, but only
+    when both contain exactly the same numbers, so "under 10 lakh" never answers
+    "under 20 lakh". The least recently used entries are evicted beyond `maxsize`.
+    """
+
+    def __init__(self, path: str = SQL_CACHE_PATH, maxsize: int = SQL_CACHE_SIZE, fuzzy: float = SQL_CACHE_FUZZY) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self.fuzzy = fuzzy
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        # In-memory token index of the cached questions: question -> (words, numbers).
+        rows = self.conn.execute(
+            "SELECT question, words, numbers FROM questions WHERE prompt_version = ?", (PROMPT_VERSION,)
+        ).fetchall()
+        self.index = {q: (frozenset(w.split()), tuple(n.split())) for q, w, n in rows}
+
+    def _similar(self, words: frozenset, numbers: tuple) -> str | None:
+        best, best_score = None, self.fuzzy
+        for question, (cached_words, cached_numbers) in self.index.items():
+            if cached_numbers != numbers:
+                continue
+            union = len(words | cached_words)
+            score = len(words & cached_words) / union if union else 1.0
+            if score >= best_score:
+                best, best_score = question, score
+        return best
+
+    def lookup(self, question: str) -> tuple[str | None, str | None]:
+        """Returns (sql, match) where match is 'exact', 'fuzzy' or None on a miss."""
+        key = normalize_question(question)
+        with self.lock:
+            match = "exact" if key in self.index else None
+            if match is None and self.fuzzy > 0:
+                key = self._similar(*question_tokens(key))
+                match = "fuzzy" if key is not None else None
+            if match is None:
+                return None, None
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE questions SET last_used = ?, hits = hits + 1 WHERE question = ? AND prompt_version = ?",
+                    (time.time(), key, PROMPT_VERSION)
+                )
+                row = self.conn.execute(
+                    "SELECT sql FROM questions WHERE question = ? AND prompt_version = ?", (key, PROMPT_VERSION)
+                ).fetchone()
+        return (row[0], match) if row else (None, None)
+
+    def store(self, question: str, sql: str) -> None:
+        key = normalize_question(question)
+        words, numbers = question_tokens(key)
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO questions (question, prompt_version, words, numbers, sql, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(question, prompt_version) DO UPDATE SET sql = excluded.sql, last_used = excluded.last_used
+                """,
+                (key, PROMPT_VERSION, " ".join(sorted(words)), " ".join(numbers), sql, now, now)
+            )
+            self.index[key] = (words, numbers)
+            self._evict()
+
+    def _evict(self) -> None:
+        (count,) = self.conn.execute("SELECT COUNT(*) FROM questions").fetchone()
+        if count <= self.maxsize:
+            return
+        evicted = self.conn.execute(
+            "SELECT question, prompt_version FROM questions ORDER BY last_used LIMIT ?", (count - self.maxsize,)
+        ).fetchall()
+        self.conn.executemany("DELETE FROM questions WHERE question = ? AND prompt_version = ?", evicted)
+        for question, version in evicted:
+            if version == PROMPT_VERSION:
+                self.index.pop(question, None)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+def convert_to_sql(user_query: str, get_model, cache: SqlCache | None = None) -> tuple[str, str]:
+    """
+    Translates a question into SQL, returning (sql, source).
+
+    `source` is 'cache' or 'fuzzy' when the SQL came from `cache`, and 'llm' when the
+    model had to be asked. `get_model` is called only then; it may return Gemini or
+    any stand-in whose generate_content() returns something with a `.text`.
+    """
+    if cache is not None:
+        sql, match = cache.lookup(user_query)
+        if sql is not None:
+            return sql, "cache" if match == "exact" else "fuzzy"
+
+    response = get_model().generate_content(build_prompt(user_query))
+    sql = extract_sql(response.text)
+    if cache is not None:
+        cache.store(user_query, sql)
+    return sql, "llm"
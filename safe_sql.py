@@ -0,0 +1,172 @@
+import os
+import re
+from dataclasses import dataclass, field
+
+# --- GUARDRAIL CONFIG ---
+# Most rows a generated query may return to the page.
+MAX_ROWS = int(os.getenv("CARQUEST_SQL_MAX_ROWS", "1000"))
+# Largest EXPLAIN row estimate (rows examined across the join) a generated query may have.
+ROW_BUDGET = int(os.getenv("CARQUEST_SQL_ROW_BUDGET", "1000000"))
+# Server-side time limit for a generated query, in milliseconds.
+MAX_EXECUTION_MS = int(os.getenv("CARQUEST_SQL_TIMEOUT_MS", "5000"))
+FETCH_BATCH = 200
+
+# Quoted strings and identifiers, comments, and everything else, in one left-to-right scan.
+TOKENS = re.compile(r"""
+    (?P<string>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`(?:[^`]|``)*`)
+  | (?P<comment>--(?:[ \t][^\n]*)?(?=\n|$)|\#[^\n]*|/\*.*?\*/)
+  | (?P<other>[^'"`#/-]+|.)
+""", re.S | re.X)
+FORBIDDEN = re.compile(
+    r"\b(?:INSERT|UPDATE|DELETE|DROP|ALTER|CREATE|RENAME|TRUNCATE|GRANT|REVOKE|"
+    r"CALL|DO|HANDLER|LOAD|LOCK|UNLOCK|SET|INTO|OUTFILE|DUMPFILE|SHARE|"
+    r"SLEEP|BENCHMARK|GET_LOCK|RELEASE_LOCK|LOAD_FILE)\b|\bFOR\s+UPDATE\b",
+    re.I
+)
+TRAILING_LIMIT = re.compile(r"\bLIMIT\s+(\d+)(?:\s*,\s*(\d+)|\s+OFFSET\s+(\d+))?\s*$", re.I)
+
+
+class UnsafeQuery(ValueError):
+    """A generated statement that the guardrails refuse to run."""
+
+
+class QueryTooExpensive(UnsafeQuery):
+    """A SELECT whose EXPLAIN estimate is above the row budget."""
+
+
+@dataclass
+class SafeResult:
+    rows: list[dict] = field(default_factory=list)
+    truncated: bool = False
+    estimated_rows: float = 0.0
+    sql: str = ""
+
+
+def _pieces(sql: str) -> list[tuple[str, str]]:
+    """(kind, text) pieces of `sql` with comments dropped, so hidden statements cannot hide in them."""
+    return [(match.lastgroup, match.group()) for match in TOKENS.finditer(sql) if match.lastgroup != "comment"]
+
+
+def _main_select_end(pieces: list[tuple[str, str]]) -> int | None:
+    """Offset just after the first SELECT keyword outside any parentheses (skips CTE bodies)."""
+    offset, depth = 0, 0
+    for kind, text in pieces:
+        if kind == "other":
+            for match in re.finditer(r"[()]|\bSELECT\b", text, re.I):
+                token = match.group()
+                if token == "(":
+                    depth += 1
+                elif token == ")":
+                    depth -= 1
+                elif depth == 0:
+                    return offset + match.end()
+        offset += len(text)
+    return None
+
+
+def prepare_select(sql: str, max_rows: int = MAX_ROWS, max_execution_ms: int = MAX_EXECUTION_MS) -> str:
+    """
+    Validates a generated statement and returns the SQL that will actually run.
+
+    Only a single SELECT (optionally with a WITH clause) is accepted; comments are
+    removed. A missing or larger LIMIT is replaced with `max_rows + 1` (the extra row
+    tells the caller the result was cut), and a MAX_EXECUTION_TIME hint is added.
+    """
+    pieces = _pieces(sql)
+    text = "".join(piece for _, piece in pieces).strip()
+    # Code with literals blanked out; keyword checks must not trip on e.g. 'Drop-top'.
+    code = "".join(piece if kind != "string" else "''" for kind, piece in _pieces(text))
+
+    while code.rstrip().endswith(";"):
+        code = code.rstrip()[:-1]
+        text = text.rstrip()[:-1]
+    if ";" in code:
+        raise UnsafeQuery("Only a single statement can be run.")
+    if not re.match(r"\s*(?:SELECT|WITH)\b", code, re.I):
+        raise UnsafeQuery("Only SELECT queries can be run.")
+    forbidden = FORBIDDEN.search(code)
+    if forbidden:
+        raise UnsafeQuery(f"'{forbidden.group().upper()}' is not allowed in generated queries.")
+
+    cap = max_rows + 1
+    limit = TRAILING_LIMIT.search(code)
+    if limit is None:
+        text = f"{text}\nLIMIT {cap}"
+    else:
+        # "LIMIT n", "LIMIT offset, n" and "LIMIT n OFFSET m" all end with the row count where we put it.
+        count, offset = (limit.group(2), limit.group(1)) if limit.group(2) else (limit.group(1), limit.group(3))
+        if int(count) > cap:
+            clause = f"LIMIT {cap}" + (f" OFFSET {offset}" if offset else "")
+            # Literals were blanked in `code`, so cut `text` at the same distance from the end.
+            text = text[:len(text) - (len(code) - limit.start())] + clause
+
+    select_end = _main_select_end(_pieces(text))
+    if select_end is None:
+        raise UnsafeQuery("Only SELECT queries can be run.")
+    return f"{text[:select_end]} /*+ MAX_EXECUTION_TIME({int(max_execution_ms)}) */{text[select_end:]}"
+
+
+def estimate_rows(cursor, sql: str) -> float:
+    """
+    Rows MySQL expects to examine, from EXPLAIN.
+
+    Plan rows of one SELECT are joined with nested loops, so their estimates multiply;
+    separate SELECTs (subqueries, UNION parts) add up. The UNION RESULT row (no id) only
+    reads back the parts' rows and is not counted.
+    """
+    cursor.execute(f"EXPLAIN {sql}")
+    columns = [c[0].lower() for c in cursor.description]
+    per_select = {}
+    for row in cursor.fetchall():
+        plan = dict(zip(columns, row))
+        if plan.get("id") is None:
+            continue
+        rows = float(plan.get("rows") or 1)
+        per_select[plan.get("id")] = per_select.get(plan.get("id"), 1.0) * max(rows, 1.0)
+    return sum(per_select.values())
+
+
+def run_select(
+    conn,
+    sql: str,
+    max_rows: int = MAX_ROWS,
+    row_budget: int = ROW_BUDGET,
+    max_execution_ms: int = MAX_EXECUTION_MS
+) -> SafeResult:
+    """
+    Runs a generated SELECT within the guardrails and returns at most `max_rows` rows.
+
+    Raises UnsafeQuery for anything but a single SELECT and QueryTooExpensive when the
+    plan is over budget, before any rows are read. Rows are streamed with fetchmany,
+    and the server aborts the query once it runs longer than `max_execution_ms`.
+    """
+    final_sql = prepare_select(sql, max_rows=max_rows, max_execution_ms=max_execution_ms)
+
+    cursor = conn.cursor()
+    try:
+        estimated = estimate_rows(cursor, final_sql)
+    finally:
+        cursor.close()
+    if estimated > row_budget:
+        raise QueryTooExpensive(
+            f"This query would examine about {estimated:,.0f} rows (limit {row_budget:,}). Try a narrower question."
+        )
+
+    result = SafeResult(estimated_rows=estimated, sql=final_sql)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(final_sql)
+        while len(result.rows) <= max_rows:
+            batch = cursor.fetchmany(FETCH_BATCH)
+            if not batch:
+                break
+            result.rows.extend(batch)
+        # The LIMIT is max_rows + 1, so at most one row is ever left unread.
+        cursor.fetchall()
+    finally:
+        cursor.close()
+
+    if len(result.rows) > max_rows:
+        result.rows = result.rows[:max_rows]
+        result.truncated = True
+    return result
@@ -0,0 +1,225 @@
+# --- CATALOG SCHEMA ---
+# The normalized tables described to QuestAI, in dependency order (Vehicle first).
+# `{s}` is the table-name suffix, so the same DDL builds the live tables and the
+# `_staging` copies the loader fills before swapping them in.
+
+from filters import CITIES
+
+TABLES = ["Vehicle", "Engine", "Transmission", "Performance", "Dimensions", "Chassis", "Features", "Price"]
+# One row per vehicle with every spec and a price column per city, precomputed from the
+# tables above so detail cards, Filters and Compare read a single table.
+SEARCH_TABLE = "vehicle_search"
+# Everything load_catalog.py stages and swaps in together.
+LOADED_TABLES = TABLES + [SEARCH_TABLE]
+
+DDL = {
+    "Vehicle": """
+CREATE TABLE IF NOT EXISTS Vehicle{s} (
+  vehicle_id INT AUTO_INCREMENT PRIMARY KEY,
+  brand VARCHAR(50) NOT NULL,
+  model VARCHAR(50) NOT NULL,
+  variant VARCHAR(255),
+  type VARCHAR(50),
+  price DECIMAL(20,2),
+  url VARCHAR(255),
+  image_link VARCHAR(255),
+  UNIQUE KEY uq_vehicle_url (url)
+)
+""",
+    "Engine": """
+CREATE TABLE IF NOT EXISTS Engine{s} (
+  engine_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  fuel VARCHAR(20),
+  displacement INT,
+  no_of_cylinders FLOAT,
+  bhp_value INT,
+  bhp_rpm FLOAT,
+  torque_value FLOAT,
+  torque_rpm FLOAT,
+  UNIQUE KEY uq_engine_vehicle (vehicle_id),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle{s}(vehicle_id)
+)
+""",
+    "Transmission": """
+CREATE TABLE IF NOT EXISTS Transmission{s} (
+  transmission_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  transmission VARCHAR(50),
+  gearbox INT,
+  drive_type VARCHAR(50),
+  UNIQUE KEY uq_transmission_vehicle (vehicle_id),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle{s}(vehicle_id)
+)
+""",
+    "Performance": """
+CREATE TABLE IF NOT EXISTS Performance{s} (
+  performance_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  mileage FLOAT,
+  capacity FLOAT,
+  UNIQUE KEY uq_performance_vehicle (vehicle_id),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle{s}(vehicle_id)
+)
+""",
+    "Dimensions": """
+CREATE TABLE IF NOT EXISTS Dimensions{s} (
+  dimension_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  boot_space FLOAT,
+  seating_capacity INT,
+  wheel_base FLOAT,
+  UNIQUE KEY uq_dimensions_vehicle (vehicle_id),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle{s}(vehicle_id)
+)
+""",
+    "Chassis": """
+CREATE TABLE IF NOT EXISTS Chassis{s} (
+  chassis_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  front_brake VARCHAR(50),
+  rear_brake VARCHAR(50),
+  tyre_size VARCHAR(50),
+  tyre_type VARCHAR(50),
+  UNIQUE KEY uq_chassis_vehicle (vehicle_id),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle{s}(vehicle_id)
+)
+""",
+    "Features": """
+CREATE TABLE IF NOT EXISTS Features{s} (
+  feature_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  cruise_control BOOLEAN,
+  parking_sensors VARCHAR(20),
+  keyLess_entry BOOLEAN,
+  engine_start_stop_button BOOLEAN,
+  LED_headlamps BOOLEAN,
+  no_of_airbags INT,
+  rear_camera BOOLEAN,
+  hill_assist BOOLEAN,
+  UNIQUE KEY uq_features_vehicle (vehicle_id),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle{s}(vehicle_id)
+)
+""",
+    "Price": """
+CREATE TABLE IF NOT EXISTS Price{s} (
+  price_id INT AUTO_INCREMENT PRIMARY KEY,
+  vehicle_id INT NOT NULL,
+  city VARCHAR(50) NOT NULL,
+  price DECIMAL(20,2),
+  UNIQUE KEY uq_price_vehicle_city (vehicle_id, city),
+  FOREIGN KEY (vehicle_id) REFERENCES Vehicle{s}(vehicle_id)
+)
+""",
+    "vehicle_search": """
+CREATE TABLE IF NOT EXISTS vehicle_search{s} (
+  vehicle_id INT PRIMARY KEY,
+  brand VARCHAR(50) NOT NULL,
+  model VARCHAR(50) NOT NULL,
+  variant VARCHAR(255),
+  type VARCHAR(50),
+  base_price DECIMAL(20,2),
+  url VARCHAR(255),
+  image_link VARCHAR(255),
+  fuel VARCHAR(20),
+  displacement INT,
+  no_of_cylinders FLOAT,
+  bhp_value INT,
+  bhp_rpm FLOAT,
+  torque_value FLOAT,
+  torque_rpm FLOAT,
+  transmission VARCHAR(50),
+  gearbox INT,
+  drive_type VARCHAR(50),
+  mileage FLOAT,
+  capacity FLOAT,
+  boot_space FLOAT,
+  seating_capacity INT,
+  wheel_base FLOAT,
+  front_brake VARCHAR(50),
+  rear_brake VARCHAR(50),
+  tyre_size VARCHAR(50),
+  tyre_type VARCHAR(50),
+  cruise_control BOOLEAN,
+  parking_sensors VARCHAR(20),
+  keyLess_entry BOOLEAN,
+  engine_start_stop_button BOOLEAN,
+  LED_headlamps BOOLEAN,
+  no_of_airbags INT,
+  rear_camera BOOLEAN,
+  hill_assist BOOLEAN,
+  {city_columns}
+)
+""",
+}
+
+# --- HOT-PATH INDEXES ---
+# Lowercased copies of the Compare lookup columns. The optimizer matches
+# `LOWER(brand) = LOWER(%s)` against these virtual columns, so their index is used
+# without rewriting the query.
+GENERATED_COLUMNS = {
+    "Vehicle": [
+        ("brand_lc", "VARCHAR(50) AS (LOWER(brand)) VIRTUAL"),
+        ("model_lc", "VARCHAR(50) AS (LOWER(model)) VIRTUAL"),
+    ],
+    "vehicle_search": [
+        ("brand_lc", "VARCHAR(50) AS (LOWER(brand)) VIRTUAL"),
+        ("model_lc", "VARCHAR(50) AS (LOWER(model)) VIRTUAL"),
+    ],
+}
+# Secondary indexes for the Filters, Compare and detail query shapes, per table.
+INDEXES = {
+    "Vehicle": [
+        ("idx_vehicle_brand_model", "brand, model"),
+        ("idx_vehicle_brand_model_lc", "brand_lc, model_lc"),
+        ("idx_vehicle_type", "type"),
+        ("idx_vehicle_variant", "variant"),
+        ("idx_vehicle_price", "price"),
+    ],
+    "Engine": [
+        ("idx_engine_fuel_bhp", "fuel, bhp_value"),
+        ("idx_engine_bhp", "bhp_value"),
+        ("idx_engine_displacement", "displacement"),
+    ],
+    "Transmission": [("idx_transmission_transmission", "transmission")],
+    "Performance": [("idx_performance_mileage", "mileage")],
+    "Dimensions": [("idx_dimensions_seating", "seating_capacity")],
+    # City plus a price range is the Filters page's main predicate; vehicle_id makes it covering.
+    "Price": [("idx_price_city_price", "city, price, vehicle_id")],
+    # Every city price is its own column, so each gets the index Price(city, price) provided.
+    "vehicle_search": [
+        ("idx_search_brand_model_lc", "brand_lc, model_lc"),
+        ("idx_search_variant", "variant"),
+        ("idx_search_type", "type"),
+        ("idx_search_base_price", "base_price"),
+        ("idx_search_bhp", "bhp_value"),
+    ] + [(f"idx_search_price_{city.lower()}", f"`{city}`") for city in CITIES],
+}
+
+# Single-row table whose version changes on every catalog reload; caches key on it.
+CATALOG_META_DDL = """
+CREATE TABLE IF NOT EXISTS CatalogMeta (
+  id TINYINT PRIMARY KEY,
+  version BIGINT NOT NULL,
+  loaded_at DATETIME NOT NULL,
+  vehicles INT NOT NULL,
+  source VARCHAR(255)
+)
+"""
+
+
+def table_ddl(table: str, suffix: str = "") -> str:
+    """CREATE TABLE statement for one table, including its generated columns and indexes."""
+    extras = [f"{name} {definition}" for name, definition in GENERATED_COLUMNS.get(table, [])]
+    extras += [f"KEY {name} ({columns})" for name, columns in INDEXES.get(table, [])]
+    city_columns = ",\n  ".join(f"`{city}` DECIMAL(20,2)" for city in CITIES)
+    ddl = DDL[table].format(s=suffix, city_columns=city_columns).rstrip()
+    if not extras:
+        return ddl
+    # Every template ends with the closing parenthesis of the column list.
+    return ddl[:-1].rstrip() + ",\n  " + ",\n  ".join(extras) + "\n)"
+
+
+def create_table_statements(suffix: str = "") -> list[str]:
+    """CREATE TABLE statements for every loaded table, parents before children."""
+    return [table_ddl(table, suffix) for table in LOADED_TABLES]
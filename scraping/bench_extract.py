@@ -0,0 +1,76 @@
+import json
+import time
+import random
+import argparse
+import fetch_data
+
+HTML_FILE = "data/html_selected.html"
+
+
+def synthetic_state(variants: int) -> dict:
+    """An __INITIAL_STATE__-shaped object with strings that contain braces and '};'."""
+    items = [
+        {"text": f"Spec {i}", "value": f"{random.randint(1, 9999)} units {{approx}};", "icon": "x" * 40}
+        for i in range(40)
+    ]
+    return {
+        "dataLayer": [{"oemName": "Maruti", "modelName": "Dzire", "variantName": "LXI",
+                       "vehicleSegment": "Sedan Cars", "price_segment": "679000", "fuel_type": "Petrol"}],
+        "data": {"specs": {
+            "specification": [{"items": items} for _ in range(4)],
+            "featured": [{"items": items} for _ in range(4)],
+        }},
+        "variantTable": {"variantList": [
+            {"dcbDto": {"modelName": "Maruti Dzire", "carVariantId": f"Variant {i}", "note": "quote \" and brace }"}}
+            for i in range(variants)
+        ]},
+    }
+
+
+def build_page(shell: str, state: dict, filler_scripts: int) -> str:
+    """Embeds the state script among other scripts, the way cardekho pages are laid out."""
+    scripts = "\n".join(f"<script>var block{i} = {{a: {i}}};</script>" for i in range(filler_scripts))
+    return (
+        f"<html><head>{scripts}</head><body>{shell}"
+        f"<script>window.__INITIAL_STATE__ = {json.dumps(state)};</script>"
+        f"{scripts}</body></html>"
+    )
+
+
+def bench(label: str, func, page, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(page)
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"  {label:<28} {elapsed:9.3f} ms/page")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare __INITIAL_STATE__ extraction paths")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with open(HTML_FILE, 'r', encoding='utf-8') as file:
+        shell = file.read()
+
+    cases = {
+        "saved page + small state": (shell, synthetic_state(5), 20),
+        "saved page + large state": (shell, synthetic_state(200), 20),
+        "synthetic, many scripts": ("<div>" * 500, synthetic_state(50), 400),
+    }
+
+    print(f"JSON backend: {'orjson' if fetch_data.orjson is not None else 'json'}")
+    for name, (body, state, filler_scripts) in cases.items():
+        page = build_page(body, state, filler_scripts)
+        page_bytes = page.encode('utf-8')
+        # The old path splits on '};' and gives up on these strings; the scanner must not.
+        assert fetch_data.extract_initial_state(page_bytes) == state
+        print(f"{name} ({len(page_bytes) / 1024:.0f} KB)")
+        soup = bench("BeautifulSoup (old path)", fetch_data.extract_initial_state_soup, page, args.repeat)
+        fast = bench("marker + brace scanner", fetch_data.extract_initial_state, page_bytes, args.repeat)
+        print(f"  speed-up: {soup / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
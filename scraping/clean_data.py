@@ -0,0 +1,209 @@
+import os
+import argparse
+import pandas as pd
+
+RAW_FILE = os.path.join("data", "car_details.csv")
+CLEAN_FILE = os.path.join("data", "cars_cleaned.csv")
+CHUNK_SIZE = 50_000
+
+CITIES = ["Ahmedabad", "Bangalore", "Chandigarh", "Chennai", "Hyderabad",
+          "Jaipur", "Lucknow", "Mumbai", "Patna", "Pune"]
+
+# A leading number, e.g. "24.79 kmpl", "1197 cc", "382 Litres".
+LEADING_NUMBER = r'^\s*(\d+(?:\.\d+)?)'
+# "80bhp@5700rpm", "375.48bhp@5200-6250rpm", "98nm@3000rpm" (unit case varies; the rpm part is optional).
+POWER_PATTERN = r'(?i)^\s*(?P<value>\d+(?:\.\d+)?)\s*bhp(?:\s*@\s*(?P<rpm>\d+(?:\.\d+)?))?'
+TORQUE_PATTERN = r'(?i)^\s*(?P<value>\d+(?:\.\d+)?)\s*Nm(?:\s*@\s*(?P<rpm>\d+(?:\.\d+)?))?'
+# Only a plain "5-Speed" is a gear count; "5-Speed AMT", "CVT" etc. are not.
+GEARBOX_PATTERN = r'^(\d+)-Speed$'
+
+# Columns whose only meaningful value is "Yes"; "Not Available" and blanks mean False.
+BOOLEAN_COLUMNS = [
+    'cruise_control', 'keyLess_entry', 'engine_start_stop_button',
+    'LED_headlamps', 'rear_camera', 'hill_assist',
+]
+UNIT_COLUMNS = ['mileage', 'capacity', 'boot_space', 'wheel_base']
+COUNT_COLUMNS = ['no_of_cylinders', 'seating_capacity', 'no_of_airbags']
+CATEGORY_COLUMNS = ['brand', 'type', 'fuel', 'transmission', 'drive_type']
+TEXT_COLUMNS = ['model', 'variant', 'front_brake', 'rear_brake', 'parking_sensors', 'tyre_size', 'tyre_type', 'url']
+
+# Output schema, in the column order of data/cars_cleaned.csv.
+OUTPUT_DTYPES = {
+    'brand': 'category',
+    'model': 'string',
+    'variant': 'string',
+    'type': 'category',
+    'price': 'Int64',
+    'fuel': 'category',
+    'displacement': 'int64',
+    'no_of_cylinders': 'float64',
+    'transmission': 'category',
+    'gearbox': 'int64',
+    'drive_type': 'category',
+    'mileage': 'float64',
+    'capacity': 'float64',
+    'front_brake': 'string',
+    'rear_brake': 'string',
+    'boot_space': 'float64',
+    'seating_capacity': 'float64',
+    'wheel_base': 'float64',
+    'cruise_control': 'bool',
+    'parking_sensors': 'string',
+    'keyLess_entry': 'bool',
+    'engine_start_stop_button': 'bool',
+    'tyre_size': 'string',
+    'tyre_type': 'string',
+    'LED_headlamps': 'bool',
+    'no_of_airbags': 'float64',
+    'rear_camera': 'bool',
+    'hill_assist': 'bool',
+    'url': 'string',
+    'bhp_value': 'int64',
+    'bhp_rpm': 'float64',
+    'torque_value': 'float64',
+    'torque_rpm': 'float64',
+}
+# Raw scrape columns the cleaning reads; everything else (ground_clearance, NCAP_rating, ...) is dropped.
+RAW_COLUMNS = (
+    CATEGORY_COLUMNS + TEXT_COLUMNS + UNIT_COLUMNS + COUNT_COLUMNS + BOOLEAN_COLUMNS
+    + ['price', 'displacement', 'gearbox', 'bhp', 'torque']
+)
+# Rows missing any of these cannot be used by the app and are rejected.
+REQUIRED_COLUMNS = ['brand', 'model', 'variant', 'url', 'price', 'bhp_value']
+# Sentinel used by cars_cleaned.csv for integer columns that could not be parsed.
+MISSING_INT = -1
+
+
+def _number(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series.str.extract(LEADING_NUMBER, expand=False), errors='coerce')
+
+
+def clean_chunk(raw: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, int]:
+    """
+    Cleans one chunk of raw scraped rows with vectorised string operations.
+
+    Returns the cleaned rows, a per-column report and the number of rows rejected for
+    missing a required column. The report counts, per output column, the input nulls,
+    the rejects (a value was present but did not match the column's pattern) and the
+    nulls left in the rows that were kept.
+    """
+    raw = raw.rename(columns={'engine_start/stop_button': 'engine_start_stop_button'})
+    text = raw.reindex(columns=RAW_COLUMNS).astype('string').apply(lambda col: col.str.strip())
+
+    out = pd.DataFrame(index=raw.index)
+    present = {}
+
+    for col in CATEGORY_COLUMNS + TEXT_COLUMNS:
+        out[col] = text[col]
+        present[col] = text[col].notna()
+
+    out['price'] = pd.to_numeric(text['price'], errors='coerce').round().astype('Int64')
+    present['price'] = text['price'].notna()
+
+    out['displacement'] = _number(text['displacement'])
+    present['displacement'] = text['displacement'].notna()
+
+    for col in UNIT_COLUMNS + COUNT_COLUMNS:
+        out[col] = _number(text[col])
+        present[col] = text[col].notna()
+
+    out['gearbox'] = pd.to_numeric(text['gearbox'].str.extract(GEARBOX_PATTERN, expand=False), errors='coerce')
+    present['gearbox'] = text['gearbox'].notna()
+
+    power = text['bhp'].str.extract(POWER_PATTERN)
+    # cars_cleaned.csv keeps whole bhp (75.94bhp -> 75).
+    out['bhp_value'] = pd.to_numeric(power['value'], errors='coerce').floordiv(1)
+    out['bhp_rpm'] = pd.to_numeric(power['rpm'], errors='coerce')
+    present['bhp_value'] = present['bhp_rpm'] = text['bhp'].notna()
+
+    torque = text['torque'].str.extract(TORQUE_PATTERN)
+    out['torque_value'] = pd.to_numeric(torque['value'], errors='coerce')
+    out['torque_rpm'] = pd.to_numeric(torque['rpm'], errors='coerce')
+    present['torque_value'] = present['torque_rpm'] = text['torque'].notna()
+
+    for col in BOOLEAN_COLUMNS:
+        out[col] = text[col].str.lower().eq('yes').fillna(False)
+        present[col] = text[col].notna()
+
+    required = out[REQUIRED_COLUMNS].notna().all(axis=1)
+    kept = out[required]
+
+    report = pd.DataFrame({
+        'input_nulls': {col: int((~present[col]).sum()) for col in OUTPUT_DTYPES},
+        'rejects': {
+            col: int((present[col] & out[col].isna()).sum()) if col not in BOOLEAN_COLUMNS else 0
+            for col in OUTPUT_DTYPES
+        },
+        'output_nulls': {col: int(kept[col].isna().sum()) for col in OUTPUT_DTYPES},
+    })
+
+    kept = kept.copy()
+    for col in ('displacement', 'gearbox'):
+        kept[col] = kept[col].fillna(MISSING_INT)
+
+    return kept[list(OUTPUT_DTYPES)].astype(OUTPUT_DTYPES), report, int((~required).sum())
+
+
+def merge_extras(clean: pd.DataFrame, extras: pd.DataFrame | None) -> pd.DataFrame:
+    """Adds image_link and the per-city prices, which come from outside the scrape, by url."""
+    if extras is None:
+        return clean
+    extra_columns = [c for c in ['image_link'] + CITIES if c in extras.columns]
+    extras = extras[['url'] + extra_columns].drop_duplicates(subset=['url'], keep='last').astype({'url': 'string'})
+    return clean.merge(extras, on='url', how='left')
+
+
+def clean_file(
+    raw_path: str,
+    out_path: str,
+    extras_path: str | None = None,
+    chunk_size: int = CHUNK_SIZE
+) -> tuple[pd.DataFrame, dict]:
+    """
+    Cleans `raw_path` into `out_path` chunk by chunk, so memory stays bounded by the chunk size.
+
+    Duplicate variant URLs (the crawl can revisit a variant under two models) keep their
+    first occurrence across chunks. Returns the accumulated per-column report and row totals.
+    """
+    extras = pd.read_csv(extras_path) if extras_path else None
+    seen_urls = set()
+    report = None
+    totals = {'read': 0, 'rejected': 0, 'duplicates': 0, 'written': 0}
+
+    for i, chunk in enumerate(pd.read_csv(raw_path, dtype=str, chunksize=chunk_size)):
+        clean, chunk_report, rejected = clean_chunk(chunk)
+
+        duplicate = clean['url'].isin(seen_urls) | clean['url'].duplicated()
+        clean = clean[~duplicate]
+        seen_urls.update(clean['url'])
+
+        clean = merge_extras(clean, extras)
+        clean.to_csv(out_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+        totals['read'] += len(chunk)
+        totals['rejected'] += rejected
+        totals['duplicates'] += int(duplicate.sum())
+        totals['written'] += len(clean)
+        report = chunk_report if report is None else report.add(chunk_report)
+
+    return report, totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Turn the raw scrape into the cleaned catalog CSV")
+    parser.add_argument('--input', default=RAW_FILE)
+    parser.add_argument('--output', default=CLEAN_FILE)
+    parser.add_argument('--extras', help="CSV with url, image_link and per-city price columns to merge in")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    report, totals = clean_file(args.input, args.output, extras_path=args.extras, chunk_size=args.chunk_size)
+
+    print(report.to_string())
+    print(f"Rows read: {totals['read']}, rejected: {totals['rejected']}, "
+          f"duplicates: {totals['duplicates']}, written: {totals['written']}")
+    print(f"Cleaned data written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import fetch_data
+
+DEFAULT_WORKERS = 16
+DEFAULT_PER_HOST = 8
+DEFAULT_RATE = 25.0
+DEFAULT_MODEL_LOOKAHEAD = 4
+
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each request
+    takes one token and blocks until one is available. This replaces the fixed
+    per-request sleeps of the sequential crawl with a global request rate.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class PoliteSession:
+    """
+    A shared keep-alive session that enforces the crawl's politeness limits.
+
+    Every request first takes a token from the rate limiter, then a slot from the
+    global and per-host semaphores, so at most `per_host` requests are in flight
+    against any one host.
+    """
+
+    def __init__(self, workers: int, per_host: int, rate: float) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.bucket = TokenBucket(rate)
+        self.global_slots = threading.BoundedSemaphore(workers)
+        self.per_host = per_host
+        self.host_slots = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+        self.hosts_lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        with self.hosts_lock:
+            return self.host_slots[urlsplit(url).netloc]
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        self.bucket.acquire()
+        with self.global_slots, self._host_slot(url):
+            return self.session.get(url, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+@dataclass
+class ModelResult:
+    """Everything produced while crawling one model URL, in crawl order."""
+    url: str
+    rows: list[dict] = field(default_factory=list)
+    failures: list[dict] = field(default_factory=list)
+    total_variants: int = 0
+    failed_variants: int = 0
+    model_failed: bool = False
+
+
+def fetch_variant(variant: str, session=None, pause=None, cache=None, model_url=None) -> tuple[str, object]:
+    """
+    Fetches and parses one variant page.
+
+    Returns ('row', data), ('failed', cause) or ('empty', None), mirroring the
+    three outcomes of the sequential crawl. With an HttpCache, a page whose
+    content is unchanged reuses its cached row instead of being parsed again,
+    and a page that fails is still recorded as seen (it is not removed).
+    """
+    try:
+        if cache is not None:
+            raw_variant, _, cached_row = cache.fetch_state(variant, 'variant', session=session, model_url=model_url)
+            if cached_row:
+                return 'row', cached_row
+        else:
+            raw_variant = fetch_data.get_raw_data(url=variant, session=session)
+    except Exception as e:
+        if cache is not None:
+            cache.mark_seen(variant, model_url)
+        if pause:
+            pause()
+        return 'failed', e
+
+    try:
+        if raw_variant:
+            variant_data = fetch_data.get_variant_data(raw_data=raw_variant)
+            variant_data['url'] = variant
+            if cache is not None:
+                cache.store_row(variant, variant_data)
+        else:
+            variant_data = {}
+    except Exception as e:
+        return 'failed', e
+
+    return ('row', variant_data) if variant_data else ('empty', None)
+
+
+def crawl_model(url: str, session=None, pause=None, map_variants=map, on_variant=None, cache=None) -> ModelResult:
+    """
+    Crawls a model page and all of its variants.
+
+    `map_variants` decides how the variant fetches run: the builtin `map` for the
+    sequential crawl, or an executor's `map` for the concurrent one. Results are
+    always collected in variant order.
+    """
+    result = ModelResult(url=url)
+
+    try:
+        if cache is not None:
+            raw = cache.fetch_state(url, 'model', session=session)[0]
+        else:
+            raw = fetch_data.get_raw_data(url=url, session=session)
+        variants = fetch_data.get_all_variants(raw_data=raw)
+        if pause:
+            pause()
+
+    except Exception as e:
+        result.model_failed = True
+        result.failures.append({'url' : url, 'type' : 'model', 'cause' : e})
+        variants = []
+
+    if variants is None: variants = []
+
+    result.total_variants = len(variants)
+
+    outcomes = map_variants(
+        lambda variant: fetch_variant(variant, session=session, pause=pause, cache=cache, model_url=url), variants
+    )
+
+    for processed, (variant, (status, payload)) in enumerate(zip(variants, outcomes), start=1):
+        if status == 'failed':
+            result.failed_variants += 1
+            result.failures.append({'url' : variant, 'type' : 'variant', 'cause' : payload})
+        elif status == 'row':
+            result.rows.append(payload)
+        if on_variant:
+            on_variant(result, processed)
+
+    return result
+
+
+def crawl(
+    urls: list[str],
+    workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    rate: float = DEFAULT_RATE,
+    model_lookahead: int = DEFAULT_MODEL_LOOKAHEAD,
+    cache=None
+):
+    """
+    Concurrent crawl of `urls`, yielding one ModelResult per model in input order.
+
+    Up to `model_lookahead` models are in progress at once, so the variant fetches
+    of one model overlap with the next model's page fetch. All requests share one
+    keep-alive session and the limits of PoliteSession.
+    """
+    session = PoliteSession(workers=workers, per_host=per_host, rate=rate)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="variant") as variant_pool, \
+         ThreadPoolExecutor(max_workers=model_lookahead, thread_name_prefix="model") as model_pool:
+
+        def run_model(url: str) -> ModelResult:
+            return crawl_model(url, session=session, map_variants=variant_pool.map, cache=cache)
+
+        try:
+            # Executor.map keeps results in submission order.
+            yield from model_pool.map(run_model, urls)
+        finally:
+            session.close()
@@ -1,3 +1,4 @@
+import re
 import json
 import time
 import random
@@ -5,24 +6,162 @@ import requests
 from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 BASE_URL = "https://www.cardekho.com/overview/"
 URL_EXTENSION = '.htm'
 
+INITIAL_STATE_MARKER = re.compile(rb'window\.__INITIAL_STATE__\s*=\s*')
+# A whole JSON string literal (escapes included) or a single brace.
+JSON_SCAN_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}]', re.DOTALL)
+
+# (section, index, {label on the page: column name}) for every spec read by get_variant_data.
+SPEC_SECTIONS = [
+    ('specification', 0, {
+        'Displacement': 'displacement',
+        'Max Power': 'bhp',
+        'Max Torque': 'torque',
+        'No. of Cylinders': 'no_of_cylinders',
+        'Transmission Type': 'transmission',
+        'Gearbox': 'gearbox',
+        'Drive Type': 'drive_type',
+    }),
+    ('specification', 1, {
+        'mileage': 'mileage',
+        'capacity': 'capacity',
+    }),
+    ('specification', 2, {
+        'Front Brake Type': 'front_brake',
+        'Rear Brake Type': 'rear_brake',
+    }),
+    ('specification', 3, {
+        'Boot Space': 'boot_space',
+        'Seating Capacity': 'seating_capacity',
+        'ground clearance': 'ground_clearance',
+        'Wheel Base': 'wheel_base',
+        'Gross Weight': 'gross_weight',
+    }),
+    ('featured', 0, {
+        'Cruise Control': 'cruise_control',
+        'KeyLess Entry': 'keyLess_entry',
+        'Engine Start/Stop Button': 'engine_start/stop_button',
+        'Drive Modes': 'drive_modes',
+        'Drive Mode Types': 'drive_mode_types',
+        'Parking Sensors': 'parking_sensors',
+    }),
+    ('featured', 2, {
+        'Tyre Size': 'tyre_size',
+        'Tyre Type': 'tyre_type',
+        'LED Headlamps': 'LED_headlamps',
+    }),
+    ('featured', 3, {
+        'No. of Airbags': 'no_of_airbags',
+        'Rear Camera': 'rear_camera',
+        'Hill Assist': 'hill_assist',
+        'Global NCAP Safety Rating': 'NCAP_rating',
+        'Touchscreen': 'touchscreen',
+        'Android Auto': 'android_auto',
+    }),
+]
+
+# Column name -> key in the page's dataLayer entry.
+DATALAYER_FIELDS = {
+    'brand': 'oemName',
+    'model': 'modelName',
+    'variant': 'variantName',
+    'type': 'vehicleSegment',
+    'price': 'price_segment',
+    'fuel': 'fuel_type',
+}
+
+# The declared schema of a scraped variant row, in output column order.
+FIELDNAMES = (
+    list(DATALAYER_FIELDS)
+    + [column for _, _, values in SPEC_SECTIONS for column in values.values()]
+    + ['url']
+)
+
 user_agent = UserAgent()
 
-def get_raw_data(url: str) -> dict | None:
+def request_page(url: str, session: requests.Session | None = None, headers: dict | None = None) -> requests.Response:
+
+    request_headers = {
+        "User-Agent": user_agent.random
+    }
+    if headers:
+        request_headers.update(headers)
+
+    return (session or requests).get(url, headers=request_headers, timeout=10)
+
+
+def parse_page(response: requests.Response) -> dict | None:
+
+    raw_data = extract_initial_state(response.content)
+
+    if raw_data is None:
+        raw_data = extract_initial_state_soup(response.text)
+
+    return raw_data
 
-    try:
-        headers = {
-            "User-Agent": user_agent.random
-        }
 
-        response = requests.get(url, headers=headers, timeout=10)
+def get_raw_data(url: str, session: requests.Session | None = None) -> dict | None:
+
+    try:
+        response = request_page(url, session=session)
 
     except requests.exceptions.RequestException as e:
         pass
 
-    soup = BeautifulSoup(response.text, 'html.parser')
+    return parse_page(response)
+
+
+def _decode_json(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def extract_initial_state(page: bytes | str) -> dict | None:
+    """
+    Pulls the `window.__INITIAL_STATE__` object straight out of the raw page.
+
+    Finds the marker, then walks the JSON with a brace-aware scanner (string
+    literals are skipped as whole tokens, so braces inside them don't count)
+    to locate the end of the object, and decodes just that slice. Returns None
+    when the marker is missing or the object is not valid JSON.
+    """
+    if isinstance(page, str):
+        page = page.encode('utf-8')
+
+    marker = INITIAL_STATE_MARKER.search(page)
+    if marker is None:
+        return None
+
+    start = marker.end()
+    if page[start:start + 1] != b'{':
+        return None
+
+    depth = 0
+    for token in JSON_SCAN_TOKEN.finditer(page, start):
+        char = token.group()[:1]
+        if char == b'{':
+            depth += 1
+        elif char == b'}':
+            depth -= 1
+            if depth == 0:
+                try:
+                    return _decode_json(page[start:token.end()])
+                except ValueError:
+                    return None
+
+    return None
+
+
+def extract_initial_state_soup(page: str) -> dict | None:
+    """The original BeautifulSoup-based extraction, kept as a fallback for unusual pages."""
+
+    soup = BeautifulSoup(page, 'html.parser')
 
     script_section = soup.find('script', string=lambda s: s and 'window.__INITIAL_STATE__' in s)
 
@@ -103,88 +242,16 @@ def get_variant_data(raw_data: dict) -> dict | None:
 
     params = [
         {
-            'items': dataSpecs['specification'][0]['items'],
-            'values': {
-                'Displacement': 'displacement',
-                'Max Power': 'bhp',
-                'Max Torque': 'torque',
-                'No. of Cylinders': 'no_of_cylinders',
-                'Transmission Type': 'transmission',
-                'Gearbox': 'gearbox',
-                'Drive Type': 'drive_type'
-            },
-        },
-
-        {
-            'items': dataSpecs['specification'][1]['items'],
-            'values': {
-
-                'mileage': 'mileage',
-                'capacity': 'capacity'
-            }
-        },
-
-        {
-            'items': dataSpecs['specification'][2]['items'],
-            'values': {
-                'Front Brake Type': 'front_brake',
-                'Rear Brake Type': 'rear_brake'
-            }
-        },
-
-        {
-            'items': dataSpecs['specification'][3]['items'],
-            'values': {
-                'Boot Space': 'boot_space',
-                'Seating Capacity': 'seating_capacity',
-                'ground clearance': 'ground_clearance',
-                'Wheel Base': 'wheel_base',
-                'Gross Weight': 'gross_weight'
-            }
-        },
-
-        {
-            'items': dataSpecs['featured'][0]['items'],
-            'values': {
-                'Cruise Control': 'cruise_control',
-                'KeyLess Entry': 'keyLess_entry',
-                'Engine Start/Stop Button': 'engine_start/stop_button',
-                'Drive Modes': 'drive_modes',
-                'Drive Mode Types': 'drive_mode_types',
-                'Parking Sensors': 'parking_sensors'
-            }
-        },
-
-        {
-            'items': dataSpecs['featured'][2]['items'],
-            'values': {
-                'Tyre Size': 'tyre_size',
-                'Tyre Type': 'tyre_type',
-                'LED Headlamps': 'LED_headlamps'
-            }
-        },
-
-        {
-            'items': dataSpecs['featured'][3]['items'],
-            'values': {
-                'No. of Airbags': 'no_of_airbags',
-                'Rear Camera': 'rear_camera',
-                'Hill Assist': 'hill_assist',
-                'Global NCAP Safety Rating': 'NCAP_rating',
-                'Touchscreen': 'touchscreen',
-                'Android Auto': 'android_auto'
-            }
+            'items': dataSpecs[section][index]['items'],
+            'values': values
         }
+        for section, index, values in SPEC_SECTIONS
     ]
 
     data = {}
     dataLayer = raw_data['dataLayer'][0]
-    data['brand'] = dataLayer['oemName']
-    data['model'] = dataLayer['modelName']
-    data['variant'] = dataLayer['variantName']
-    data['type'] = dataLayer['vehicleSegment']
-    data['price'] = dataLayer['price_segment']
-    data['fuel'] = dataLayer['fuel_type']
+    for column, key in DATALAYER_FIELDS.items():
+        data[column] = dataLayer[key]
 
     data.update(extract_data(params))
 
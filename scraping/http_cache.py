@@ -0,0 +1,208 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import Counter
+
+import fetch_data
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+NEW = 'new'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+  url TEXT PRIMARY KEY,
+  kind TEXT NOT NULL,
+  model_url TEXT,
+  etag TEXT,
+  last_modified TEXT,
+  content_hash TEXT,
+  state BLOB,
+  row BLOB,
+  fetched_at REAL,
+  last_seen_run INTEGER
+);
+CREATE TABLE IF NOT EXISTS runs (
+  run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  started_at REAL NOT NULL
+);
+"""
+
+
+def canonical_json(data) -> bytes:
+    """Key-sorted, compact JSON, so equal objects always hash the same."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def pack(data) -> bytes:
+    return zlib.compress(canonical_json(data))
+
+
+def unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+class HttpCache:
+    """
+    On-disk cache of crawled pages, keyed by URL and stored in SQLite.
+
+    For every page it keeps the validators (ETag, Last-Modified), a hash of the
+    extracted __INITIAL_STATE__, the compressed state itself and, for variant
+    pages, the compressed row produced from it and the model page listing them.
+    Each crawl opens a run; a variant is reported as removed when its model page
+    was fetched in that run but the variant itself was never reached.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        columns = {name for _, name, *_ in self.conn.execute("PRAGMA table_info(pages)")}
+        if 'model_url' not in columns:
+            # Caches written before variants recorded their model page.
+            self.conn.execute("ALTER TABLE pages ADD COLUMN model_url TEXT")
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        with self.lock, self.conn:
+            cursor = self.conn.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),))
+            self.run_id = cursor.lastrowid
+
+    def lookup(self, url: str) -> dict | None:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, content_hash, state, row FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('etag', 'last_modified', 'content_hash', 'state', 'row'), row))
+
+    def fetch_state(self, url: str, kind: str, session=None,
+                    model_url: str | None = None) -> tuple[dict | None, str, dict | None]:
+        """
+        Fetches `url` with a conditional request and returns (state, status, cached row).
+
+        The status is NEW for URLs the cache has never seen, UNCHANGED when the server
+        answers 304 or the state hashes to the stored value, and CHANGED otherwise.
+        The cached row is only returned for UNCHANGED pages. Variant pages pass the
+        `model_url` they were listed on. An error response (4xx/5xx) gives no state and
+        leaves the stored page untouched.
+        """
+        entry = self.lookup(url)
+        headers = {}
+        if entry:
+            if entry['etag']:
+                headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = fetch_data.request_page(url, session=session, headers=headers)
+
+        if response.status_code == 304 and entry and entry['state'] is not None:
+            self.mark_seen(url, model_url)
+            self._count(kind, UNCHANGED)
+            return unpack(entry['state']), UNCHANGED, self._row(entry)
+
+        if not 200 <= response.status_code < 300:
+            # The error page says nothing about the car: keep the stored state, validators and
+            # row for the next run. A variant still counts as reached, so it is not reported
+            # removed; a model page does not, so its variants are not checked this run.
+            if kind != 'model':
+                self.mark_seen(url, model_url)
+            return None, CHANGED, None
+
+        state = fetch_data.parse_page(response)
+        content_hash = hashlib.sha256(canonical_json(state)).hexdigest() if state is not None else None
+
+        if entry is None:
+            status = NEW
+        elif content_hash is not None and content_hash == entry['content_hash']:
+            status = UNCHANGED
+        else:
+            status = CHANGED
+
+        with self.lock, self.conn:
+            self.conn.execute(
+                """
+                INSERT INTO pages (url, kind, model_url, etag, last_modified, content_hash, state, row, fetched_at,
+                                   last_seen_run)
+                VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                  kind = excluded.kind,
+                  model_url = COALESCE(excluded.model_url, pages.model_url),
+                  etag = excluded.etag,
+                  last_modified = excluded.last_modified,
+                  content_hash = excluded.content_hash,
+                  state = excluded.state,
+                  row = CASE WHEN pages.content_hash = excluded.content_hash THEN pages.row END,
+                  fetched_at = excluded.fetched_at,
+                  last_seen_run = excluded.last_seen_run
+                """,
+                (url, kind, model_url, response.headers.get('ETag'), response.headers.get('Last-Modified'), content_hash,
+                 pack(state) if state is not None else None, time.time(), self.run_id)
+            )
+
+        self._count(kind, status)
+        return state, status, self._row(entry) if status == UNCHANGED else None
+
+    def store_row(self, url: str, row: dict) -> None:
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE pages SET row = ? WHERE url = ?", (pack(row), url))
+
+    def mark_seen(self, url: str, model_url: str | None = None) -> None:
+        """
+        Records that this run reached `url`, even if it could not be fetched or parsed,
+        so a page that failed is not reported as removed.
+        """
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE pages SET last_seen_run = ?, model_url = COALESCE(?, model_url) WHERE url = ?",
+                (self.run_id, model_url, url)
+            )
+
+    def removed(self, kind: str = 'variant') -> list[str]:
+        """
+        URLs cached by earlier runs whose model page this run fetched but which it never
+        reached. Variants of models that were skipped (--resume) or whose page failed
+        are not checked, so they are never reported.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                """
+                SELECT v.url FROM pages v
+                JOIN pages m ON m.url = v.model_url
+                WHERE v.kind = ? AND v.last_seen_run < ? AND m.last_seen_run = ?
+                ORDER BY v.url
+                """,
+                (kind, self.run_id, self.run_id)
+            ).fetchall()
+        return [url for (url,) in rows]
+
+    def report(self) -> dict:
+        """Counts of new/changed/unchanged/removed variant pages for this run."""
+        return {
+            NEW: self.counts[('variant', NEW)],
+            CHANGED: self.counts[('variant', CHANGED)],
+            UNCHANGED: self.counts[('variant', UNCHANGED)],
+            'removed': len(self.removed('variant')),
+        }
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def _row(self, entry: dict | None) -> dict | None:
+        return unpack(entry['row']) if entry and entry['row'] is not None else None
+
+    def _count(self, kind: str, status: str) -> None:
+        with self.lock:
+            self.counts[(kind, status)] += 1
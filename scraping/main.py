@@ -1,124 +1,115 @@
 import os
-import csv
 import time
+import argparse
 import fetch_data
+import crawler
+import sinks
+import http_cache
 
 start_time = time.time()
 
 OUTPUT_DIR = os.path.join("data")
-OUTPUT_FILE = os.path.join(OUTPUT_DIR, "car_details.csv")
+OUTPUT_BASENAME = os.path.join(OUTPUT_DIR, "car_details")
 URL_FILE = os.path.join(OUTPUT_DIR, "urls.txt")
 ERROR_URLS = os.path.join(OUTPUT_DIR, "error_urls.csv")
+CHECKPOINT_FILE = os.path.join(OUTPUT_DIR, "crawl_checkpoint.tsv")
+CACHE_FILE = os.path.join(OUTPUT_DIR, "http_cache.sqlite")
 BUFFER_SIZE = 1_000
+FLUSH_INTERVAL = 30.0
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+parser = argparse.ArgumentParser(description="Crawl cardekho model and variant pages into car_details.csv")
+parser.add_argument('--concurrent', action='store_true', help="Crawl with a pool of workers instead of one request at a time")
+parser.add_argument('--workers', type=int, default=crawler.DEFAULT_WORKERS, help="Maximum requests in flight overall")
+parser.add_argument('--per-host', type=int, default=crawler.DEFAULT_PER_HOST, help="Maximum requests in flight per host")
+parser.add_argument('--rate', type=float, default=crawler.DEFAULT_RATE, help="Maximum requests per second")
+parser.add_argument('--lookahead', type=int, default=crawler.DEFAULT_MODEL_LOOKAHEAD, help="Models crawled at the same time")
+parser.add_argument('--format', choices=sinks.FORMATS, default='csv', help="Output format for the variant rows")
+parser.add_argument('--resume', action='store_true', help="Skip models completed by an interrupted run and append to its output")
+parser.add_argument('--flush-every', type=int, default=BUFFER_SIZE, help="Flush and checkpoint after this many rows")
+parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL, help="Flush and checkpoint at least this often (seconds)")
+parser.add_argument('--incremental', action='store_true', help="Send conditional requests and reuse unchanged pages from the HTTP cache")
+parser.add_argument('--cache-path', default=CACHE_FILE, help="SQLite file used by --incremental")
+args = parser.parse_args()
+
+OUTPUT_FILE = f"{OUTPUT_BASENAME}.{args.format}"
+
 def load_urls(file_path):
     with open(file_path, 'r') as file:
         return [line.strip() for line in file if line.strip()]
 
-urls = load_urls(URL_FILE)
+checkpoint = sinks.Checkpoint(CHECKPOINT_FILE)
+if not args.resume:
+    checkpoint.reset()
+
+urls = [url for url in load_urls(URL_FILE) if url not in checkpoint.completed]
 total_models_count = len(urls)
 
-buffer = []
+cache = http_cache.HttpCache(args.cache_path) if args.incremental else None
 
 processed_model_urls = 0
 failed_model_urls = 0
 total_urls = 0
 total_failed_urls = 0
 
-failed_urls = []
+def print_model_progress():
+    os.system('cls')
+    print(f'Processing Car Model: {processed_model_urls}/{total_models_count} ({processed_model_urls/total_models_count*100:.2f}%) Failed Car Models: {failed_model_urls} ({failed_model_urls/total_models_count*100:.2f}%)')
 
-with open(OUTPUT_FILE, mode='w', newline='', encoding='utf-8') as file:
-
-    writer = None
+def print_variant_progress(result, processed_variant_urls):
+    print(f'Processed Variants {processed_variant_urls}/{result.total_variants} ({processed_variant_urls/result.total_variants*100:.2f}%) Failed Variants: {result.failed_variants} ({result.failed_variants/result.total_variants*100:.2f}%)', end='\r')
 
+def sequential_results():
+    global processed_model_urls
     for url in urls:
-
-        processed_variant_urls = 0
-        failed_variant_urls = 0
         processed_model_urls += 1
-
-        os.system('cls')
-        print(f'Processing Car Model: {processed_model_urls}/{total_models_count} ({processed_model_urls/total_models_count*100:.2f}%) Failed Car Models: {failed_model_urls} ({failed_model_urls/total_models_count*100:.2f}%)')
-
-        try:
-            raw = fetch_data.get_raw_data(url=url)
-            variants = fetch_data.get_all_variants(raw_data=raw)
-            fetch_data.delay()
-
-        except Exception as e:
+        print_model_progress()
+        yield crawler.crawl_model(url, pause=fetch_data.delay, on_variant=print_variant_progress, cache=cache)
+
+def concurrent_results():
+    global processed_model_urls
+    for result in crawler.crawl(
+        urls, workers=args.workers, per_host=args.per_host, rate=args.rate, model_lookahead=args.lookahead, cache=cache
+    ):
+        processed_model_urls += 1
+        print_model_progress()
+        yield result
+
+writer = sinks.StreamingWriter(
+    data_sink=sinks.open_sink(OUTPUT_FILE, args.format, fetch_data.FIELDNAMES, resume_offset=checkpoint.data_offset),
+    error_sink=sinks.open_sink(ERROR_URLS, 'csv', ['url', 'type', 'cause'], resume_offset=checkpoint.error_offset),
+    checkpoint=checkpoint,
+    flush_every=args.flush_every,
+    flush_interval=args.flush_interval
+)
+
+try:
+    # Both modes yield results in urls.txt order, so the output files do not depend on the mode.
+    for result in (concurrent_results() if args.concurrent else sequential_results()):
+
+        if result.model_failed:
             failed_model_urls += 1
-            total_failed_urls += 1
-            failed_urls.append({'url' : url, 'type' : 'model', 'cause' : e})
-            variants = []
-
-        if variants is None: variants = []
-
-        total_variants = len(variants)
-
-        for variant in variants:
-
-            processed_variant_urls += 1
-            total_urls += 1
-
-            try:
-                raw_variant = fetch_data.get_raw_data(url=variant)
-            except Exception as e:
-                failed_variant_urls += 1
-                total_failed_urls += 1
-                failed_urls.append({'url' : variant, 'type' : 'variant', 'cause' : e})
-                raw_variant = None
-                fetch_data.delay()
-                print(f'Processed Variants {processed_variant_urls}/{total_variants} ({processed_variant_urls/total_variants*100:.2f}%) Failed Variants: {failed_variant_urls} ({failed_variant_urls/total_variants*100:.2f}%)', end='\r')
-                continue
 
-            try:
-                if raw_variant:
-                    variant_data = fetch_data.get_variant_data(raw_data=raw_variant)
-                    variant_data['url'] = variant
-                else:
-                    variant_data = {}
-            except Exception as e:
-                failed_variant_urls += 1
-                total_failed_urls += 1
-                failed_urls.append({'url' : variant, 'type' : 'variant', 'cause' : e})
-                variant_data = {}
+        total_urls += result.total_variants
+        total_failed_urls += len(result.failures)
+        writer.add_model(result.url, result.rows, result.failures)
 
-            if variant_data:
-                buffer.append(variant_data)
-
-            print(f'Processed Variants {processed_variant_urls}/{total_variants} ({processed_variant_urls/total_variants*100:.2f}%) Failed Variants: {failed_variant_urls} ({failed_variant_urls/total_variants*100:.2f}%)', end='\r')
-
-
-    normalized_data = fetch_data.normalize_data(data=buffer)
-
-    if normalized_data:
-        fieldnames = list(normalized_data[0].keys())
-
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for i in range(0, len(normalized_data), BUFFER_SIZE):
-
-            writer.writerows(normalized_data[i:i+BUFFER_SIZE])
-            print(f"Written rows {i} to {min(i + BUFFER_SIZE, len(normalized_data))}...")
-
-
-    buffer.clear()
-
-with open(ERROR_URLS, mode='w', newline='', encoding='utf-8') as file:
-
-    writer = csv.DictWriter(file, fieldnames=['url', 'type', 'cause'])
-    writer.writeheader()
-    writer.writerows(failed_urls)
+finally:
+    writer.close()
 
 os.system('cls')
 print(f'Data written to {OUTPUT_FILE} successfully!')
 print(f'Total Number of Models Processed: {total_models_count}')
 print(f'Total Number of urls Processed: {total_urls}')
 print(f'Total Number of failed urls: {total_failed_urls}')
-print(f'Success Rate: {(total_urls-total_failed_urls)/total_urls*100:.3f}%')
+if total_urls:
+    print(f'Success Rate: {(total_urls-total_failed_urls)/total_urls*100:.3f}%')
+
+if cache is not None:
+    changes = cache.report()
+    print(f"Variants new: {changes['new']}, changed: {changes['changed']}, unchanged: {changes['unchanged']}, removed: {changes['removed']}")
+    cache.close()
 
 elapsed_time = time.time() - start_time
 
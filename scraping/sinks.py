@@ -0,0 +1,232 @@
+import os
+import csv
+import json
+import time
+from abc import ABC, abstractmethod
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+
+class RowSink(ABC):
+    """
+    Base class for streaming writers with a fixed, declared schema.
+
+    Rows are written as they arrive; `flush()` makes everything written so far
+    durable and returns the output size, which the checkpoint records so an
+    interrupted run can be truncated back to a consistent point.
+    """
+
+    def __init__(self, path: str, fieldnames: list[str]) -> None:
+        self.path = path
+        self.fieldnames = list(fieldnames)
+
+    def project(self, row: dict) -> dict:
+        """Restricts a row to the schema, filling missing fields with None."""
+        return {field: row.get(field) for field in self.fieldnames}
+
+    @abstractmethod
+    def write(self, row: dict) -> None:
+        """Writes one row, projected onto the schema."""
+
+    @abstractmethod
+    def flush(self) -> int:
+        """Makes every row written so far durable and returns the output size."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Flushes and releases the output."""
+
+
+class TextSink(RowSink):
+    """Shared file handling for the line-oriented formats (CSV and JSONL)."""
+
+    def __init__(self, path: str, fieldnames: list[str], resume_offset: int | None = None) -> None:
+        super().__init__(path, fieldnames)
+        resuming = resume_offset is not None and os.path.exists(path)
+        self.file = open(path, mode='r+' if resuming else 'w', newline='', encoding='utf-8')
+        if resuming:
+            # Drop anything written after the last checkpoint.
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+        self.start()
+        if not resuming:
+            self.write_header()
+
+    def start(self) -> None:
+        pass
+
+    def write_header(self) -> None:
+        pass
+
+    def flush(self) -> int:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+class CsvSink(TextSink):
+
+    def start(self) -> None:
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames)
+
+    def write_header(self) -> None:
+        self.writer.writeheader()
+
+    def write(self, row: dict) -> None:
+        self.writer.writerow(self.project(row))
+
+
+class JsonlSink(TextSink):
+
+    def write(self, row: dict) -> None:
+        self.file.write(json.dumps(self.project(row), ensure_ascii=False, default=str) + '\n')
+
+
+class ParquetSink(RowSink):
+    """
+    Buffers rows and writes one Parquet row group per flush (pyarrow is optional).
+
+    Parquet files cannot be appended to, so a resumed run writes its rows to the
+    next free `<name>.partN.parquet` file beside the original.
+    """
+
+    def __init__(self, path: str, fieldnames: list[str], resume_offset: int | None = None) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Writing Parquet requires pyarrow: pip install pyarrow") from e
+
+        if resume_offset is not None and os.path.exists(path):
+            stem, ext = os.path.splitext(path)
+            part = 1
+            while os.path.exists(f"{stem}.part{part}{ext}"):
+                part += 1
+            path = f"{stem}.part{part}{ext}"
+
+        super().__init__(path, fieldnames)
+        self.pa = pa
+        # Scraped values are page text, so every column is a nullable string.
+        self.schema = pa.schema([(field, pa.string()) for field in self.fieldnames])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.pending = []
+        self.written = 0
+
+    def write(self, row: dict) -> None:
+        self.pending.append({k: None if v is None else str(v) for k, v in self.project(row).items()})
+
+    def flush(self) -> int:
+        if self.pending:
+            self.writer.write_table(self.pa.Table.from_pylist(self.pending, schema=self.schema))
+            self.written += len(self.pending)
+            self.pending = []
+        return self.written
+
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
+
+
+SINKS = {'csv': CsvSink, 'jsonl': JsonlSink, 'parquet': ParquetSink}
+
+
+def open_sink(path: str, fmt: str, fieldnames: list[str], resume_offset: int | None = None) -> RowSink:
+    return SINKS[fmt](path, fieldnames, resume_offset=resume_offset)
+
+
+class Checkpoint:
+    """
+    Append-only record of the model URLs whose rows are safely on disk.
+
+    Each line is `<url>\\t<data offset>\\t<error offset>`; the offsets are the
+    sizes of the output files right after the flush that covered that model.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.completed = set()
+        self.data_offset = None
+        self.error_offset = None
+
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    parts = line.rstrip('\n').split('\t')
+                    # A torn last line from a crash is ignored.
+                    if len(parts) != 3:
+                        continue
+                    self.completed.add(parts[0])
+                    self.data_offset, self.error_offset = int(parts[1]), int(parts[2])
+
+    def mark(self, urls: list[str], data_offset: int, error_offset: int) -> None:
+        with open(self.path, 'a', encoding='utf-8') as file:
+            for url in urls:
+                file.write(f"{url}\t{data_offset}\t{error_offset}\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.completed.update(urls)
+        self.data_offset, self.error_offset = data_offset, error_offset
+
+    def reset(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.completed = set()
+        self.data_offset = None
+        self.error_offset = None
+
+
+class StreamingWriter:
+    """
+    Streams crawl results to the data and error sinks and checkpoints finished models.
+
+    Models are only marked complete after a flush has made their rows durable,
+    so a restart never skips a model whose rows were lost. Flushes happen every
+    `flush_every` rows or `flush_interval` seconds, whichever comes first.
+    """
+
+    def __init__(
+        self,
+        data_sink: RowSink,
+        error_sink: RowSink,
+        checkpoint: Checkpoint,
+        flush_every: int = 1_000,
+        flush_interval: float = 30.0
+    ) -> None:
+        self.data_sink = data_sink
+        self.error_sink = error_sink
+        self.checkpoint = checkpoint
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.pending_models = []
+        self.rows_since_flush = 0
+        self.last_flush = time.monotonic()
+
+    def add_model(self, url: str, rows: list[dict], failures: list[dict]) -> None:
+        for row in rows:
+            self.data_sink.write(row)
+        for failure in failures:
+            self.error_sink.write(failure)
+        self.pending_models.append(url)
+        self.rows_since_flush += len(rows)
+
+        if (self.rows_since_flush >= self.flush_every
+                or time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        data_offset = self.data_sink.flush()
+        error_offset = self.error_sink.flush()
+        if self.pending_models:
+            self.checkpoint.mark(self.pending_models, data_offset, error_offset)
+        self.pending_models = []
+        self.rows_since_flush = 0
+        self.last_flush = time.monotonic()
+
+    def close(self) -> None:
+        self.flush()
+        self.data_sink.close()
+        self.error_sink.close()
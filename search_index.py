@@ -0,0 +1,232 @@
+"""
+Typeahead index over the catalog's brand, model and variant names.
+
+Names are split into lowercase tokens. A query token matches a name token exactly, as a
+prefix (found by bisecting the sorted token list), or fuzzily: tokens sharing at least two
+character trigrams with it are candidates, and a candidate matches when one of its
+prefixes is within one or two edits (typos, swapped letters) of the query token. So
+"hundai cret" and "maruti swfit" still find "hyundai creta" and "maruti swift". A name
+matches when every query token matches one of its tokens, and matches are ranked by
+how well they match, then by name length. Everything is in memory and one lookup is a
+few set operations, well under a millisecond on the full catalog.
+
+The index is kept in sync incrementally: sync() re-indexes only vehicles whose names
+changed since the last catalog version.
+
+Timing per keystroke:
+    python search_index.py --csv data/cars_cleaned.csv "hundai creta sx"
+"""
+import re
+import time
+import bisect
+import argparse
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+# --- SEARCH INDEX CONFIG ---
+SUGGESTIONS = 8
+# Query tokens shorter than this only match exactly or as a prefix.
+FUZZY_MIN_LENGTH = 3
+# Query tokens this long may be two edits away from a name token; shorter ones one edit.
+TWO_EDITS_LENGTH = 6
+# Trigrams a name token must share with a query token to be checked for a fuzzy match.
+SHARED_TRIGRAMS = 2
+# Score of one query token per kind of match; each edit of a fuzzy match costs EDIT.
+EXACT, PREFIX, FUZZY, EDIT = 1.0, 0.9, 0.8, 0.1
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(str(text).lower())
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def rows_from_tree(tree: dict) -> list[tuple]:
+    """(vehicle_id, brand, model, variant) rows from a compare.variant_tree."""
+    return [
+        (vehicle_id, brand, model, variant)
+        for brand, models in tree.items()
+        for model, variants in models.items()
+        for variant, vehicle_id in variants
+    ]
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    vehicle_id: int
+    brand: str
+    model: str
+    variant: str
+    score: float
+
+
+class SearchIndex:
+    """
+    Prefix and trigram index of vehicle names, shared by every session.
+
+    `postings` maps each token to the vehicles whose names contain it, `tokens` keeps
+    the tokens sorted for prefix lookups and `grams` maps each trigram to the tokens
+    containing it. Reads and sync() are serialized by one lock; both are short.
+    """
+
+    def __init__(self, rows=(), version=None) -> None:
+        self.version = None
+        self.docs = {}
+        self.postings = {}
+        self.tokens = []
+        self.grams = {}
+        self.lock = threading.Lock()
+        if rows:
+            self.sync(rows, version)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    # --- building ---
+    def sync(self, rows, version=None) -> tuple[int, int]:
+        """
+        Makes the index match `rows` of (vehicle_id, brand, model, variant); only added,
+        removed and renamed vehicles are touched. Returns (indexed, dropped).
+        """
+        wanted = {int(vehicle_id): (brand, model, variant) for vehicle_id, brand, model, variant in rows}
+        with self.lock:
+            stale = [vid for vid, doc in self.docs.items() if wanted.get(vid) != doc[:3]]
+            for vid in stale:
+                self._remove(vid)
+            fresh = [vid for vid in wanted if vid not in self.docs]
+            for vid in fresh:
+                self._add(vid, *wanted[vid])
+            self.version = version
+        return len(fresh), len(stale)
+
+    def _add(self, vehicle_id: int, brand: str, model: str, variant: str) -> None:
+        tokens = tuple(dict.fromkeys(tokenize(f"{brand} {model} {variant}")))
+        self.docs[vehicle_id] = (brand, model, variant, tokens)
+        for token in tokens:
+            if token not in self.postings:
+                self.postings[token] = set()
+                bisect.insort(self.tokens, token)
+                for gram in trigrams(token):
+                    self.grams.setdefault(gram, set()).add(token)
+            self.postings[token].add(vehicle_id)
+
+    def _remove(self, vehicle_id: int) -> None:
+        *_, tokens = self.docs.pop(vehicle_id)
+        for token in tokens:
+            holders = self.postings[token]
+            holders.discard(vehicle_id)
+            if holders:
+                continue
+            del self.postings[token]
+            del self.tokens[bisect.bisect_left(self.tokens, token)]
+            for gram in trigrams(token):
+                self.grams[gram].discard(token)
+                if not self.grams[gram]:
+                    del self.grams[gram]
+
+    # --- lookups ---
+    def _token_matches(self, query: str) -> dict[str, float]:
+        """Name tokens matching one query token, with their score."""
+        matches = {}
+        start = bisect.bisect_left(self.tokens, query)
+        for token in self.tokens[start:]:
+            if not token.startswith(query):
+                break
+            matches[token] = EXACT if token == query else PREFIX
+        if len(query) >= FUZZY_MIN_LENGTH:
+            max_edits = 2 if len(query) >= TWO_EDITS_LENGTH else 1
+            shared = Counter(token for gram in trigrams(query) for token in self.grams.get(gram, ()))
+            for token, common in shared.items():
+                if common < SHARED_TRIGRAMS or token in matches:
+                    continue
+                edits = prefix_distance(query, token, max_edits)
+                if edits is not None:
+                    matches[token] = FUZZY - EDIT * edits
+        return matches
+
+    def _scores(self, text: str) -> dict[int, float]:
+        """vehicle_id -> summed score of the vehicles matching every token of `text`."""
+        scores = None
+        for query in dict.fromkeys(tokenize(text)):
+            best = {}
+            for token, score in self._token_matches(query).items():
+                for vid in self.postings[token]:
+                    if score > best.get(vid, 0.0):
+                        best[vid] = score
+            if scores is None:
+                scores = best
+            else:
+                scores = {vid: total + best[vid] for vid, total in scores.items() if vid in best}
+            if not scores:
+                return {}
+        return scores or {}
+
+    def match_ids(self, text: str) -> tuple[int, ...]:
+        """Every vehicle whose name matches `text`, sorted by id; what the Filters variant box selects."""
+        with self.lock:
+            return tuple(sorted(self._scores(text)))
+
+    def suggest(self, text: str, limit: int = SUGGESTIONS) -> list[Suggestion]:
+        """The `limit` best-matching vehicles: highest score, then shortest name, then alphabetical."""
+        with self.lock:
+            scores = self._scores(text)
+            ranked = sorted(
+                scores.items(),
+                key=lambda item: (-item[1], len(self.docs[item[0]][3]), self.docs[item[0]][2], item[0]),
+            )[:limit]
+            return [Suggestion(vid, *self.docs[vid][:3], score=round(score, 3)) for vid, score in ranked]
+
+
+def prefix_distance(query: str, token: str, max_edits: int) -> int | None:
+    """
+    Fewest edits (insertions, deletions, substitutions, adjacent swaps) turning `query`
+    into some prefix of `token`, or None if that takes more than `max_edits`.
+    """
+    rows, cols = len(query) + 1, min(len(token), len(query) + max_edits) + 1
+    previous2, previous = None, list(range(cols))
+    for i in range(1, rows):
+        current = [i] + [0] * (cols - 1)
+        for j in range(1, cols):
+            cost = query[i - 1] != token[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and query[i - 1] == token[j - 2] and query[i - 2] == token[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_edits:
+            return None
+        previous2, previous = previous, current
+    best = min(previous)
+    return best if best <= max_edits else None
+
+
+def main() -> None:
+    import catalog
+
+    parser = argparse.ArgumentParser(description="Build the typeahead index and time a query keystroke by keystroke")
+    parser.add_argument("query", nargs="?", default="hundai creta sx")
+    parser.add_argument("--csv", default="data/cars_cleaned.csv")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = catalog.CatalogEngine(catalog.load_from_csv(args.csv))
+    start = time.perf_counter()
+    index = SearchIndex(engine.variant_rows())
+    print(f"Indexed {len(index):,} vehicles, {len(index.tokens):,} tokens in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    for end in range(1, len(args.query) + 1):
+        typed = args.query[:end]
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            suggestions = index.suggest(typed)
+        elapsed = (time.perf_counter() - start) / args.repeat * 1000
+        top = suggestions[0].variant if suggestions else "-"
+        print(f"{typed!r:<24}{elapsed:>8.3f}ms  {len(index.match_ids(typed)):>5} matches  top: {top}")
+
+
+if __name__ == "__main__":
+    main()
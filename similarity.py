@@ -0,0 +1,220 @@
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# --- SIMILARITY CONFIG ---
+# Neighbours kept per vehicle; the Filters page shows the first 3.
+SIMILAR_K = int(os.getenv("CARQUEST_SIMILAR_K", "10"))
+SIMILARITY_PATH = os.getenv("CARQUEST_SIMILARITY_PATH", os.path.join("data", "similarity.npz"))
+# Memory for one block of the distance matrix; larger catalogs just use shorter blocks.
+BLOCK_MB = int(os.getenv("CARQUEST_SIMILAR_BLOCK_MB", "64"))
+
+NUMERIC_FEATURES = [
+    "base_price", "bhp_value", "torque_value", "displacement",
+    "mileage", "seating_capacity", "boot_space", "wheel_base",
+]
+CATEGORICAL_FEATURES = ["type", "fuel", "transmission"]
+CARD_COLUMNS = ["vehicle_id", "brand", "model", "variant", "type", "image_link"]
+# Bumped whenever neighbours are chosen differently, so indexes saved by older code are rebuilt.
+INDEX_FORMAT = 2
+# Bytes per (row, candidate) pair in one block: the float32 distance, the bool same-group
+# mask and the int64 argpartition result are all alive at once.
+BYTES_PER_PAIR = 4 + 1 + 8
+
+
+def feature_matrix(frame: pd.DataFrame) -> np.ndarray:
+    """
+    One float32 row per vehicle: z-scored numeric specs followed by one-hot type, fuel
+    and transmission.
+
+    Price is scaled on a log axis, so 5 vs 6 lakh counts as much as 50 vs 60 lakh.
+    Missing numbers become the column mean (0 after scaling) and contribute nothing.
+    """
+    numeric = frame.reindex(columns=NUMERIC_FEATURES).apply(pd.to_numeric, errors="coerce").astype("float64")
+    numeric["base_price"] = np.log1p(numeric["base_price"].clip(lower=0))
+    std = numeric.std(ddof=0).replace(0, 1).fillna(1)
+    numeric = ((numeric - numeric.mean()) / std).fillna(0)
+
+    categorical = frame.reindex(columns=CATEGORICAL_FEATURES).astype("string").apply(lambda s: s.str.lower())
+    one_hot = pd.get_dummies(categorical, dtype="float64")
+    return np.hstack([numeric.to_numpy(), one_hot.to_numpy()]).astype(np.float32)
+
+
+def nearest_neighbours(
+    features: np.ndarray,
+    groups: np.ndarray,
+    k: int = SIMILAR_K,
+    block_mb: int = BLOCK_MB
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Top-`k` neighbours of every row by Euclidean distance, as (rows, distances) arrays of
+    shape (n, k), nearest first.
+
+    Rows sharing a group (the same brand and model) are never neighbours of each other,
+    otherwise every list would just be the car's own variants. The distance matrix is
+    computed one block of rows at a time, sized so that the block's distances, group mask
+    and argpartition indices together stay at about `block_mb` whatever the catalog size.
+    Slots without a candidate hold row -1 and distance inf.
+    """
+    n = len(features)
+    k = max(0, min(k, n - 1))
+    rows = np.full((n, k), -1, dtype=np.int64)
+    distances = np.full((n, k), np.inf, dtype=np.float32)
+    if k == 0:
+        return rows, distances
+
+    sq_norms = np.einsum("ij,ij->i", features, features)
+    block = max(1, (block_mb * 1024 * 1024) // (BYTES_PER_PAIR * n))
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b; |a|^2 is the same along a row, so it is only
+        # added back for the k winners.
+        d2 = features[start:stop] @ features.T
+        d2 *= -2
+        d2 += sq_norms[None, :]
+        d2[groups[start:stop, None] == groups[None, :]] = np.inf
+        part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        part_d2 = np.take_along_axis(d2, part, axis=1)
+        order = np.argsort(part_d2, axis=1, kind="stable")
+        rows[start:stop] = np.take_along_axis(part, order, axis=1)
+        part_d2 = np.take_along_axis(part_d2, order, axis=1) + sq_norms[start:stop, None]
+        distances[start:stop] = np.sqrt(np.maximum(part_d2, 0))
+    rows[np.isinf(distances)] = -1
+    return rows, distances
+
+
+class SimilarityIndex:
+    """
+    Precomputed "Similar Cars" for a whole catalog.
+
+    Neighbours are found once per catalog version from the standardized specs, and every
+    lookup afterwards is a dict read: no query per result card.
+    """
+
+    def __init__(self, ids: np.ndarray, neighbours: np.ndarray, cards: list[dict], version=None,
+                 build_seconds: float = 0.0) -> None:
+        self.version = version
+        self.build_seconds = build_seconds
+        self.k = neighbours.shape[1] if neighbours.ndim == 2 else 0
+        self.cards = {int(card["vehicle_id"]): card for card in cards}
+        self.neighbours = {
+            int(vehicle_id): [int(ids[r]) for r in row if r >= 0]
+            for vehicle_id, row in zip(ids, neighbours)
+        }
+        self._ids = np.asarray(ids, dtype=np.int64)
+        self._rows = neighbours
+
+    def __len__(self) -> int:
+        return len(self.neighbours)
+
+    @classmethod
+    def build(cls, frame: pd.DataFrame, version=None, k: int = SIMILAR_K) -> "SimilarityIndex":
+        """Builds the index from a catalog frame (catalog.prepare_frame layout)."""
+        start = time.perf_counter()
+        ids = frame["vehicle_id"].to_numpy(dtype=np.int64)
+        # Variants of one car share a group; different brands may reuse a model name.
+        names = [frame[col].astype("string").str.lower().fillna("") for col in ("brand", "model")]
+        groups = pd.MultiIndex.from_arrays(names).factorize()[0]
+        neighbours, _ = nearest_neighbours(feature_matrix(frame), groups, k=k)
+        cards = cls._cards(frame)
+        return cls(ids, neighbours, cards, version=version, build_seconds=time.perf_counter() - start)
+
+    @staticmethod
+    def _cards(frame: pd.DataFrame) -> list[dict]:
+        subset = frame.reindex(columns=CARD_COLUMNS).astype(object)
+        subset = subset.where(pd.notna(subset), None)
+        subset["vehicle_id"] = frame["vehicle_id"].astype("int64").to_numpy()
+        return subset.to_dict("records")
+
+    def save(self, path: str = SIMILARITY_PATH) -> None:
+        """Writes the index to an .npz file; the version is stored so stale files are ignored."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        meta = {"version": repr(self.version), "format": INDEX_FORMAT, "build_seconds": self.build_seconds}
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            ids=self._ids,
+            neighbours=self._rows,
+            cards=np.array(json.dumps(list(self.cards.values()), default=str)),
+            meta=np.array(json.dumps(meta))
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = SIMILARITY_PATH, version=None) -> "SimilarityIndex | None":
+        """The index saved at `path`, or None when it is missing or belongs to another version or format."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta["version"] != repr(version) or meta.get("format") != INDEX_FORMAT:
+                return None
+            return cls(
+                data["ids"], data["neighbours"], json.loads(str(data["cards"])),
+                version=version, build_seconds=meta["build_seconds"]
+            )
+
+    def similar(self, vehicle_id, limit: int = 3) -> list[dict]:
+        """Cards of the `limit` vehicles closest to `vehicle_id`, nearest first."""
+        return [self.cards[v] for v in self.neighbours.get(int(vehicle_id), [])[:limit]]
+
+    def similar_many(self, cars, limit: int = 3) -> dict:
+        """Same shape as app.get_similar_cars_many; the brand half of each pair is not needed."""
+        return {int(vehicle_id): self.similar(vehicle_id, limit) for _, vehicle_id in cars}
+
+
+def load_or_build(load_frame, version, path: str | None = SIMILARITY_PATH, k: int = SIMILAR_K) -> SimilarityIndex:
+    """
+    The index for catalog `version`: read from `path` when it was saved for that version,
+    otherwise built from `load_frame()` and saved. `path=None` keeps it in memory only.
+    """
+    if path:
+        try:
+            index = SimilarityIndex.load(path, version)
+        except (OSError, ValueError, KeyError):
+            index = None
+        if index is not None and index.k >= min(k, len(index) - 1):
+            return index
+    index = SimilarityIndex.build(load_frame(), version=version, k=k)
+    if path:
+        index.save(path)
+    return index
+
+
+def main() -> None:
+    import catalog
+
+    parser = argparse.ArgumentParser(description="Build the Similar Cars index and report how long it takes")
+    parser.add_argument("--csv", default=os.path.join("data", "cars_cleaned.csv"))
+    parser.add_argument("--scale", type=int, default=1, help="Copies of the catalog to index, for timing")
+    parser.add_argument("--k", type=int, default=SIMILAR_K)
+    parser.add_argument("--output", default=None, help="Where to save the index (not saved by default)")
+    args = parser.parse_args()
+
+    base = catalog.load_from_csv(args.csv)
+    copies = []
+    for copy_no in range(args.scale):
+        copy = base.copy()
+        copy["vehicle_id"] += copy_no * len(base)
+        copies.append(copy)
+    frame = pd.concat(copies, ignore_index=True)
+
+    index = SimilarityIndex.build(frame, version=catalog.csv_version(args.csv), k=args.k)
+    print(f"Indexed {len(index):,} vehicles (k={index.k}) in {index.build_seconds:.2f}s")
+    if args.output:
+        index.save(args.output)
+        print(f"Saved to {args.output}")
+
+    sample = int(frame["vehicle_id"].iloc[0])
+    card = index.cards[sample]
+    print(f"\nMost similar to {card['variant']}:")
+    for similar in index.similar(sample, limit=5):
+        print(f"  {similar['variant']} ({similar['type']})")
+
+
+if __name__ == "__main__":
+    main()
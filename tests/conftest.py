@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app's modules live at the repository root (and the crawler's in scraping/), not in a package.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "scraping")]
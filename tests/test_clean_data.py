@@ -0,0 +1,77 @@
+import math
+
+import pandas as pd
+import pytest
+
+import clean_data
+
+# Raw scraped rows, as crawled into data/car_details.csv (unused columns left out).
+DZIRE = {
+    "brand": "maruti", "model": "maruti dzire", "variant": "maruti dzire lxi", "type": "sedan cars",
+    "price": "679000", "fuel": "petrol", "displacement": "1197 cc", "bhp": "80bhp@5700rpm",
+    "torque": "111.7Nm@4300rpm", "no_of_cylinders": "3", "transmission": "Manual", "gearbox": "5-Speed",
+    "drive_type": "FWD", "mileage": "24.79 kmpl", "capacity": "37 Litres", "front_brake": "Disc",
+    "rear_brake": "Drum", "boot_space": "382 Litres", "seating_capacity": "5", "ground_clearance": "163 mm",
+    "wheel_base": "2450 mm", "cruise_control": "Not Available", "parking_sensors": "Rear",
+    "keyLess_entry": "Yes", "engine_start/stop_button": "Not Available", "tyre_size": "165/80 R14",
+    "tyre_type": "Radial Tubeless", "LED_headlamps": "Not Available", "no_of_airbags": "6",
+    "rear_camera": "Not Available", "hill_assist": "Yes",
+    "url": "https://www.cardekho.com/overview/Maruti_Dzire/Maruti_Dzire_LXI.htm",
+}
+# The site's torque for these lost its "Nm@": "450Nm@1950-5000rpm" reads "4501950–5000Nm".
+CARRERA = DZIRE | {
+    "brand": "porsche", "model": "porsche 911", "variant": "porsche 911 carrera", "type": "coupe cars",
+    "price": "19900000", "displacement": "2981 cc", "bhp": "379.50bhp@6500rpm", "torque": "4501950–5000Nm",
+    "no_of_cylinders": "6", "transmission": "Automatic", "gearbox": "8-Speed PDK", "drive_type": "RWD",
+    "mileage": None, "url": "https://www.cardekho.com/overview/Porsche_911/Porsche_911_Carrera.htm",
+}
+# The power figure lost its unit, so the required bhp_value cannot be read.
+STRADALE = DZIRE | {
+    "brand": "ferrari", "model": "ferrari sf90 stradale", "variant": "ferrari sf90 stradale coupe v8",
+    "bhp": "769.31@7500rpm", "torque": "800Nm@6000rpm",
+    "url": "https://www.cardekho.com/overview/Ferrari_SF90_Stradale/Ferrari_SF90_Stradale_Coupe_V8.htm",
+}
+
+
+@pytest.fixture
+def cleaned():
+    raw = pd.DataFrame([DZIRE, CARRERA, STRADALE], dtype="string")
+    return clean_data.clean_chunk(raw)
+
+
+def test_known_rows_are_cleaned(cleaned):
+    clean, _, rejected = cleaned
+    assert list(clean.columns) == list(clean_data.OUTPUT_DTYPES)
+    assert rejected == 1 and list(clean["variant"]) == ["maruti dzire lxi", "porsche 911 carrera"]
+
+    dzire = clean.iloc[0].to_dict()
+    assert dzire | {
+        "price": 679000, "displacement": 1197, "no_of_cylinders": 3.0, "gearbox": 5, "mileage": 24.79,
+        "capacity": 37.0, "boot_space": 382.0, "seating_capacity": 5.0, "wheel_base": 2450.0,
+        "cruise_control": False, "keyLess_entry": True, "engine_start_stop_button": False,
+        "no_of_airbags": 6.0, "hill_assist": True, "bhp_value": 80, "bhp_rpm": 5700.0,
+        "torque_value": 111.7, "torque_rpm": 4300.0,
+    } == dzire
+
+
+def test_corrupt_torque_is_missing_not_millions(cleaned):
+    clean, report, _ = cleaned
+    carrera = clean.iloc[1]
+    assert math.isnan(carrera["torque_value"]) and math.isnan(carrera["torque_rpm"])
+    # Power still parses, and whole bhp is kept.
+    assert (carrera["bhp_value"], carrera["bhp_rpm"]) == (379, 6500.0)
+    # Gearboxes that are not a plain "N-Speed" use the sentinel.
+    assert carrera["gearbox"] == clean_data.MISSING_INT
+
+    # The Stradale's torque parsed but its row was rejected, so only the Carrera is left without one.
+    assert report.loc["torque_value"].to_dict() == {"input_nulls": 0, "rejects": 1, "output_nulls": 1}
+    assert report.loc["bhp_value"].to_dict() == {"input_nulls": 0, "rejects": 1, "output_nulls": 0}
+    assert report.loc["mileage"].to_dict() == {"input_nulls": 1, "rejects": 0, "output_nulls": 1}
+    assert report.loc["gearbox", "rejects"] == 1
+
+
+def test_output_dtypes(cleaned):
+    clean, _, _ = cleaned
+    assert clean.dtypes.astype(str).to_dict() == {
+        col: str(pd.Series(dtype=dtype).dtype) for col, dtype in clean_data.OUTPUT_DTYPES.items()
+    }
@@ -0,0 +1,111 @@
+import os
+import sqlite3
+
+import pytest
+
+import compare
+import load_catalog
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cars_cleaned.csv")
+RANKED = [("Price", "base_price", "min"), ("Mileage", "mileage", "max"), ("Type", "type", None)]
+
+
+def marks(records, rows=RANKED):
+    best, worst = compare.highlights(records, rows)
+    return best.astype(int).tolist(), worst.astype(int).tolist()
+
+
+def test_best_and_worst_follow_the_direction():
+    records = [
+        {"base_price": 700000, "mileage": 20.0, "type": "suv cars"},
+        {"base_price": 500000, "mileage": 18.5, "type": "suv cars"},
+        {"base_price": 900000, "mileage": 24.0, "type": "sedan cars"},
+    ]
+    assert marks(records) == ([[0, 1, 0], [0, 0, 1], [0, 0, 0]], [[0, 0, 1], [0, 1, 0], [0, 0, 0]])
+
+
+def test_ties_mark_every_car_that_shares_the_value():
+    records = [{"base_price": 500000, "mileage": 20}, {"base_price": 500000, "mileage": 20},
+               {"base_price": 800000, "mileage": 20}]
+    # Two cars share the lowest price; nobody wins a row where every value is equal.
+    assert marks(records, RANKED[:2]) == ([[1, 1, 0], [0, 0, 0]], [[0, 0, 1], [0, 0, 0]])
+
+
+def test_missing_values_are_never_highlighted():
+    records = [
+        {"base_price": None, "mileage": None},  # a car without any known value
+        {"base_price": 600000, "mileage": None},
+        {"base_price": 500000, "mileage": 21.0},
+    ]
+    # Mileage has a single known value, so there is nothing to compare it with.
+    assert marks(records, RANKED[:2]) == ([[0, 0, 1], [0, 0, 0]], [[0, 1, 0], [0, 0, 0]])
+    assert marks([{"base_price": None}, {"base_price": None}], RANKED[:1]) == ([[0, 0]], [[0, 0]])
+
+
+def test_feature_flags_rank_present_over_missing():
+    rows = [("Rear Camera", "rear_camera", "max")]
+    assert marks([{"rear_camera": True}, {"rear_camera": False}], rows) == ([[1, 0]], [[0, 1]])
+
+
+def test_city_rows_follow_the_base_price():
+    labels = [label for label, _, _ in compare.rows_for(["Pune", "Mumbai"])]
+    at = labels.index("Base Price (₹)")
+    assert labels[at + 1:at + 3] == ["Pune Price (₹)", "Mumbai Price (₹)"]
+    assert len(labels) == len(compare.ROWS) + 2
+
+
+def test_unknown_city_is_refused():
+    with pytest.raises(ValueError):
+        compare.compare_query([1], ["Pune", "Atlantis`"])
+
+
+@pytest.fixture(scope="module")
+def database():
+    """The first rows of the catalog in SQLite tables laid out like the MySQL ones."""
+    frame = load_catalog.assign_ids(load_catalog.read_catalog(CSV).head(6), {})
+    frame.loc[2, "Pune"] = None
+    conn = sqlite3.connect(":memory:")
+    for table, rows in load_catalog.table_rows(frame).items():
+        columns = load_catalog.TABLE_COLUMNS[table]
+        conn.execute(f"CREATE TABLE {table} ({', '.join(f'`{col}`' for col in columns)})")
+        conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})", rows)
+    yield conn, frame
+    conn.close()
+
+
+def run(conn, sql, params):
+    cursor = conn.execute(sql.replace("%s", "?"), params)
+    names = [d[0] for d in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+@pytest.mark.parametrize("wide", [False, True])
+def test_compare_query_has_one_price_column_per_city(database, wide):
+    conn, frame = database
+    ids = [5, 3, 1]
+    sql, params = compare.compare_query(ids, ["Pune", "Mumbai"], wide=wide)
+    records = compare.order_records(run(conn, sql, params), ids)
+
+    assert [r["vehicle_id"] for r in records] == ids
+    assert list(records[0])[-2:] == ["Pune", "Mumbai"]
+    for record in records:
+        source = frame.loc[frame["vehicle_id"] == record["vehicle_id"]].iloc[0]
+        assert record["base_price"] == source["price"] and record["Mumbai"] == source["Mumbai"]
+    # A car not sold in a city has no price there.
+    assert records[1]["Pune"] is None and records[0]["Pune"] == frame.loc[4, "Pune"]
+
+
+def test_both_layouts_return_the_same_cars(database):
+    conn, _ = database
+    narrow, wide = (
+        run(conn, *compare.compare_query([2, 4, 6], ["Chennai"], wide=w)) for w in (False, True)
+    )
+    assert sorted(narrow, key=lambda r: r["vehicle_id"]) == sorted(wide, key=lambda r: r["vehicle_id"])
+
+
+def test_query_text_depends_on_cities_not_exact_ids():
+    assert compare.compare_query([1, 2, 3], ["Pune"])[0] == compare.compare_query([7, 8, 9, 10], ["Pune"])[0]
+    assert compare.compare_query([1, 2, 3], ["Pune"])[0] != compare.compare_query([1, 2, 3], ["Patna"])[0]
+    sql, params = compare.compare_query([1, 2, 3], ["Pune", "Patna"])
+    assert params[:2] == ("Pune", "Patna") and sql.count("LEFT JOIN Price") == 2
+    assert params[2:] == (1, 2, 3, 3)
@@ -0,0 +1,49 @@
+import os
+
+import pandas as pd
+import pytest
+
+import catalog
+import facets
+from filters import FilterState, build_filters_query, build_search_query
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cars_cleaned.csv")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Twenty catalog rows, the first turned into an electric car without a displacement."""
+    frame = pd.read_csv(CSV).head(20)
+    frame["displacement"] = frame["displacement"].astype("float64")
+    frame.loc[0, ["fuel", "displacement"]] = ["electric", None]
+    path = tmp_path / "cars.csv"
+    frame.to_csv(path, index=False)
+    return catalog.CatalogEngine(catalog.load_from_csv(str(path)))
+
+
+def test_untouched_slider_keeps_rows_without_a_value(engine):
+    cube = facets.FacetCatalog(facets.cube_from_frame(engine.frame))
+    span = facets.slider_span(cube.bounds("displacement"))
+    assert facets.range_filter(span, span) is None
+
+    state = FilterState.create(displacement_range=facets.range_filter(span, span))
+    assert engine.count(state) == 20
+    for build in (build_filters_query, build_search_query):
+        assert "displacement BETWEEN" not in build(state)[0]
+
+    # A BETWEEN over the full span would still drop the electric car.
+    assert engine.count(FilterState.create(displacement_range=span)) == 19
+
+
+def test_narrowed_slider_filters(engine):
+    cube = facets.FacetCatalog(facets.cube_from_frame(engine.frame))
+    lo, hi = facets.slider_span(cube.bounds("displacement"))
+    narrowed = facets.range_filter((lo, hi - 1), (lo, hi))
+    assert narrowed == (lo, hi - 1)
+    assert "displacement BETWEEN" in build_filters_query(FilterState.create(displacement_range=narrowed))[0]
+
+
+def test_slider_span_is_whole_and_never_empty():
+    assert facets.slider_span((796.0, 1197.5)) == (796, 1198)
+    assert facets.slider_span((350000.0, 880000.0), scale=100000) == (3, 9)
+    assert facets.slider_span((12.0, 12.0)) == (12, 13)
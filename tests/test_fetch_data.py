@@ -0,0 +1,75 @@
+import json
+import types
+
+import pytest
+
+import fetch_data
+
+STATE = {
+    "variant": "Nexon {Creative+} };",
+    "specs": [{"name": "Boot Space", "value": "382 L"}, {"name": "Note", "value": "}}}{"}],
+    "quote": 'the "Dark" edition }',
+    "path": "C:\\temp\\",
+}
+
+
+def page(state_json: str, before: str = "", after: str = "") -> str:
+    return (
+        "<html><head><script>var x = {a: 1};</script></head><body>"
+        f"<script>{before}window.__INITIAL_STATE__ = {state_json};{after}</script>"
+        "<script>window.other = {\"b\": \"}\"};</script></body></html>"
+    )
+
+
+def response(html: str):
+    return types.SimpleNamespace(content=html.encode("utf-8"), text=html)
+
+
+def test_braces_and_terminators_inside_strings():
+    assert fetch_data.extract_initial_state(page(json.dumps(STATE))) == STATE
+
+
+def test_escaped_quotes_and_backslashes():
+    raw = r'{"a": "\"}", "b": "\\", "c": {"d": "\\\"{"}}'
+    assert fetch_data.extract_initial_state(page(raw)) == json.loads(raw)
+
+
+def test_bytes_and_text_pages_agree():
+    html = page(json.dumps(STATE), after=" window.__LATER__ = 1;")
+    assert fetch_data.extract_initial_state(html.encode("utf-8")) == fetch_data.extract_initial_state(html) == STATE
+
+
+def test_matches_the_soup_extraction_on_a_plain_page():
+    state = {"variant": "Swift LXi", "price": 649000}
+    html = page(json.dumps(state))
+    assert fetch_data.extract_initial_state(html) == fetch_data.extract_initial_state_soup(html) == state
+
+
+@pytest.mark.parametrize("html", [
+    "<html><script>window.__OTHER__ = {\"a\": 1};</script></html>",  # no marker
+    page("JSON.parse('{}')"),  # not an object literal
+    '<script>window.__INITIAL_STATE__ = {"a": "unterminated}',  # cut off
+    page('{"a": 1,}'),  # not valid JSON
+])
+def test_unusable_state_is_none(html):
+    assert fetch_data.extract_initial_state(html) is None
+
+
+def test_page_without_the_state_falls_back_to_soup(monkeypatch):
+    calls = []
+    def soup(text):
+        calls.append(text)
+        return {"from": "soup"}
+
+    monkeypatch.setattr(fetch_data, "extract_initial_state_soup", soup)
+    html = "<html><script>window.__OTHER__ = {};</script></html>"
+    assert fetch_data.parse_page(response(html)) == {"from": "soup"}
+    assert calls == [html]
+
+    # The scanner's result is used as is, without parsing the page again.
+    assert fetch_data.parse_page(response(page(json.dumps(STATE)))) == STATE
+    assert len(calls) == 1
+
+
+def test_page_without_any_state_is_none():
+    assert fetch_data.parse_page(response("<html><body>Not found</body></html>")) is None
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from mysql.connector.conversion import MySQLConverter
+
+import catalog
+from filters import FilterState, build_count_query, build_filters_query, build_search_query, page_cursor
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cars_cleaned.csv")
+# Rows of the fixture that have no mileage.
+NO_MILEAGE = [2, 5, 11]
+
+
+def listing_row():
+    """A listing row as the app holds it: a DataFrame row of NumPy scalars."""
+    frame = pd.DataFrame({"vehicle_id": [7, 8], "brand": ["maruti", "tata"], "price": [650000.0, 700000.0],
+                          "bhp_value": [79, 88], "mileage": [21.5, 19.0]})
+    row = frame.iloc[-1]
+    assert type(row["bhp_value"]).__name__ == "int64"
+    return row
+
+
+def test_page_cursor_is_plain_python():
+    state = FilterState.create(sort_by="BHP")
+    is_null, value, vehicle_id = page_cursor(state, listing_row())
+    assert (is_null, value, vehicle_id) == (False, 88.0, 8)
+    assert type(value) is float and type(vehicle_id) is int
+
+
+def test_page_cursor_flags_a_missing_sort_value():
+    state = FilterState.create(sort_by="Mileage")
+    for missing in (None, np.nan):
+        assert page_cursor(state, {"vehicle_id": np.int64(8), "mileage": missing}) == (True, None, 8)
+
+
+def test_next_page_params_bind_in_mysql():
+    converter = MySQLConverter()
+    for sort_by in ("Price", "BHP", "Mileage"):
+        state = FilterState.create(city="Pune", brands=["Tata"], sort_by=sort_by)
+        after = page_cursor(state, listing_row())
+        for build in (build_filters_query, build_search_query):
+            _, params = build(state, limit=10, after=after)
+            for param in params:
+                converter.to_mysql(param)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Twenty catalog rows, a few of them without a mileage."""
+    frame = pd.read_csv(CSV).head(20)
+    frame.loc[NO_MILEAGE, "mileage"] = None
+    path = tmp_path / "cars.csv"
+    frame.to_csv(path, index=False)
+    return catalog.CatalogEngine(catalog.load_from_csv(str(path)))
+
+
+@pytest.fixture
+def search_table(engine):
+    """The fixture rows as an SQLite vehicle_search table, to run the wide listing query against."""
+    conn = sqlite3.connect(":memory:")
+    columns = ["vehicle_id", "brand", "model", "variant", "type", "image_link", "fuel", "displacement",
+               "bhp_value", "torque_value", "mileage", "seating_capacity", "transmission", "base_price"]
+    frame = engine.frame[columns].astype(object)
+    frame.where(pd.notna(frame), None).to_sql("vehicle_search", conn, index=False)
+    yield conn
+    conn.close()
+
+
+def sql_pages(conn, state, size):
+    """Every page of the wide listing query, following page_cursor from one page to the next."""
+    pages, after = [], None
+    while True:
+        query, params = build_search_query(state, limit=size, after=after)
+        cursor = conn.execute(query.replace("%s", "?"), params)
+        names = [d[0] for d in cursor.description]
+        rows = [dict(zip(names, values)) for values in cursor.fetchall()]
+        if not rows:
+            return pages
+        pages.append([row["vehicle_id"] for row in rows])
+        after = page_cursor(state, rows[-1])
+
+
+def engine_pages(engine, state, size):
+    pages, after = [], None
+    while len(page := engine.search(state, limit=size, after=after)):
+        pages.append(page["vehicle_id"].tolist())
+        after = page_cursor(state, page.iloc[-1])
+    return pages
+
+
+@pytest.mark.parametrize("sort_by", ["Price", "BHP", "Mileage"])
+def test_count_does_not_depend_on_the_sort(engine, sort_by):
+    state = FilterState.create(sort_by=sort_by)
+    assert engine.count(state) == 20
+    assert "IS NOT NULL" not in build_count_query(state, wide=True)[0]
+
+
+@pytest.mark.parametrize("size", [3, 7])
+def test_rows_without_mileage_come_last(engine, search_table, size):
+    state = FilterState.create(sort_by="Mileage")
+    missing = set(engine.frame["vehicle_id"].iloc[NO_MILEAGE])
+
+    pages = engine_pages(engine, state, size)
+    listed = [vehicle_id for page in pages for vehicle_id in page]
+    assert sorted(listed) == sorted(engine.frame["vehicle_id"])
+    assert set(listed[-len(missing):]) == missing
+    assert sql_pages(search_table, state, size) == pages
@@ -0,0 +1,202 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import crawler
+import http_cache
+
+LAST_MODIFIED = "Wed, 01 Oct 2025 08:00:00 GMT"
+
+
+class StubSite:
+    """A local HTTP server answering conditional GETs for a few pages and recording the request headers."""
+
+    def __init__(self) -> None:
+        self.pages = {}
+        self.errors = {}
+        self.requests = []
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests.append((self.path, dict(self.headers)))
+                if self.path in site.errors:
+                    self.send_error(site.errors[self.path])
+                    return
+                if self.path not in site.pages:
+                    self.send_error(404)
+                    return
+                etag, state = site.pages[self.path]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                body = f"<html><script>window.__INITIAL_STATE__ = {json.dumps(state)};</script></html>".encode()
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", LAST_MODIFIED)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def headers_of(self, path: str) -> list[dict]:
+        return [headers for requested, headers in self.requests if requested == path]
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site():
+    stub = StubSite()
+    yield stub
+    stub.close()
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "http_cache.sqlite")
+
+
+def crawl_run(cache_path, site, model, variants):
+    """One crawl run: the model page, then each variant listed on it."""
+    cache = http_cache.HttpCache(cache_path)
+    cache.fetch_state(site.url(model), 'model')
+    statuses = {
+        variant: cache.fetch_state(site.url(variant), 'variant', model_url=site.url(model))[1]
+        for variant in variants
+    }
+    return cache, statuses
+
+
+def test_second_run_sends_validators_and_counts_unchanged(site, cache_path):
+    site.pages["/swift.htm"] = ('"v1"', {"variant": "swift lxi"})
+
+    first = http_cache.HttpCache(cache_path)
+    state, status, row = first.fetch_state(site.url("/swift.htm"), 'variant')
+    assert (state, status, row) == ({"variant": "swift lxi"}, http_cache.NEW, None)
+    first.store_row(site.url("/swift.htm"), {"variant": "swift lxi", "price": 1})
+    first.close()
+
+    second = http_cache.HttpCache(cache_path)
+    state, status, row = second.fetch_state(site.url("/swift.htm"), 'variant')
+    headers = site.headers_of("/swift.htm")[-1]
+    assert headers["If-None-Match"] == '"v1"'
+    assert headers["If-Modified-Since"] == LAST_MODIFIED
+    assert (state, status, row) == ({"variant": "swift lxi"}, http_cache.UNCHANGED, {"variant": "swift lxi", "price": 1})
+    assert second.report() == {"new": 0, "changed": 0, "unchanged": 1, "removed": 0}
+    second.close()
+
+
+def test_new_content_is_changed_and_drops_the_cached_row(site, cache_path):
+    site.pages["/swift.htm"] = ('"v1"', {"price": 1})
+    first = http_cache.HttpCache(cache_path)
+    first.fetch_state(site.url("/swift.htm"), 'variant')
+    first.store_row(site.url("/swift.htm"), {"price": 1})
+    first.close()
+
+    site.pages["/swift.htm"] = ('"v2"', {"price": 2})
+    second = http_cache.HttpCache(cache_path)
+    assert second.fetch_state(site.url("/swift.htm"), 'variant') == ({"price": 2}, http_cache.CHANGED, None)
+    assert second.lookup(site.url("/swift.htm"))["row"] is None
+    second.close()
+
+
+def test_removed_lists_variants_missing_from_a_fetched_model(site, cache_path):
+    site.pages["/swift"] = ('"m1"', {"model": "swift"})
+    for variant in ("/swift/lxi.htm", "/swift/vxi.htm"):
+        site.pages[variant] = ('"v1"', {"variant": variant})
+    cache, statuses = crawl_run(cache_path, site, "/swift", ["/swift/lxi.htm", "/swift/vxi.htm"])
+    assert set(statuses.values()) == {http_cache.NEW}
+    cache.close()
+
+    del site.pages["/swift/vxi.htm"]
+    cache, statuses = crawl_run(cache_path, site, "/swift", ["/swift/lxi.htm"])
+    assert statuses == {"/swift/lxi.htm": http_cache.UNCHANGED}
+    assert cache.removed() == [site.url("/swift/vxi.htm")]
+    assert cache.report()["removed"] == 1
+    cache.close()
+
+
+def test_removed_ignores_models_not_crawled_this_run(site, cache_path):
+    site.pages["/swift"] = ('"m1"', {"model": "swift"})
+    site.pages["/swift/lxi.htm"] = ('"v1"', {"variant": "lxi"})
+    crawl_run(cache_path, site, "/swift", ["/swift/lxi.htm"])[0].close()
+
+    # A resumed run skips models that were already completed.
+    cache = http_cache.HttpCache(cache_path)
+    assert cache.removed() == []
+    cache.close()
+
+
+def test_failed_variant_is_not_removed(site, cache_path):
+    site.pages["/swift"] = ('"m1"', {"model": "swift"})
+    site.pages["/swift/lxi.htm"] = ('"v1"', {"variant": "lxi"})
+    crawl_run(cache_path, site, "/swift", ["/swift/lxi.htm"])[0].close()
+
+    cache = http_cache.HttpCache(cache_path)
+    cache.fetch_state(site.url("/swift"), 'model')
+
+    class Unreachable:
+        def get(self, url, **kwargs):
+            raise ConnectionError(url)
+
+    status, cause = crawler.fetch_variant(
+        site.url("/swift/lxi.htm"), session=Unreachable(), cache=cache, model_url=site.url("/swift")
+    )
+    assert status == 'failed' and isinstance(cause, ConnectionError)
+    assert cache.removed() == []
+    cache.close()
+
+
+@pytest.mark.parametrize("code", [404, 500, 503])
+def test_error_response_keeps_the_cached_page(site, cache_path, code):
+    site.pages["/swift"] = ('"m1"', {"model": "swift"})
+    site.pages["/swift/lxi.htm"] = ('"v1"', {"variant": "lxi"})
+    cache, _ = crawl_run(cache_path, site, "/swift", ["/swift/lxi.htm"])
+    cache.store_row(site.url("/swift/lxi.htm"), {"variant": "lxi", "price": 1})
+    stored = cache.lookup(site.url("/swift/lxi.htm"))
+    cache.close()
+
+    site.errors["/swift/lxi.htm"] = code
+    cache, statuses = crawl_run(cache_path, site, "/swift", ["/swift/lxi.htm"])
+    assert statuses == {"/swift/lxi.htm": http_cache.CHANGED}
+    entry = cache.lookup(site.url("/swift/lxi.htm"))
+    assert {k: entry[k] for k in ("etag", "content_hash", "state", "row")} == \
+        {k: stored[k] for k in ("etag", "content_hash", "state", "row")}
+    assert cache.removed() == []
+    cache.close()
+
+    # Once the page is back, the stored validators still apply.
+    del site.errors["/swift/lxi.htm"]
+    cache = http_cache.HttpCache(cache_path)
+    state, status, row = cache.fetch_state(site.url("/swift/lxi.htm"), 'variant')
+    assert (state, status, row) == ({"variant": "lxi"}, http_cache.UNCHANGED, {"variant": "lxi", "price": 1})
+    cache.close()
+
+
+def test_failed_model_page_does_not_remove_its_variants(site, cache_path):
+    site.pages["/swift"] = ('"m1"', {"model": "swift"})
+    site.pages["/swift/lxi.htm"] = ('"v1"', {"variant": "lxi"})
+    crawl_run(cache_path, site, "/swift", ["/swift/lxi.htm"])[0].close()
+
+    site.errors["/swift"] = 500
+    cache = http_cache.HttpCache(cache_path)
+    assert cache.fetch_state(site.url("/swift"), 'model') == (None, http_cache.CHANGED, None)
+    assert cache.lookup(site.url("/swift"))["state"] is not None
+    assert cache.removed() == []
+    cache.close()
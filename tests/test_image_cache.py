@@ -0,0 +1,99 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+import image_cache
+
+
+def png(width: int = 800, height: int = 400, color=(200, 30, 30)) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(out, format="PNG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def fixture_png(tmp_path):
+    path = tmp_path / "car.png"
+    path.write_bytes(png())
+    return str(path)
+
+
+def size_of(data: bytes) -> tuple[int, int]:
+    with Image.open(io.BytesIO(data)) as image:
+        return image.size
+
+
+def test_thumbnails_keep_aspect_ratio_and_never_upscale():
+    thumbnails = image_cache.make_thumbnails(png(800, 400), widths=(150, 600, 1000), image_format="JPEG")
+    assert size_of(thumbnails[150]) == (150, 75)
+    assert size_of(thumbnails[600]) == (600, 300)
+    assert size_of(thumbnails[1000]) == (800, 400)
+
+
+def test_miss_writes_every_width_then_hits(tmp_path, fixture_png):
+    fetched = []
+    def fetcher(url):
+        fetched.append(url)
+        return image_cache.fetch(url)
+
+    cache = image_cache.ImageCache(directory=str(tmp_path / "thumbs"), fetcher=fetcher)
+    thumbnail = cache.thumbnail(fixture_png, 250)
+    assert size_of(thumbnail) == (250, 125)
+    assert cache.stats.misses == 1 and cache.stats.files == len(image_cache.THUMB_WIDTHS)
+
+    # Other widths were written by the same download.
+    assert size_of(cache.thumbnail(fixture_png, 600)) == (600, 300)
+    assert cache.thumbnail(fixture_png, 250) == thumbnail
+    assert fetched == [fixture_png]
+    assert cache.stats.hits == 2
+
+
+def test_cache_is_reloaded_from_disk(tmp_path, fixture_png):
+    directory = str(tmp_path / "thumbs")
+    image_cache.ImageCache(directory=directory).thumbnail(fixture_png, 150)
+
+    reopened = image_cache.ImageCache(directory=directory, fetcher=pytest.fail)
+    assert reopened.stats.files == len(image_cache.THUMB_WIDTHS)
+    assert reopened.thumbnail(fixture_png, 150) is not None
+    assert reopened.stats.hits == 1
+
+
+def test_least_recently_used_thumbnails_are_evicted(tmp_path):
+    sources = []
+    for i, color in enumerate([(255, 0, 0), (0, 255, 0), (0, 0, 255)]):
+        path = tmp_path / f"car{i}.png"
+        path.write_bytes(png(color=color))
+        sources.append(str(path))
+
+    probe = image_cache.ImageCache(directory=str(tmp_path / "probe"))
+    probe.thumbnail(sources[0], 150)
+    per_image = probe.stats.bytes
+
+    # Room for about two and a half images' thumbnails.
+    cache = image_cache.ImageCache(directory=str(tmp_path / "thumbs"), max_bytes=int(per_image * 2.5))
+    cache.thumbnail(sources[0], 150)
+    cache.thumbnail(sources[1], 150)
+    cache.thumbnail(sources[0], 150)  # only this width of source 0 is used again
+    cache.thumbnail(sources[2], 150)
+
+    # Eviction is per thumbnail: the unused widths of source 0 were the least recently used files.
+    assert cache.stats.evictions == 3
+    assert cache.stats.bytes <= cache.max_bytes
+    assert [w for w in image_cache.THUMB_WIDTHS if cache.contains(sources[0], w)] == [150]
+    assert all(cache.contains(source, w) for source in sources[1:] for w in image_cache.THUMB_WIDTHS)
+    assert sorted(os.listdir(cache.directory)) == sorted(cache.files)
+
+
+def test_failed_download_returns_none_and_is_not_retried_at_once(tmp_path):
+    calls = []
+    def fetcher(url):
+        calls.append(url)
+        raise OSError("unreachable")
+
+    cache = image_cache.ImageCache(directory=str(tmp_path / "thumbs"), fetcher=fetcher)
+    assert cache.thumbnail("https://example.invalid/car.jpg", 150) is None
+    assert cache.thumbnail("https://example.invalid/car.jpg", 150) is None
+    assert calls == ["https://example.invalid/car.jpg"]
+    assert cache.stats.failures == 1
@@ -0,0 +1,75 @@
+import os
+
+import pandas as pd
+import pytest
+
+import load_catalog
+import schema
+from filters import CITIES
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cars_cleaned.csv")
+
+
+@pytest.fixture
+def frame():
+    """Three catalog rows: one priced in every city, one in two cities, one in none."""
+    frame = load_catalog.assign_ids(load_catalog.read_catalog(CSV).head(3), {})
+    frame.loc[1, [c for c in CITIES if c not in ("Pune", "Mumbai")]] = None
+    frame.loc[2, CITIES] = None
+    return frame
+
+
+def test_city_prices_are_unpivoted(frame):
+    prices = load_catalog.table_rows(frame)["Price"]
+    assert [(vehicle_id, city) for vehicle_id, city, _ in prices] == (
+        [(1, city) for city in sorted(CITIES)] + [(2, "Mumbai"), (2, "Pune")]
+    )
+    assert (2, "Pune", frame.loc[1, "Pune"]) in prices
+    assert all(price is not None for _, _, price in prices)
+
+
+def test_wide_table_renames_the_base_price(frame):
+    rows = load_catalog.table_rows(frame)
+    columns = load_catalog.TABLE_COLUMNS[schema.SEARCH_TABLE]
+    search = [dict(zip(columns, row)) for row in rows[schema.SEARCH_TABLE]]
+    assert "price" not in columns
+    assert [row["base_price"] for row in search] == list(frame["price"])
+    assert [row["base_price"] for row in search] == [row[5] for row in rows["Vehicle"]]
+    # City prices stay columns of the wide table, NULL where the car is not sold.
+    assert search[1]["Pune"] == frame.loc[1, "Pune"] and search[1]["Chennai"] is None
+    assert all(search[2][city] is None for city in CITIES)
+
+
+def test_rows_hold_plain_values_and_nulls(frame):
+    frame.loc[0, "mileage"] = float("nan")
+    performance = load_catalog.table_rows(frame)["Performance"]
+    assert performance[0][1] is None
+    assert all(len(row) == len(load_catalog.TABLE_COLUMNS["Performance"]) for row in performance)
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+    def close(self):
+        pass
+
+
+def test_swap_drops_leftover_tables_children_first():
+    conn = RecordingConnection()
+    names = ["Vehicle", "Engine", "Price"]
+    load_catalog.swap_tables(conn, names, tables={"Vehicle", "Engine", "Price", "Engine_old"})
+    rename = next(i for i, sql in enumerate(conn.statements) if sql.startswith("RENAME TABLE"))
+    drops = [f"DROP TABLE IF EXISTS {table}_old" for table in reversed(names)]
+    assert conn.statements[:rename] == drops
+    assert conn.statements[rename] == (
+        "RENAME TABLE Vehicle TO Vehicle_old, Engine TO Engine_old, Price TO Price_old, "
+        "Vehicle_staging TO Vehicle, Engine_staging TO Engine, Price_staging TO Price"
+    )
+    assert conn.statements[rename + 1:] == drops
@@ -0,0 +1,104 @@
+import sqlite3
+
+import mysql.connector
+import pytest
+
+import query_builder
+
+
+@pytest.mark.parametrize("count, size", [(1, 1), (2, 2), (3, 4), (4, 4), (5, 8), (9, 16)])
+def test_in_list_pads_to_a_power_of_two(count, size):
+    placeholders, params = query_builder.in_list(range(count))
+    assert placeholders.count("%s") == len(params) == size
+    assert params[:count] == tuple(range(count)) and set(params[count:]) <= {count - 1}
+
+
+def test_in_list_needs_a_value():
+    with pytest.raises(ValueError):
+        query_builder.in_list([])
+
+
+def test_padded_and_unpadded_lists_match_the_same_rows():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE Vehicle (vehicle_id INTEGER PRIMARY KEY, brand TEXT)")
+    conn.executemany("INSERT INTO Vehicle VALUES (?, ?)", [(i, f"brand{i % 7}") for i in range(1, 101)])
+
+    for ids in ([5], [5, 9, 40], [1, 2, 3, 4, 5], list(range(3, 90, 7))):
+        for column, values in (("vehicle_id", ids), ("brand", [f"brand{i % 7}" for i in ids])):
+            placeholders, padded = query_builder.in_list(values)
+            exact = ", ".join(["?"] * len(values))
+            sql = "SELECT vehicle_id FROM Vehicle WHERE {} IN ({}) ORDER BY vehicle_id"
+            assert conn.execute(sql.format(column, placeholders.replace("%s", "?")), padded).fetchall() == \
+                conn.execute(sql.format(column, exact), values).fetchall()
+
+
+def test_similar_shapes_share_one_sql_text():
+    sqls = set()
+    for values in (["a", "b", "c"], ["d", "e", "f", "g"]):
+        params = []
+        sqls.add(query_builder.in_clause("v.brand", values, params))
+    assert len(sqls) == 1
+
+
+class FakeCursor:
+    def __init__(self, conn, prepared):
+        self.conn, self.prepared, self.closed = conn, prepared, False
+
+    def execute(self, sql, params):
+        if self.conn.failures:
+            self.conn.failures -= 1
+            raise mysql.connector.Error("statement lost")
+        self.conn.executed.append((self.prepared, sql, params))
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed, self.cursors, self.failures = [], [], 0
+
+    def cursor(self, prepared=False, dictionary=False):
+        cursor = FakeCursor(self, prepared)
+        self.cursors.append(cursor)
+        return cursor
+
+
+def test_statements_are_prepared_once_per_connection():
+    cache, conn = query_builder.StatementCache(per_connection=8), FakeConnection()
+    for params in ((1,), (2,), (3,)):
+        assert cache.fetch_all(conn, "SELECT %s", params) == [(1,)]
+    assert len(conn.cursors) == 1 and all(prepared for prepared, _, _ in conn.executed)
+    assert (cache.stats.prepared, cache.stats.reused) == (1, 2)
+
+    other = FakeConnection()
+    cache.fetch_all(other, "SELECT %s", (4,))
+    assert cache.stats.prepared == 2
+
+
+def test_least_recently_used_statement_is_closed():
+    cache, conn = query_builder.StatementCache(per_connection=2), FakeConnection()
+    for sql in ("A", "B", "A", "C"):
+        cache.fetch_all(conn, sql)
+    closed = [cursor for cursor in conn.cursors if cursor.closed]
+    assert len(closed) == 1 and cache.stats.evicted == 1
+    cache.fetch_all(conn, "A")
+    assert cache.stats.reused == 2
+
+
+def test_lost_statement_is_prepared_again_once():
+    cache, conn = query_builder.StatementCache(), FakeConnection()
+    cache.fetch_all(conn, "A", (1,))
+    conn.failures = 1
+    assert cache.fetch_all(conn, "A", (2,)) == [(1,)]
+    assert cache.stats.retries == 1 and len(conn.cursors) == 2
+
+
+def test_disabled_cache_runs_plain_queries():
+    cache, conn = query_builder.StatementCache(enabled=False), FakeConnection()
+    cache.fetch_all(conn, "A", [1])
+    assert conn.executed == [(False, "A", (1,))] and conn.cursors[0].closed
+    assert cache.stats.plain == 1
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+import catalog
+import facets
+import query_parser
+from filters import FilterState
+
+CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cars_cleaned.csv")
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return catalog.CatalogEngine(catalog.load_from_csv(CSV))
+
+
+@pytest.fixture(scope="module")
+def vocabulary(engine):
+    return query_parser.Vocabulary(facets.FacetCatalog(facets.cube_from_frame(engine.frame)))
+
+
+def parse(question, vocabulary):
+    return query_parser.parse_question(question, vocabulary)
+
+
+def test_every_constraint_of_a_question(vocabulary):
+    state = parse("7 seater automatic diesel SUVs under 20 lakh in Pune", vocabulary)
+    assert state == FilterState.create(
+        types=["suv cars"], fuels=["diesel"], transmissions=["Automatic"], seating=[7],
+        price_range=(0, 20 * query_parser.LAKH), city="Pune",
+    )
+
+
+def test_words_map_onto_catalog_values(vocabulary):
+    assert parse("electric hatchbacks", vocabulary) == FilterState.create(
+        fuels=["electric(battery)"], types=["hatchback cars"]
+    )
+    assert parse("suzuki or mercedes cars", vocabulary).brands == ("maruti", "mercedes-benz")
+    assert parse("land rover suvs above 1 crore", vocabulary) == FilterState.create(
+        brands=["land rover"], types=["suv cars"], price_range=(100 * query_parser.LAKH, query_parser.NO_MAX_PRICE)
+    )
+    assert parse("pickup trucks", vocabulary).types == ("pickup trucks",)
+
+
+def test_parsed_question_finds_the_same_cars_as_the_filters_page(engine, vocabulary):
+    state = parse("cheapest tata evs in Mumbai", vocabulary)
+    assert state.sort_by == "Price"
+    results = engine.search(state, limit=query_parser.RESULT_LIMIT)
+    assert len(results) and set(results["brand"]) == {"tata"}
+    same = FilterState.create(city="Mumbai", brands=["tata"], fuels=["electric(battery)"])
+    assert results.equals(engine.search(same, limit=query_parser.RESULT_LIMIT))
+
+
+def test_vocabulary_follows_the_catalog(engine):
+    # A catalog without Mercedes does not understand the brand or its aliases.
+    frame = engine.frame[engine.frame["brand"] != "mercedes-benz"]
+    narrow = query_parser.Vocabulary(facets.FacetCatalog(facets.cube_from_frame(frame)))
+    assert parse("mercedes sedans", narrow) is None
+    assert parse("benz sedans", narrow) is None
+    assert parse("tata sedans", narrow).brands == ("tata",)
+
+
+@pytest.mark.parametrize("question", [
+    "fun family cars under 10 lakh",  # an unknown word
+    "cars with good boot space",
+    "suvs under 500",  # a bare number that is not plainly rupees
+    "show me cars",  # no constraint at all
+    "suvs in pune or mumbai",  # two cities
+])
+def test_unsure_questions_are_left_to_the_llm(vocabulary, question):
+    assert parse(question, vocabulary) is None
+
+
+def test_describe(vocabulary):
+    state = parse("7 seater automatic diesel SUVs between 10 and 20 lakh in Pune", vocabulary)
+    assert query_parser.describe(state) == (
+        "suv cars, diesel, Automatic, 7 seater, ₹10–20 lakh, in Pune, sorted by Price"
+    )
+    assert query_parser.describe(parse("best mileage hyundai under 8.5 lakh", vocabulary)) == (
+        "hyundai, under ₹8.5 lakh, sorted by Mileage"
+    )
+    assert query_parser.describe(parse("most powerful bmw above 1 crore", vocabulary)) == (
+        "bmw, above ₹100 lakh, sorted by BHP"
+    )
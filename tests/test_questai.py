@@ -0,0 +1,127 @@
+import itertools
+import types
+
+import pytest
+
+import questai
+
+SUV_SQL = "SELECT * FROM Vehicle WHERE type = 'SUV Cars' AND price < 1000000;"
+
+
+class StubModel:
+    """Stands in for Gemini: answers every prompt with one fenced SQL statement."""
+
+    def __init__(self, sql: str = SUV_SQL) -> None:
+        self.sql = sql
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return types.SimpleNamespace(text=f"```sql\n{self.sql}\n```")
+
+
+@pytest.fixture
+def model():
+    return StubModel()
+
+
+@pytest.fixture
+def get_model(model):
+    """A get_model callable that counts how often the model is set up."""
+    def get():
+        get.calls += 1
+        return model
+    get.calls = 0
+    return get
+
+
+@pytest.fixture
+def cache(tmp_path):
+    sql_cache = questai.SqlCache(path=str(tmp_path / "questai.sqlite"), maxsize=10, fuzzy=0.8)
+    yield sql_cache
+    sql_cache.close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time() for the cache, so LRU order never ties."""
+    ticks = itertools.count(1_000)
+    monkeypatch.setattr(questai, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def test_first_question_asks_the_model(cache, get_model, model):
+    assert questai.convert_to_sql("SUVs under 10 lakhs", get_model, cache=cache) == (SUV_SQL + "\n", "llm")
+    assert get_model.calls == 1
+    assert model.prompts[0].endswith('"SUVs under 10 lakhs"\n')
+
+
+def test_exact_hit_after_normalisation(cache, get_model):
+    questai.convert_to_sql("SUVs under 10 lakhs", get_model, cache=cache)
+    sql, source = questai.convert_to_sql("  suvs under 10.0 Lakh?", get_model, cache=cache)
+    assert (sql, source) == (SUV_SQL + "\n", "cache")
+    assert get_model.calls == 1
+
+
+def test_fuzzy_hit_with_the_same_numbers(cache, get_model):
+    questai.convert_to_sql("show me SUV cars under 10 lakh", get_model, cache=cache)
+    sql, source = questai.convert_to_sql("find suvs under 10 lakh", get_model, cache=cache)
+    assert (sql, source) == (SUV_SQL + "\n", "fuzzy")
+    assert get_model.calls == 1
+
+
+def test_different_numbers_never_match(cache, get_model, model):
+    questai.convert_to_sql("SUVs under 10 lakh", get_model, cache=cache)
+    model.sql = "SELECT * FROM Vehicle WHERE type = 'SUV Cars' AND price < 2000000;"
+    sql, source = questai.convert_to_sql("SUVs under 20 lakh", get_model, cache=cache)
+    assert source == "llm" and "2000000" in sql
+    assert get_model.calls == 2
+
+
+def test_fuzzy_matching_can_be_disabled(tmp_path, get_model):
+    cache = questai.SqlCache(path=str(tmp_path / "exact.sqlite"), fuzzy=0)
+    questai.convert_to_sql("show me SUV cars under 10 lakh", get_model, cache=cache)
+    assert questai.convert_to_sql("find suvs under 10 lakh", get_model, cache=cache)[1] == "llm"
+    assert get_model.calls == 2
+    cache.close()
+
+
+def test_least_recently_used_question_is_evicted(tmp_path, get_model, clock):
+    cache = questai.SqlCache(path=str(tmp_path / "lru.sqlite"), maxsize=2, fuzzy=0)
+    questai.convert_to_sql("sedans under 5 lakh", get_model, cache=cache)
+    questai.convert_to_sql("hatchbacks under 6 lakh", get_model, cache=cache)
+    # Using the first question makes the second one the least recently used.
+    assert questai.convert_to_sql("sedans under 5 lakh", get_model, cache=cache)[1] == "cache"
+    questai.convert_to_sql("mpvs under 9 lakh", get_model, cache=cache)
+    assert len(cache) == 2
+    assert get_model.calls == 3
+
+    assert questai.convert_to_sql("sedans under 5 lakh", get_model, cache=cache)[1] == "cache"
+    assert questai.convert_to_sql("hatchbacks under 6 lakh", get_model, cache=cache)[1] == "llm"
+    assert get_model.calls == 4
+    cache.close()
+
+
+def test_cache_persists_across_instances(tmp_path, get_model):
+    path = str(tmp_path / "persist.sqlite")
+    first = questai.SqlCache(path=path)
+    questai.convert_to_sql("SUVs under 10 lakh", get_model, cache=first)
+    first.close()
+
+    second = questai.SqlCache(path=path)
+    assert questai.convert_to_sql("SUVs under 10 lakh", get_model, cache=second)[1] == "cache"
+    assert get_model.calls == 1
+    second.close()
+
+
+def test_new_prompt_version_invalidates_cached_sql(tmp_path, get_model, monkeypatch):
+    path = str(tmp_path / "versions.sqlite")
+    first = questai.SqlCache(path=path)
+    questai.convert_to_sql("SUVs under 10 lakh", get_model, cache=first)
+    first.close()
+
+    monkeypatch.setattr(questai, "PROMPT_VERSION", "edited-prompt")
+    second = questai.SqlCache(path=path)
+    assert len(second) == 0
+    assert questai.convert_to_sql("SUVs under 10 lakh", get_model, cache=second)[1] == "llm"
+    assert get_model.calls == 2
+    second.close()
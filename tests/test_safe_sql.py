@@ -0,0 +1,162 @@
+import re
+
+import pytest
+
+import safe_sql
+
+KEYWORDS = [
+    "INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "CREATE", "RENAME", "TRUNCATE", "GRANT", "REVOKE",
+    "CALL", "DO", "HANDLER", "LOAD", "LOCK", "UNLOCK", "SET", "INTO", "OUTFILE", "DUMPFILE", "SHARE",
+    "SLEEP", "BENCHMARK", "GET_LOCK", "RELEASE_LOCK", "LOAD_FILE",
+]
+HINT = "/*+ MAX_EXECUTION_TIME(5000) */"
+
+
+def prepare(sql, max_rows=10):
+    return safe_sql.prepare_select(sql, max_rows=max_rows, max_execution_ms=5000)
+
+
+def test_keyword_list_matches_the_guard():
+    assert set(KEYWORDS) == set(re.findall(r"[A-Z_]{2,}", safe_sql.FORBIDDEN.pattern)) - {"FOR"}
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM Vehicle; DROP TABLE Vehicle",
+    "SELECT * FROM Vehicle; SELECT * FROM Price",
+    "SELECT * FROM Vehicle /* harmless */; DELETE FROM Price;",
+])
+def test_only_one_statement(sql):
+    with pytest.raises(safe_sql.UnsafeQuery, match="single statement"):
+        prepare(sql)
+
+
+def test_trailing_semicolons_are_dropped():
+    assert prepare("SELECT brand FROM Vehicle LIMIT 5;;") == f"SELECT {HINT} brand FROM Vehicle LIMIT 5"
+
+
+def test_comments_are_stripped_before_checking():
+    # A comment cannot hide a second statement from the checks, or smuggle one into the SQL that runs.
+    sql = prepare("SELECT brand FROM Vehicle /* ;DROP TABLE Vehicle */ -- ; DELETE FROM Price\n# ;TRUNCATE Price")
+    assert "DROP" not in sql and "DELETE" not in sql and "TRUNCATE" not in sql and ";" not in sql
+    assert sql.startswith(f"SELECT {HINT} brand FROM Vehicle")
+    with pytest.raises(safe_sql.UnsafeQuery, match="single statement"):
+        prepare("SELECT brand FROM Vehicle /* comment */;DROP TABLE Vehicle")
+
+
+def test_keywords_inside_literals_are_allowed():
+    sql = prepare("SELECT * FROM Vehicle WHERE variant = 'drop top; update' AND model = \"Set\"")
+    assert "'drop top; update'" in sql
+
+
+@pytest.mark.parametrize("keyword", KEYWORDS)
+def test_forbidden_keywords(keyword):
+    with pytest.raises(safe_sql.UnsafeQuery, match=keyword):
+        prepare(f"SELECT brand FROM Vehicle WHERE {keyword.lower()} (1)")
+
+
+def test_locking_reads_are_forbidden():
+    with pytest.raises(safe_sql.UnsafeQuery, match=r"FOR\s+UPDATE"):
+        prepare("SELECT * FROM Vehicle FOR  UPDATE")
+
+
+def test_only_selects():
+    with pytest.raises(safe_sql.UnsafeQuery, match="Only SELECT"):
+        prepare("SHOW TABLES")
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT brand FROM Vehicle", "brand FROM Vehicle\nLIMIT 11"),
+    ("SELECT brand FROM Vehicle LIMIT 500", "brand FROM Vehicle LIMIT 11"),
+    ("SELECT brand FROM Vehicle LIMIT 5", "brand FROM Vehicle LIMIT 5"),
+    ("SELECT brand FROM Vehicle LIMIT 11", "brand FROM Vehicle LIMIT 11"),
+    ("SELECT brand FROM Vehicle LIMIT 20, 500", "brand FROM Vehicle LIMIT 11 OFFSET 20"),
+    ("SELECT brand FROM Vehicle LIMIT 500 OFFSET 20", "brand FROM Vehicle LIMIT 11 OFFSET 20"),
+    (
+        "SELECT brand FROM Vehicle WHERE variant = 'x LIMIT 9' LIMIT 50",
+        "brand FROM Vehicle WHERE variant = 'x LIMIT 9' LIMIT 11",
+    ),
+])
+def test_limit_is_capped_at_max_rows_plus_one(sql, expected):
+    assert prepare(sql) == f"SELECT {HINT} {expected}"
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("select brand from Vehicle", f"select {HINT} brand from Vehicle"),
+    (
+        "WITH cheap AS (SELECT vehicle_id FROM Price WHERE price < 500000) SELECT v.brand FROM Vehicle v",
+        f"WITH cheap AS (SELECT vehicle_id FROM Price WHERE price < 500000) SELECT {HINT} v.brand FROM Vehicle v",
+    ),
+    (
+        "SELECT brand FROM Vehicle WHERE vehicle_id IN (SELECT vehicle_id FROM Price)",
+        f"SELECT {HINT} brand FROM Vehicle WHERE vehicle_id IN (SELECT vehicle_id FROM Price)",
+    ),
+    ("SELECT 'SELECT' AS word", f"SELECT {HINT} 'SELECT' AS word"),
+])
+def test_time_limit_hint_follows_the_top_level_select(sql, expected):
+    assert prepare(sql) == f"{expected}\nLIMIT 11"
+
+
+class ExplainCursor:
+    """Answers EXPLAIN with a fixed plan, and the query itself with `rows` dicts, in batches."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.description = [("id",), ("select_type",), ("table",), ("rows",)]
+        self.pending = []
+
+    def execute(self, sql):
+        self.conn.executed.append(sql)
+        self.pending = list(self.conn.plan if sql.startswith("EXPLAIN ") else self.conn.rows)
+
+    def fetchmany(self, size):
+        batch, self.pending = self.pending[:size], self.pending[size:]
+        return batch
+
+    def fetchall(self):
+        rest, self.pending = self.pending, []
+        return rest
+
+    def close(self):
+        pass
+
+
+class ExplainConnection:
+    def __init__(self, plan, rows=()):
+        self.plan, self.rows = plan, list(rows)
+        self.executed = []
+
+    def cursor(self, dictionary=False):
+        return ExplainCursor(self)
+
+
+def test_joined_tables_multiply():
+    plan = [(1, "SIMPLE", "v", 400), (1, "SIMPLE", "p", 10), (1, "SIMPLE", "e", 1)]
+    assert safe_sql.estimate_rows(ExplainConnection(plan).cursor(), "SELECT 1") == 4000
+
+
+def test_union_parts_add_up():
+    plan = [
+        (1, "PRIMARY", "v", 400), (1, "PRIMARY", "p", 10),
+        (2, "UNION", "v", 300),
+        (None, "UNION RESULT", "<union1,2>", None),
+    ]
+    assert safe_sql.estimate_rows(ExplainConnection(plan).cursor(), "SELECT 1") == 4300
+
+
+def test_over_budget_query_is_not_run():
+    conn = ExplainConnection([(1, "SIMPLE", "v", 5000), (1, "SIMPLE", "p", 10)])
+    with pytest.raises(safe_sql.QueryTooExpensive):
+        safe_sql.run_select(conn, "SELECT * FROM Vehicle", row_budget=10_000)
+    assert len(conn.executed) == 1 and conn.executed[0].startswith("EXPLAIN ")
+
+
+@pytest.mark.parametrize("returned, truncated", [(3, False), (4, False), (5, True)])
+def test_run_select_reports_truncation(monkeypatch, returned, truncated):
+    monkeypatch.setattr(safe_sql, "FETCH_BATCH", 2)
+    # What the server returns under the LIMIT of max_rows + 1.
+    rows = [{"vehicle_id": i} for i in range(returned)]
+    conn = ExplainConnection([(1, "SIMPLE", "v", 100)], rows)
+    result = safe_sql.run_select(conn, "SELECT vehicle_id FROM Vehicle", max_rows=4)
+    assert result.rows == rows[:4] and result.truncated is truncated
+    assert result.estimated_rows == 100 and result.sql.endswith("LIMIT 5")
+    assert conn.executed == [f"EXPLAIN {result.sql}", result.sql]
@@ -0,0 +1,79 @@
+import pytest
+
+import search_index
+
+ROWS = [
+    (1, "maruti", "maruti swift", "maruti swift lxi"),
+    (2, "maruti", "maruti swift", "maruti swift zxi plus"),
+    (3, "hyundai", "hyundai creta", "hyundai creta sx"),
+    (4, "hyundai", "hyundai i20", "hyundai i20 asta"),
+    (5, "tata", "tata nexon", "tata nexon creative"),
+]
+
+
+@pytest.fixture
+def index():
+    return search_index.SearchIndex(ROWS, version=1)
+
+
+def test_prefix_hits(index):
+    assert index.match_ids("hyun") == (3, 4)
+    assert index.match_ids("maruti sw z") == (2,)
+    suggestions = index.suggest("cre")
+    # "creta" and "creative" both start with "cre"; the shorter name comes first.
+    assert [s.vehicle_id for s in suggestions] == [3, 5]
+    assert {s.score for s in suggestions} == {search_index.PREFIX}
+
+
+def test_exact_token_outranks_a_prefix(index):
+    assert index.suggest("swift lxi")[0].vehicle_id == 1
+    assert index.suggest("swift lxi")[0].score == 2 * search_index.EXACT
+
+
+@pytest.mark.parametrize("typed, found", [
+    ("swfit", (1, 2)),  # one adjacent swap: a single Damerau edit
+    ("hundai certa", (3,)),  # a dropped letter and a swap, in different tokens
+    ("nexno", (5,)),
+])
+def test_typos_within_the_edit_bound(index, typed, found):
+    assert index.match_ids(typed) == found
+    # Scores add up per query token; a fuzzy token scores below a prefix hit.
+    tokens = len(typed.split())
+    assert all(s.score < tokens * search_index.PREFIX for s in index.suggest(typed))
+
+
+def test_typos_beyond_the_edit_bound(index):
+    # Short tokens allow one edit: two swaps are too many.
+    assert index.match_ids("wsfti") == ()
+    # Long tokens allow two, but not three.
+    assert index.match_ids("hyudnia") == (3, 4)
+    assert index.match_ids("hdynuia") == ()
+
+
+@pytest.mark.parametrize("query, token, max_edits, edits", [
+    ("swfit", "swift", 1, 1),
+    ("swi", "swift", 1, 0),  # a prefix costs nothing
+    ("cerat", "creta", 1, None),
+    ("cerat", "creta", 2, 2),
+    ("xyz", "swift", 2, None),
+])
+def test_prefix_distance(query, token, max_edits, edits):
+    assert search_index.prefix_distance(query, token, max_edits) == edits
+
+
+def test_sync_picks_up_added_removed_and_renamed_vehicles(index):
+    rows = [row for row in ROWS if row[0] != 4]
+    rows[0] = (1, "maruti", "maruti swift", "maruti swift lxi cng")
+    rows.append((6, "kia", "kia seltos", "kia seltos htx"))
+    assert index.sync(rows, version=2) == (2, 2)
+    assert index.version == 2 and len(index) == 5
+
+    assert index.match_ids("seltos") == (6,)
+    assert index.match_ids("i20") == () and index.match_ids("asta") == ()
+    assert index.match_ids("cng") == (1,)
+    # Tokens and trigrams of the removed vehicle are gone, so nothing can still match them.
+    assert "asta" not in index.postings and "i20" not in index.tokens
+    assert all("asta" not in tokens for tokens in index.grams.values())
+    assert index.tokens == sorted(index.postings)
+
+    assert index.sync(rows, version=3) == (0, 0)
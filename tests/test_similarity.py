@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import similarity
+
+# Four cars on a line; the first two are variants of one model.
+FEATURES = np.array([[0.0], [1.0], [3.0], [10.0]], dtype=np.float32)
+GROUPS = np.array([0, 0, 1, 2])
+
+
+def test_same_group_is_never_a_neighbour():
+    rows, distances = similarity.nearest_neighbours(FEATURES, GROUPS, k=2)
+    assert rows.tolist() == [[2, 3], [2, 3], [1, 0], [2, 1]]
+    assert np.allclose(distances, [[3, 10], [2, 9], [2, 3], [7, 9]])
+
+
+def test_slots_without_a_candidate_are_empty():
+    # Row 0 has only two candidates outside its group, and k is clipped to n - 1.
+    rows, distances = similarity.nearest_neighbours(FEATURES, GROUPS, k=10)
+    assert rows.shape == distances.shape == (4, 3)
+    assert rows[0].tolist() == [2, 3, -1] and np.isinf(distances[0, 2])
+    assert rows[3].tolist() == [2, 1, 0]
+
+
+def test_blocks_do_not_change_the_result():
+    features = np.random.default_rng(7).normal(size=(300, 6)).astype(np.float32)
+    groups = np.arange(300) // 3
+    whole = similarity.nearest_neighbours(features, groups, k=5, block_mb=64)
+    # A zero budget falls back to one row per block.
+    blocked = similarity.nearest_neighbours(features, groups, k=5, block_mb=0)
+    assert np.array_equal(whole[0], blocked[0]) and np.allclose(whole[1], blocked[1])
+
+
+def car(vehicle_id, brand, model, price):
+    return {"vehicle_id": vehicle_id, "brand": brand, "model": model, "variant": f"{brand} {model} {vehicle_id}",
+            "type": "suv cars", "image_link": None, "base_price": price, "bhp_value": price / 10_000}
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame([
+        car(1, "tata", "sierra", 1_500_000), car(2, "tata", "sierra", 1_550_000),
+        car(3, "hindustan", "sierra", 1_520_000), car(4, "kia", "seltos", 1_000_000),
+    ])
+
+
+def test_brands_sharing_a_model_name_are_neighbours(frame):
+    index = similarity.SimilarityIndex.build(frame, k=3)
+    # The two Tata Sierras skip each other, but not the Hindustan Sierra.
+    assert index.neighbours == {1: [3, 4], 2: [3, 4], 3: [1, 2, 4], 4: [1, 3, 2]}
+    assert [card["vehicle_id"] for card in index.similar(1, limit=1)] == [3]
+
+
+def test_index_saved_in_an_older_format_is_rebuilt(frame, tmp_path, monkeypatch):
+    path = str(tmp_path / "similarity.npz")
+    similarity.SimilarityIndex.build(frame, version="v1", k=3).save(path)
+    assert similarity.SimilarityIndex.load(path, version="v1") is not None
+    monkeypatch.setattr(similarity, "INDEX_FORMAT", similarity.INDEX_FORMAT + 1)
+    assert similarity.SimilarityIndex.load(path, version="v1") is None
@@ -0,0 +1,97 @@
+import csv
+import json
+
+import pytest
+
+import sinks
+
+FIELDS = ["model", "variant", "price"]
+ERROR_FIELDS = ["url", "error"]
+
+
+def rows(model, count):
+    return [{"model": model, "variant": f"{model} v{i}", "price": str(i), "extra": "dropped"} for i in range(count)]
+
+
+def open_run(tmp_path, resume=False):
+    """Data and error sinks plus checkpoint of one crawl run, resuming from the checkpoint when asked."""
+    checkpoint = sinks.Checkpoint(str(tmp_path / "checkpoint.tsv"))
+    data = sinks.open_sink(str(tmp_path / "cars.csv"), "csv", FIELDS,
+                           resume_offset=checkpoint.data_offset if resume else None)
+    errors = sinks.open_sink(str(tmp_path / "errors.jsonl"), "jsonl", ERROR_FIELDS,
+                             resume_offset=checkpoint.error_offset if resume else None)
+    return sinks.StreamingWriter(data, errors, checkpoint, flush_every=1), checkpoint
+
+
+def crash(writer):
+    """Stops a run without a final flush: rows written since the last checkpoint stay in the files."""
+    for sink in (writer.data_sink, writer.error_sink):
+        sink.file.flush()
+        sink.file.close()
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as file:
+        return list(csv.reader(file))
+
+
+def test_resume_truncates_rows_after_the_checkpoint(tmp_path):
+    writer, _ = open_run(tmp_path)
+    writer.add_model("/swift", rows("swift", 2), [])
+    writer.add_model("/nexon", rows("nexon", 3), [{"url": "/nexon/xz.htm", "error": "timeout"}])
+    # Rows of a third model reach the files, but the run dies before they are checkpointed.
+    writer.flush_every = 100
+    writer.add_model("/creta", rows("creta", 2), [{"url": "/creta/sx.htm", "error": "timeout"}])
+    crash(writer)
+    assert len(read_csv(tmp_path / "cars.csv")) == 1 + 7
+
+    writer, checkpoint = open_run(tmp_path, resume=True)
+    assert checkpoint.completed == {"/swift", "/nexon"}
+    assert (tmp_path / "cars.csv").stat().st_size == checkpoint.data_offset
+    writer.add_model("/creta", rows("creta", 2), [])
+    writer.close()
+
+    table = read_csv(tmp_path / "cars.csv")
+    assert table[0] == FIELDS and FIELDS not in table[1:]
+    assert [row[1] for row in table[1:]] == [
+        "swift v0", "swift v1", "nexon v0", "nexon v1", "nexon v2", "creta v0", "creta v1",
+    ]
+    with open(tmp_path / "errors.jsonl", encoding="utf-8") as file:
+        assert [json.loads(line) for line in file] == [{"url": "/nexon/xz.htm", "error": "timeout"}]
+
+
+def test_torn_last_checkpoint_line_is_ignored(tmp_path):
+    writer, _ = open_run(tmp_path)
+    writer.add_model("/swift", rows("swift", 2), [])
+    writer.close()
+    with open(tmp_path / "checkpoint.tsv", "a", encoding="utf-8") as file:
+        file.write("/nexon\t9")
+
+    checkpoint = sinks.Checkpoint(str(tmp_path / "checkpoint.tsv"))
+    assert checkpoint.completed == {"/swift"}
+    assert checkpoint.data_offset == (tmp_path / "cars.csv").stat().st_size
+
+
+def test_fresh_run_overwrites_the_output(tmp_path):
+    writer, _ = open_run(tmp_path)
+    writer.add_model("/swift", rows("swift", 2), [])
+    writer.close()
+    writer, _ = open_run(tmp_path)
+    writer.add_model("/nexon", rows("nexon", 1), [])
+    writer.close()
+    assert read_csv(tmp_path / "cars.csv") == [FIELDS, ["nexon", "nexon v0", "0"]]
+
+
+def test_parquet_resume_writes_the_next_part(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "cars.parquet")
+    for run, model in enumerate(["swift", "nexon", "creta"]):
+        sink = sinks.open_sink(path, "parquet", FIELDS, resume_offset=None if run == 0 else 0)
+        for row in rows(model, 2):
+            sink.write(row)
+        sink.close()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cars.parquet", "cars.part1.parquet", "cars.part2.parquet"]
+    assert pq.read_table(path).column("model").to_pylist() == ["swift", "swift"]
+    part = pq.read_table(str(tmp_path / "cars.part2.parquet"))
+    assert part.column_names == FIELDS and part.column("model").to_pylist() == ["creta", "creta"]